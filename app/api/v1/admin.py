@@ -0,0 +1,58 @@
+"""
+管理相关API
+"""
+from typing import AsyncIterator, Optional
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.core.user_cache import UserPrincipal
+from app.core.responses import SerializedRoute
+from app.dependencies import get_current_admin
+from app.services.provisioning_service import detect_format, parse_rows, provision_users
+
+
+router = APIRouter(route_class=SerializedRoute)
+
+
+async def _ndjson(events: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    async for event in events:
+        yield (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+@router.post("/users/bulk")
+async def bulk_provision_users(
+    file: UploadFile = File(...),
+    fmt: Optional[str] = Form(None),
+    admin: UserPrincipal = Depends(get_current_admin),
+):
+    """
+    批量开通用户（管理员）
+
+    - **file**: CSV（表头 username,email,password）或 NDJSON（每行 {"username", "email", "password"}）
+    - **fmt**: csv / ndjson，默认按文件扩展名判断
+
+    以 NDJSON 事件流返回进度：start → error（被拒绝的行，含行号与原因）/ progress（每批完成后）→ done；
+    单行冲突不影响其他行
+    """
+    data = await file.read(settings.MAX_UPLOAD_SIZE + 1)
+    if len(data) > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="文件过大"
+        )
+
+    try:
+        rows, errors = await asyncio.to_thread(parse_rows, data, fmt or detect_format(file.filename))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not rows and not errors:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="文件为空")
+
+    return StreamingResponse(
+        _ndjson(provision_users(rows, errors)),
+        media_type="application/x-ndjson"
+    )
@@ -1,25 +1,28 @@
 """
 答案管理API
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.dependencies import get_current_user
-from app.models.user import User
+from app.dependencies import get_current_user, get_owned_answer, resolve_owned_question
+from app.core.user_cache import UserPrincipal
+from app.core.responses import SerializedRoute
+from app.core.conditional import artifact_cache_control, check_not_modified, make_etag
+from app.models.interview import Interview as InterviewModel
 from app.models.question import Question as QuestionModel
 from app.models.answer import Answer as AnswerModel
-from app.schemas.answer import Answer, AnswerCreate
-from app.services.interview_service import get_interview_by_id
+from app.schemas.answer import Answer, AnswerCreate, AnswerBulkCreate, AnswerBulkResult
+from app.services.answer_service import get_owned_question_states, create_answer, create_answers_bulk
 
 
-router = APIRouter()
+router = APIRouter(route_class=SerializedRoute)
 
 
 @router.post("/", response_model=Answer, status_code=status.HTTP_201_CREATED)
 async def submit_answer(
     answer_create: AnswerCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -31,128 +34,120 @@ async def submit_answer(
     - **audio_url**: 音频URL（语音回答时）
     - **duration**: 回答时长（秒，语音回答时）
     """
-    # 获取问题
-    question = db.query(QuestionModel).filter(
-        QuestionModel.id == answer_create.question_id
-    ).first()
+    # 获取问题并检查权限（一次联表查询）
+    resolve_owned_question(db, current_user, answer_create.question_id)
     
-    if not question:
+    # 创建答案（依赖 question_id 唯一约束判断是否已回答）
+    db_answer = create_answer(db, answer_create)
+    if db_answer is None:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="问题不存在"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="该问题已有回答"
         )
     
-    # 检查权限
-    interview = get_interview_by_id(db, question.interview_id)
-    if not interview or interview.user_id != current_user.id:
+    return db_answer
+
+
+@router.post("/bulk", response_model=AnswerBulkResult, status_code=status.HTTP_201_CREATED)
+async def submit_answers_bulk(
+    bulk_create: AnswerBulkCreate,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    批量提交答案
+
+    - **answers**: 答案列表（1-50条，字段同单条提交）
+
+    一次查询校验全部问题的归属，一条语句写入所有答案；
+    已有回答的问题会被跳过并在 skipped 中返回
+    """
+    question_ids = [a.question_id for a in bulk_create.answers]
+    if len(set(question_ids)) != len(question_ids):
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="无权回答此问题"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="存在重复的问题ID"
         )
-    
-    # 检查是否已回答
-    existing_answer = db.query(AnswerModel).filter(
-        AnswerModel.question_id == answer_create.question_id
-    ).first()
-    
-    if existing_answer:
+
+    # 检查权限（同时得到各问题是否已回答）
+    states = get_owned_question_states(db, current_user.id, question_ids)
+    if len(states) != len(question_ids):
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="该问题已有回答"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="问题不存在或无权回答"
         )
-    
-    # 创建答案
-    db_answer = AnswerModel(
-        question_id=answer_create.question_id,
-        answer_text=answer_create.answer_text,
-        answer_type=answer_create.answer_type,
-        audio_url=answer_create.audio_url,
-        duration=answer_create.duration
+
+    pending = [a for a in bulk_create.answers if not states[a.question_id]]
+    created = create_answers_bulk(db, pending)
+
+    # 校验后被并发请求抢先回答的问题同样计入 skipped
+    created_ids = {a.question_id for a in created}
+    return AnswerBulkResult(
+        created=created,
+        skipped=[qid for qid in question_ids if qid not in created_ids]
     )
-    db.add(db_answer)
-    db.commit()
-    db.refresh(db_answer)
-    
-    return db_answer
 
 
 @router.get("/{answer_id}", response_model=Answer)
 async def get_answer(
-    answer_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    answer: AnswerModel = Depends(get_owned_answer)
 ):
     """
     获取答案详情
     
     - **answer_id**: 答案ID
     """
-    answer = db.query(AnswerModel).filter(AnswerModel.id == answer_id).first()
-    
-    if not answer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="答案不存在"
-        )
-    
-    # 检查权限
-    question = db.query(QuestionModel).filter(
-        QuestionModel.id == answer.question_id
-    ).first()
-    
-    if question:
-        interview = get_interview_by_id(db, question.interview_id)
-        if not interview or interview.user_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="无权访问此答案"
-            )
-    
     return answer
 
 
 @router.get("/question/{question_id}", response_model=Answer)
 async def get_answer_by_question(
     question_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     根据问题ID获取答案
     
     - **question_id**: 问题ID
+
+    支持 If-None-Match（命中返回 304）；已完成面试的答案可被客户端缓存
     """
-    # 获取问题
-    question = db.query(QuestionModel).filter(QuestionModel.id == question_id).first()
-    
-    if not question:
+    # 校验查询：问题、归属用户、面试状态与答案版本一次查询，不加载答案内容
+    row = db.query(
+        InterviewModel.user_id, InterviewModel.status, AnswerModel.id, AnswerModel.created_at
+    ).select_from(QuestionModel).join(
+        InterviewModel, InterviewModel.id == QuestionModel.interview_id
+    ).outerjoin(
+        AnswerModel, AnswerModel.question_id == QuestionModel.id
+    ).filter(QuestionModel.id == question_id).first()
+    
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="问题不存在"
         )
     
     # 检查权限
-    interview = get_interview_by_id(db, question.interview_id)
-    if not interview or interview.user_id != current_user.id:
+    owner_id, interview_status, answer_id, created_at = row
+    if owner_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="无权访问此问题的答案"
         )
     
-    # 获取答案
-    answer = db.query(AnswerModel).filter(
-        AnswerModel.question_id == question_id
-    ).first()
-    
-    if not answer:
+    if answer_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="该问题尚未回答"
         )
     
-    return answer
-
-
-
-
-
+    not_modified = check_not_modified(
+        request, response, make_etag("answer", answer_id, created_at),
+        artifact_cache_control(interview_status)
+    )
+    if not_modified:
+        return not_modified
+    return db.get(AnswerModel, answer_id)
@@ -1,30 +1,41 @@
 """
 认证相关API
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, get_current_user_model, security
+from app.core.user_cache import UserPrincipal
+from app.core.responses import SerializedRoute
 from app.schemas.user import UserCreate, User
-from app.schemas.auth import Token, LoginRequest, RefreshTokenRequest
+from app.schemas.auth import (
+    Token, LoginRequest, RefreshTokenRequest, LogoutRequest, ChangePasswordRequest, AvailabilityResult
+)
 from app.services.user_service import (
     create_user,
-    get_user_by_username,
-    get_user_by_email,
     get_user_by_id
 )
+from app.services.availability_service import availability_index, check_availability
 from app.services.auth_service import authenticate_user, generate_tokens
-from app.core.security import decode_token
+from app.core.security import decode_token, hash_password, verify_and_update_password
+from app.core.token_revocation import revoke_token, revoke_user_tokens
+from app.core.rate_limit import (
+    availability_ip_limiter, client_ip, enforce_rate_limit,
+    login_ip_limiter, login_user_limiter, register_ip_limiter
+)
 from app.models.user import User as UserModel
 
 
-router = APIRouter()
+router = APIRouter(route_class=SerializedRoute)
 
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
 async def register(
     user_create: UserCreate,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
@@ -33,35 +44,61 @@ async def register(
     - **username**: 用户名（3-50字符，唯一）
     - **email**: 邮箱（唯一）
     - **password**: 密码（至少6字符）
+
+    按客户端 IP 限流，超限返回 429；用户名/邮箱重复时在哈希密码之前直接返回 400
     """
-    # 检查用户名是否已存在
-    if get_user_by_username(db, user_create.username):
+    await enforce_rate_limit(register_ip_limiter, client_ip(request))
+
+    # 检查用户名是否已存在（布隆过滤器判定不存在时免查库）
+    if availability_index.username_taken(db, user_create.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="用户名已被使用"
         )
 
     # 检查邮箱是否已存在
-    if get_user_by_email(db, user_create.email):
+    if availability_index.email_taken(db, user_create.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="邮箱已被使用"
         )
 
-    # 创建用户
-    user = create_user(db, user_create)
+    # 创建用户（密码哈希在专用线程池中计算，不阻塞事件循环）
+    hashed_password = await hash_password(user_create.password)
+    user = create_user(db, user_create, hashed_password)
     if not user:
+        # 并发注册同一用户名/邮箱时由唯一约束兜底
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="用户创建失败"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="用户名或邮箱已被使用"
         )
 
     return user
 
 
+@router.get("/availability", response_model=AvailabilityResult)
+async def availability(
+    request: Request,
+    username: Optional[str] = None,
+    email: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    检查用户名/邮箱是否可用（注册表单实时校验）
+
+    - **username**: 用户名（可选）
+    - **email**: 邮箱（可选）
+
+    返回各字段是否可用，未传入的字段为 null；按客户端 IP 限流，超限返回 429
+    """
+    await enforce_rate_limit(availability_ip_limiter, client_ip(request))
+    return check_availability(db, username, email)
+
+
 @router.post("/login", response_model=Token)
 async def login(
     login_request: LoginRequest,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
@@ -70,10 +107,14 @@ async def login(
     - **username**: 用户名
     - **password**: 密码
 
-    返回访问令牌和刷新令牌
+    返回访问令牌和刷新令牌；按客户端 IP 与用户名限流，超限返回 429
     """
+    # 限流先于任何数据库查询与密码计算
+    await enforce_rate_limit(login_ip_limiter, client_ip(request))
+    await enforce_rate_limit(login_user_limiter, login_request.username.lower())
+
     # 验证用户
-    user = authenticate_user(db, login_request.username, login_request.password)
+    user = await authenticate_user(db, login_request.username, login_request.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -103,7 +144,7 @@ async def refresh_token(
 
     - **refresh_token**: 刷新令牌
 
-    返回新的访问令牌和刷新令牌
+    返回新的访问令牌和刷新令牌；旧刷新令牌随即吊销，重复使用将被拒绝
     """
     # 解码刷新令牌
     payload = decode_token(refresh_request.refresh_token)
@@ -140,6 +181,14 @@ async def refresh_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # 轮换：吊销旧刷新令牌（并发请求中只有一个能成功）
+    if not revoke_token(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="刷新令牌已被使用",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
     # 生成新令牌
     tokens = generate_tokens(user.id)
 
@@ -154,7 +203,7 @@ async def refresh_token(
 
 @router.get("/me", response_model=User)
 async def get_current_user_info(
-    current_user: UserModel = Depends(get_current_user)
+    current_user: UserModel = Depends(get_current_user_model)
 ):
     """
     获取当前登录用户信息
@@ -167,16 +216,69 @@ async def get_current_user_info(
 
 @router.post("/logout", status_code=status.HTTP_200_OK)
 async def logout(
-    current_user: UserModel = Depends(get_current_user)
+    logout_request: Optional[LogoutRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """
     用户登出
 
-    注意：由于使用JWT，服务端无需维护会话状态。
-    客户端应删除本地存储的token。
+    - **refresh_token**: 可选，同时吊销的刷新令牌
+
+    吊销当前访问令牌（及传入的刷新令牌），直到其原本的过期时间。
+    客户端仍应删除本地存储的token。
     """
+    payload = decode_token(credentials.credentials)
+    if payload:
+        revoke_token(payload)
+
+    if logout_request and logout_request.refresh_token:
+        refresh_payload = decode_token(logout_request.refresh_token)
+        if (
+            refresh_payload
+            and refresh_payload.get("type") == "refresh"
+            and str(refresh_payload.get("sub")) == str(current_user.id)
+        ):
+            revoke_token(refresh_payload)
+
     return {
         "message": "登出成功",
-        "detail": "请在客户端删除token"
+        "detail": "令牌已失效"
+    }
+
+
+@router.post("/change-password", response_model=Token)
+async def change_password(
+    change_request: ChangePasswordRequest,
+    current_user: UserModel = Depends(get_current_user_model),
+    db: Session = Depends(get_db)
+):
+    """
+    修改密码
+
+    - **old_password**: 原密码
+    - **new_password**: 新密码（至少6字符）
+
+    修改成功后此前签发的全部令牌失效，返回新的访问令牌和刷新令牌
+    """
+    valid, _ = await verify_and_update_password(change_request.old_password, current_user.hashed_password)
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="原密码错误"
+        )
+
+    current_user.hashed_password = await hash_password(change_request.new_password)
+    db.commit()
+    revoke_user_tokens(current_user.id)
+
+    # 生成新令牌（签发时间晚于吊销截止时间）
+    tokens = generate_tokens(current_user.id)
+
+    return {
+        "access_token": tokens["access_token"],
+        "refresh_token": tokens["refresh_token"],
+        "token_type": tokens["token_type"],
+        "user": current_user
     }
 
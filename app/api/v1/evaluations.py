@@ -1,27 +1,31 @@
 """
 评价管理API
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.dependencies import get_current_user
-from app.models.user import User
+from app.dependencies import get_current_user, get_owned_interview, resolve_owned_interview
+from app.core.user_cache import UserPrincipal
+from app.core.responses import SerializedRoute
+from app.core.conditional import artifact_cache_control, check_not_modified, make_etag
+from app.core.response_cache import cached_json, cached_response
+from app.models.interview import Interview as InterviewModel
 from app.models.evaluation import Evaluation as EvaluationModel
 from app.models.question import Question as QuestionModel
 from app.models.answer import Answer as AnswerModel
 from app.schemas.evaluation import Evaluation, EvaluationCreate
-from app.services.interview_service import get_interview_by_id, complete_interview
+from app.services.interview_service import complete_interview
 from app.services.ai_service import evaluate_interview_answers
 
 
-router = APIRouter()
+router = APIRouter(route_class=SerializedRoute)
 
 
 @router.post("/", response_model=Evaluation, status_code=status.HTTP_201_CREATED)
 async def create_evaluation(
     evaluation_create: EvaluationCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -30,21 +34,8 @@ async def create_evaluation(
     - **interview_id**: 面试ID
     - 各项评分和反馈
     """
-    # 获取面试记录
-    interview = get_interview_by_id(db, evaluation_create.interview_id)
-    
-    if not interview:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="面试记录不存在"
-        )
-    
-    # 检查权限
-    if interview.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="无权操作此面试记录"
-        )
+    # 获取面试记录并检查权限
+    interview = resolve_owned_interview(db, current_user, evaluation_create.interview_id)
     
     # 检查是否已有评价
     existing_evaluation = db.query(EvaluationModel).filter(
@@ -83,8 +74,7 @@ async def create_evaluation(
 
 @router.post("/generate/{interview_id}", response_model=Evaluation, status_code=status.HTTP_201_CREATED)
 async def generate_evaluation(
-    interview_id: int,
-    current_user: User = Depends(get_current_user),
+    interview: InterviewModel = Depends(get_owned_interview),
     db: Session = Depends(get_db)
 ):
     """
@@ -94,21 +84,7 @@ async def generate_evaluation(
     
     根据面试问题和回答，使用AI生成全面的评价
     """
-    # 获取面试记录
-    interview = get_interview_by_id(db, interview_id)
-    
-    if not interview:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="面试记录不存在"
-        )
-    
-    # 检查权限
-    if interview.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="无权操作此面试记录"
-        )
+    interview_id = interview.id
     
     # 检查是否已有评价
     existing_evaluation = db.query(EvaluationModel).filter(
@@ -121,29 +97,21 @@ async def generate_evaluation(
             detail="该面试已有评价"
         )
     
-    # 获取所有问题和答案
-    questions = db.query(QuestionModel).filter(
+    # 获取所有问题及对应的答案（一次联表查询）
+    rows = db.query(QuestionModel.question_text, AnswerModel.answer_text).outerjoin(
+        AnswerModel, AnswerModel.question_id == QuestionModel.id
+    ).filter(
         QuestionModel.interview_id == interview_id
     ).order_by(QuestionModel.question_order).all()
     
-    if not questions:
+    if not rows:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="面试没有问题"
         )
     
-    # 获取对应的答案
-    question_texts = []
-    answer_texts = []
-    
-    for question in questions:
-        answer = db.query(AnswerModel).filter(
-            AnswerModel.question_id == question.id
-        ).first()
-        
-        if answer:
-            question_texts.append(question.question_text)
-            answer_texts.append(answer.answer_text)
+    question_texts = [q for q, a in rows if a is not None]
+    answer_texts = [a for q, a in rows if a is not None]
     
     if not answer_texts:
         raise HTTPException(
@@ -193,76 +161,108 @@ async def generate_evaluation(
 @router.get("/interview/{interview_id}", response_model=Evaluation)
 async def get_interview_evaluation(
     interview_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     获取面试的评价
     
     - **interview_id**: 面试ID
+
+    支持 If-None-Match（命中返回 304）；已完成面试的评价可被客户端缓存
     """
-    # 获取面试记录
-    interview = get_interview_by_id(db, interview_id)
+    return await cached_response(
+        request, db, current_user.id, f"interview_evaluation:{interview_id}",
+        lambda: _load_interview_evaluation(request, db, current_user, interview_id)
+    )
+
+
+def _load_interview_evaluation(request: Request, db: Session, current_user: UserPrincipal, interview_id: int):
+    """校验查询命中 If-None-Match 时返回 304，否则加载评价并生成可缓存的响应"""
+    # 校验查询：面试归属、状态与评价版本一次查询，不加载评价内容
+    row = db.query(
+        InterviewModel.user_id, InterviewModel.status, EvaluationModel.id, EvaluationModel.created_at
+    ).outerjoin(
+        EvaluationModel, EvaluationModel.interview_id == InterviewModel.id
+    ).filter(InterviewModel.id == interview_id).first()
     
-    if not interview:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="面试记录不存在"
         )
     
     # 检查权限
-    if interview.user_id != current_user.id:
+    owner_id, interview_status, evaluation_id, created_at = row
+    if owner_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="无权访问此面试记录"
         )
     
-    # 获取评价
-    evaluation = db.query(EvaluationModel).filter(
-        EvaluationModel.interview_id == interview_id
-    ).first()
-    
-    if not evaluation:
+    if evaluation_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="该面试尚未评价"
         )
     
-    return evaluation
+    etag = make_etag("evaluation", evaluation_id, created_at)
+    cache_control = artifact_cache_control(interview_status)
+    not_modified = check_not_modified(request, None, etag, cache_control)
+    if not_modified:
+        return not_modified
+    return cached_json(
+        db.get(EvaluationModel, evaluation_id), Evaluation, {"ETag": etag, "Cache-Control": cache_control}
+    )
 
 
 @router.get("/{evaluation_id}", response_model=Evaluation)
 async def get_evaluation(
     evaluation_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     获取评价详情
     
     - **evaluation_id**: 评价ID
+
+    支持 If-None-Match（命中返回 304）；已完成面试的评价可被客户端缓存
     """
-    evaluation = db.query(EvaluationModel).filter(
-        EvaluationModel.id == evaluation_id
-    ).first()
-    
-    if not evaluation:
+    return await cached_response(
+        request, db, current_user.id, f"evaluation:{evaluation_id}",
+        lambda: _load_evaluation(request, db, current_user, evaluation_id)
+    )
+
+
+def _load_evaluation(request: Request, db: Session, current_user: UserPrincipal, evaluation_id: int):
+    """校验查询命中 If-None-Match 时返回 304，否则加载评价并生成可缓存的响应"""
+    # 校验查询：评价版本、归属用户与面试状态一次联表查询
+    row = db.query(
+        InterviewModel.user_id, InterviewModel.status, EvaluationModel.created_at
+    ).join(
+        InterviewModel, InterviewModel.id == EvaluationModel.interview_id
+    ).filter(EvaluationModel.id == evaluation_id).first()
+
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="评价不存在"
         )
-    
-    # 检查权限
-    interview = get_interview_by_id(db, evaluation.interview_id)
-    if not interview or interview.user_id != current_user.id:
+    owner_id, interview_status, created_at = row
+    if owner_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="无权访问此评价"
         )
-    
-    return evaluation
-
-
-
-
 
+    etag = make_etag("evaluation", evaluation_id, created_at)
+    cache_control = artifact_cache_control(interview_status)
+    not_modified = check_not_modified(request, None, etag, cache_control)
+    if not_modified:
+        return not_modified
+    return cached_json(
+        db.get(EvaluationModel, evaluation_id), Evaluation, {"ETag": etag, "Cache-Control": cache_control}
+    )
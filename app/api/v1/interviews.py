@@ -2,17 +2,18 @@
 面试管理API
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.dependencies import get_current_user
-from app.models.user import User
-from app.models.interview import InterviewStatusEnum
+from app.dependencies import get_current_user, get_owned_interview, resolve_owned_interview
+from app.core.user_cache import UserPrincipal
+from app.core.responses import SerializedRoute
+from app.core.response_cache import cached_json, cached_response
+from app.models.interview import Interview as InterviewModel, InterviewStatusEnum
 from app.schemas.interview import Interview, InterviewCreate, InterviewUpdate, InterviewWithDetails
 from app.services.interview_service import (
     create_interview,
-    get_interview_by_id,
     get_user_interviews,
     update_interview,
     delete_interview,
@@ -23,13 +24,13 @@ from app.services.interview_service import (
 )
 
 
-router = APIRouter()
+router = APIRouter(route_class=SerializedRoute)
 
 
 @router.post("/", response_model=Interview, status_code=status.HTTP_201_CREATED)
 async def create_new_interview(
     interview_create: InterviewCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -49,10 +50,11 @@ async def create_new_interview(
 
 @router.get("/", response_model=List[Interview])
 async def get_interviews(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     status: Optional[InterviewStatusEnum] = Query(None),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -62,13 +64,17 @@ async def get_interviews(
     - **limit**: 返回的最大记录数
     - **status**: 筛选状态（可选）
     """
-    interviews = get_user_interviews(db, current_user.id, skip, limit, status)
-    return interviews
+    key = f"interviews:{skip}:{limit}:{status.value if status else ''}"
+    return await cached_response(
+        request, db, current_user.id, key,
+        lambda: cached_json(get_user_interviews(db, current_user.id, skip, limit, status), List[Interview])
+    )
 
 
 @router.get("/statistics")
 async def get_statistics(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -80,14 +86,17 @@ async def get_statistics(
     - in_progress_count: 进行中次数
     - average_score: 平均分数
     """
-    statistics = get_interview_statistics(db, current_user.id)
-    return statistics
+    return await cached_response(
+        request, db, current_user.id, "interview_statistics",
+        lambda: cached_json(get_interview_statistics(db, current_user.id))
+    )
 
 
 @router.get("/{interview_id}", response_model=Interview)
 async def get_interview(
     interview_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -95,29 +104,16 @@ async def get_interview(
 
     - **interview_id**: 面试ID
     """
-    interview = get_interview_by_id(db, interview_id)
-
-    if not interview:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="面试记录不存在"
-        )
-
-    # 检查权限
-    if interview.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="无权访问此面试记录"
-        )
-
-    return interview
+    return await cached_response(
+        request, db, current_user.id, f"interview:{interview_id}",
+        lambda: cached_json(resolve_owned_interview(db, current_user, interview_id), Interview)
+    )
 
 
 @router.put("/{interview_id}", response_model=Interview)
 async def update_interview_info(
-    interview_id: int,
     interview_update: InterviewUpdate,
-    current_user: User = Depends(get_current_user),
+    interview: InterviewModel = Depends(get_owned_interview),
     db: Session = Depends(get_db)
 ):
     """
@@ -126,29 +122,13 @@ async def update_interview_info(
     - **interview_id**: 面试ID
     - 可更新字段：status, score, started_at, completed_at
     """
-    interview = get_interview_by_id(db, interview_id)
-
-    if not interview:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="面试记录不存在"
-        )
-
-    # 检查权限
-    if interview.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="无权修改此面试记录"
-        )
-
-    updated_interview = update_interview(db, interview_id, interview_update)
+    updated_interview = update_interview(db, interview.id, interview_update)
     return updated_interview
 
 
 @router.delete("/{interview_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_interview_record(
-    interview_id: int,
-    current_user: User = Depends(get_current_user),
+    interview: InterviewModel = Depends(get_owned_interview),
     db: Session = Depends(get_db)
 ):
     """
@@ -156,29 +136,13 @@ async def delete_interview_record(
 
     - **interview_id**: 面试ID
     """
-    interview = get_interview_by_id(db, interview_id)
-
-    if not interview:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="面试记录不存在"
-        )
-
-    # 检查权限
-    if interview.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="无权删除此面试记录"
-        )
-
-    delete_interview(db, interview_id)
+    delete_interview(db, interview.id)
     return None
 
 
 @router.post("/{interview_id}/start", response_model=Interview)
 async def start_interview_session(
-    interview_id: int,
-    current_user: User = Depends(get_current_user),
+    interview: InterviewModel = Depends(get_owned_interview),
     db: Session = Depends(get_db)
 ):
     """
@@ -188,23 +152,8 @@ async def start_interview_session(
     - 将状态从 pending 改为 in_progress
     - 记录开始时间
     """
-    interview = get_interview_by_id(db, interview_id)
-
-    if not interview:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="面试记录不存在"
-        )
-
-    # 检查权限
-    if interview.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="无权操作此面试记录"
-        )
-
     # 开始面试
-    started_interview = start_interview(db, interview_id)
+    started_interview = start_interview(db, interview.id)
     if not started_interview:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -216,9 +165,8 @@ async def start_interview_session(
 
 @router.post("/{interview_id}/complete", response_model=Interview)
 async def complete_interview_session(
-    interview_id: int,
+    interview: InterviewModel = Depends(get_owned_interview),
     score: Optional[int] = Query(None, ge=0, le=100),
-    current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -229,23 +177,8 @@ async def complete_interview_session(
     - 将状态从 in_progress 改为 completed
     - 记录完成时间
     """
-    interview = get_interview_by_id(db, interview_id)
-
-    if not interview:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="面试记录不存在"
-        )
-
-    # 检查权限
-    if interview.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="无权操作此面试记录"
-        )
-
     # 完成面试
-    completed_interview = complete_interview(db, interview_id, score)
+    completed_interview = complete_interview(db, interview.id, score)
     if not completed_interview:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -257,8 +190,7 @@ async def complete_interview_session(
 
 @router.post("/{interview_id}/cancel", response_model=Interview)
 async def cancel_interview_session(
-    interview_id: int,
-    current_user: User = Depends(get_current_user),
+    interview: InterviewModel = Depends(get_owned_interview),
     db: Session = Depends(get_db)
 ):
     """
@@ -267,23 +199,8 @@ async def cancel_interview_session(
     - **interview_id**: 面试ID
     - 将状态改为 cancelled
     """
-    interview = get_interview_by_id(db, interview_id)
-
-    if not interview:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="面试记录不存在"
-        )
-
-    # 检查权限
-    if interview.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="无权操作此面试记录"
-        )
-
     # 取消面试
-    cancelled_interview = cancel_interview(db, interview_id)
+    cancelled_interview = cancel_interview(db, interview.id)
     return cancelled_interview
 
 
@@ -2,20 +2,26 @@
 问题管理API
 """
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 
 from app.core.database import get_db
-from app.dependencies import get_current_user
-from app.models.user import User
+from app.dependencies import get_current_user, resolve_owned_interview, resolve_owned_question
+from app.core.user_cache import UserPrincipal
+from app.core.responses import SerializedRoute
+from app.core.conditional import artifact_cache_control, check_not_modified, make_etag
+from app.core.response_cache import cached_json, cached_response
+from app.models.interview import Interview as InterviewModel
 from app.models.question import Question as QuestionModel
 from app.schemas.question import Question, QuestionCreate
-from app.services.interview_service import get_interview_by_id
 from app.services.ai_service import generate_interview_questions
+from app.services.tts_service import presynthesize
+from app.config import settings
 
 
-router = APIRouter()
+router = APIRouter(route_class=SerializedRoute)
 
 
 class QuestionGenerateRequest(BaseModel):
@@ -34,7 +40,8 @@ class QuestionGenerateResponse(BaseModel):
 @router.post("/generate", response_model=QuestionGenerateResponse)
 async def generate_questions(
     request: QuestionGenerateRequest,
-    current_user: User = Depends(get_current_user),
+    background_tasks: BackgroundTasks,
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -43,23 +50,11 @@ async def generate_questions(
     - **interview_id**: 面试ID
     - **num_questions**: 生成问题数量（1-10）
     
-    使用AI根据面试配置生成专业问题，并保存到数据库
+    使用AI根据面试配置生成专业问题，并保存到数据库；
+    启用语音合成时在响应返回后于后台预合成问题朗读音频
     """
-    # 获取面试记录
-    interview = get_interview_by_id(db, request.interview_id)
-    
-    if not interview:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="面试记录不存在"
-        )
-    
-    # 检查权限
-    if interview.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="无权操作此面试记录"
-        )
+    # 获取面试记录并检查权限
+    interview = resolve_owned_interview(db, current_user, request.interview_id)
     
     try:
         # 使用AI生成问题
@@ -72,20 +67,24 @@ async def generate_questions(
             num_questions=request.num_questions
         )
         
-        # 保存问题到数据库
-        saved_questions = []
-        for idx, question_text in enumerate(questions, 1):
-            db_question = QuestionModel(
-                interview_id=interview.id,
-                question_text=question_text,
-                question_order=idx,
-                language=interview.language
-            )
-            db.add(db_question)
-            saved_questions.append(question_text)
+        # 保存问题到数据库（单条多行INSERT）
+        saved_questions = list(questions)
+        if saved_questions:
+            db.execute(insert(QuestionModel).values([
+                {
+                    "interview_id": interview.id,
+                    "question_text": question_text,
+                    "question_order": idx,
+                    "language": interview.language
+                }
+                for idx, question_text in enumerate(saved_questions, 1)
+            ]))
         
         db.commit()
         
+        if saved_questions and settings.TTS_ENABLED and settings.TTS_PRESYNTHESIZE:
+            background_tasks.add_task(presynthesize, saved_questions)
+        
         return QuestionGenerateResponse(
             interview_id=interview.id,
             questions=saved_questions,
@@ -102,42 +101,66 @@ async def generate_questions(
 @router.get("/interview/{interview_id}", response_model=List[Question])
 async def get_interview_questions(
     interview_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     获取面试的所有问题
     
     - **interview_id**: 面试ID
+
+    支持 If-None-Match（命中返回 304）；已完成面试的问题可被客户端缓存
     """
-    # 获取面试记录
-    interview = get_interview_by_id(db, interview_id)
-    
-    if not interview:
+    return await cached_response(
+        request, db, current_user.id, f"interview_questions:{interview_id}",
+        lambda: _load_interview_questions(request, db, current_user, interview_id)
+    )
+
+
+def _load_interview_questions(request: Request, db: Session, current_user: UserPrincipal, interview_id: int):
+    """校验查询命中 If-None-Match 时返回 304，否则加载问题列表并生成可缓存的响应"""
+    # 校验查询：面试归属、状态与问题集合版本（问题只增不改：数量、最大ID、最新创建时间）
+    row = db.query(
+        InterviewModel.user_id, InterviewModel.status,
+        func.count(QuestionModel.id), func.max(QuestionModel.id), func.max(QuestionModel.created_at)
+    ).outerjoin(
+        QuestionModel, QuestionModel.interview_id == InterviewModel.id
+    ).filter(InterviewModel.id == interview_id).group_by(
+        InterviewModel.id, InterviewModel.user_id, InterviewModel.status
+    ).first()
+
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="面试记录不存在"
         )
-    
-    # 检查权限
-    if interview.user_id != current_user.id:
+    owner_id, interview_status, count, max_id, latest = row
+    if owner_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="无权访问此面试记录"
         )
-    
+
+    etag = make_etag("questions", interview_id, count, max_id, latest)
+    cache_control = artifact_cache_control(interview_status)
+    not_modified = check_not_modified(request, None, etag, cache_control)
+    if not_modified:
+        return not_modified
+
     # 获取问题列表
     questions = db.query(QuestionModel).filter(
         QuestionModel.interview_id == interview_id
     ).order_by(QuestionModel.question_order).all()
     
-    return questions
+    return cached_json(questions, List[Question], {"ETag": etag, "Cache-Control": cache_control})
 
 
 @router.get("/{question_id}", response_model=Question)
 async def get_question(
     question_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -145,25 +168,7 @@ async def get_question(
     
     - **question_id**: 问题ID
     """
-    question = db.query(QuestionModel).filter(QuestionModel.id == question_id).first()
-    
-    if not question:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="问题不存在"
-        )
-    
-    # 检查权限（通过面试记录）
-    interview = get_interview_by_id(db, question.interview_id)
-    if not interview or interview.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="无权访问此问题"
-        )
-    
-    return question
-
-
-
-
-
+    return await cached_response(
+        request, db, current_user.id, f"question:{question_id}",
+        lambda: cached_json(resolve_owned_question(db, current_user, question_id), Question)
+    )
@@ -1,26 +1,44 @@
 """
 语音相关API（短语音ASR 初版）
 """
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status, Body
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status, Body, WebSocket, WebSocketDisconnect, Query, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response
 from sqlalchemy.orm import Session
-import httpx
 import asyncio
-import uuid
+import json
 import time
-import tos
 import logging
+import os
 from typing import Optional
 from pydantic import BaseModel
 
-from app.core.database import get_db
-from app.dependencies import get_current_user
-from app.models.user import User
+from app.core.database import get_db, SessionLocal, bind_session_user
+from app.dependencies import get_current_user, authenticate_token, resolve_owned_interview, resolve_owned_question
+from app.core.user_cache import UserPrincipal
+from app.core.responses import SerializedRoute
+from app.core.conditional import etag_matches
+from app.core.metrics import Histogram
+from app.models.question import Question as QuestionModel
+from app.services.asr_service import (
+    transcribe_object, transcribe_upload, new_object_key, compact_utterances, estimate_duration
+)
+from app.services.streaming_asr import get_streaming_provider
+from app.services.tts_service import (
+    AUDIO_CACHE_CONTROL, TtsAudio, audio_url, is_valid_filename, local_path, synthesize_many, tts_cache
+)
+from app.services.answer_service import create_answer, create_voice_answer, get_owned_question_states
+from app.schemas.answer import AnswerCreate, AnswerTypeEnum, TranscriptUtterance, VoiceAnswerResult
+from app.services.storage_service import presign_url, content_type_for
 from app.config import settings
 
 
-router = APIRouter()
+router = APIRouter(route_class=SerializedRoute)
 logger = logging.getLogger(__name__)
 
+ASR_STREAM_FINALIZE_SECONDS = Histogram(
+    "asr_stream_finalize_seconds", "流式识别从音频结束到拿到全部最终结果的耗时"
+)
+
 
 def _map_lang(lang: str) -> str:
     if not lang:
@@ -33,148 +51,11 @@ def _map_lang(lang: str) -> str:
     return settings.VOLC_ASR_LANGUAGE or "zh-CN"
 
 
-def _get_tos_client():
-    endpoint = settings.TOS_ENDPOINT if settings.TOS_ENDPOINT.startswith("http") else f"https://{settings.TOS_ENDPOINT}"
-    return tos.TosClientV2(settings.TOS_ACCESS_KEY_ID, settings.TOS_SECRET_ACCESS_KEY, endpoint, settings.TOS_REGION)
-
-
-def _presign_url(client, method: str, bucket: str, object_key: str, expires: int = 600):
-    # method: 'GET' or 'PUT'
-    method_enum = None
-    try:
-        # 常见枚举名称
-        if method.upper() == 'GET':
-            method_enum = getattr(tos.HttpMethodType, 'HTTP_GET', None) or getattr(tos.HttpMethodType, 'Http_Method_Get', None)
-        elif method.upper() == 'PUT':
-            method_enum = getattr(tos.HttpMethodType, 'HTTP_PUT', None) or getattr(tos.HttpMethodType, 'Http_Method_Put', None)
-    except Exception:
-        method_enum = None
-
-    try:
-        if method_enum is not None:
-            pres = client.pre_signed_url(method_enum, bucket, object_key, expires)
-        else:
-            pres = client.pre_signed_url(method.upper(), bucket, object_key, expires)
-    except Exception:
-        pres = client.pre_signed_url(method.upper(), bucket, object_key, expires)
-
-    if isinstance(pres, str):
-        return pres
-    return getattr(pres, 'signed_url', None) or getattr(pres, 'url', None) or getattr(pres, 'presigned_url', None)
-
-
-async def _auc_submit_and_query(signed_url: str, language: str, fmt: str, user_id: str):
-    audio_codec = "opus" if fmt in ("ogg", "webm", "opus") else "raw"
-    payload = {
-        "user": {"uid": str(user_id)},
-        "audio": {
-            "format": fmt,
-            "codec": audio_codec,
-            "rate": 16000,
-            "bits": 16,
-            "channel": 1,
-            "url": signed_url,
-        },
-        "language": language,
-        "request": {
-            "model_name": "bigmodel",
-            "enable_itn": True,
-            "enable_punc": True,
-            "show_utterances": True,
-        },
-    }
-
-    request_id = str(uuid.uuid4())
-    headers = {
-        "Content-Type": "application/json",
-        "X-Api-App-Key": settings.VOLC_ASR_APP_ID,
-        "X-Api-Access-Key": settings.VOLC_ASR_TOKEN,
-        "X-Api-Resource-Id": "volc.bigasr.auc",
-        "X-Api-Request-Id": request_id,
-        "X-Api-Sequence": "-1",
-    }
-
-    try:
-        async with httpx.AsyncClient() as client:
-            import json as _json
-            body = _json.dumps(payload, ensure_ascii=False)
-            submit_endpoint = settings.VOLC_ASR_ENDPOINT
-            resp = await client.post(submit_endpoint, headers=headers, content=body.encode('utf-8'), timeout=60.0)
-            if resp.status_code != 200:
-                text = resp.text
-                try:
-                    j = resp.json()
-                    text = j.get('message') or j.get('detail') or text
-                except Exception:
-                    pass
-                raise HTTPException(status_code=resp.status_code, detail=f"ASR请求失败: {text}")
-
-            # derive query endpoint
-            try:
-                query_endpoint = getattr(settings, 'VOLC_ASR_QUERY_ENDPOINT')
-            except Exception:
-                query_endpoint = None
-            if not query_endpoint:
-                se = submit_endpoint.rstrip('/')
-                if se.endswith('/submit'):
-                    query_endpoint = se[:-len('/submit')] + '/query'
-                else:
-                    query_endpoint = se + '/query'
-
-            query_headers = {
-                "Content-Type": "application/json",
-                "X-Api-App-Key": settings.VOLC_ASR_APP_ID,
-                "X-Api-Access-Key": settings.VOLC_ASR_TOKEN,
-                "X-Api-Resource-Id": "volc.bigasr.auc",
-                "X-Api-Request-Id": request_id,
-            }
-
-            last_raw_text = None
-            last_data = None
-            deadline = time.time() + 45.0
-            while time.time() < deadline:
-                q_resp = await client.post(query_endpoint, headers=query_headers, content=b"{}", timeout=60.0)
-                last_raw_text = q_resp.text
-                if q_resp.status_code != 200:
-                    await asyncio.sleep(1.2)
-                    continue
-                try:
-                    last_data = q_resp.json()
-                except Exception:
-                    last_data = {}
-
-                parsed_text = None
-                try:
-                    result_obj = last_data.get("result")
-                    if isinstance(result_obj, dict):
-                        parsed_text = result_obj.get("text")
-                        if not parsed_text:
-                            utterances = result_obj.get("utterances") or []
-                            if isinstance(utterances, list) and utterances:
-                                parsed_text = "".join([u.get("text", "") for u in utterances if isinstance(u, dict)])
-                    elif isinstance(result_obj, list) and result_obj:
-                        first = result_obj[0]
-                        if isinstance(first, dict):
-                            parsed_text = first.get("text") or "".join([d.get("text", "") for d in result_obj if isinstance(d, dict)])
-                except Exception:
-                    parsed_text = None
-
-                if parsed_text:
-                    return {"text": parsed_text, "raw": last_data, "raw_text": last_raw_text}
-
-                await asyncio.sleep(1.2)
-
-            return {"text": None, "raw": last_data or {}, "raw_text": last_raw_text}
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"AUC调用异常: {str(e)}")
-
-
 class SubmitByKeyRequest(BaseModel):
     object_key: str
     language: Optional[str] = None
     fmt: Optional[str] = None
+    duration: Optional[float] = None  # 录音时长（秒），用于安排首次查询
 
 
 # 简单的连通性检查
@@ -186,26 +67,19 @@ async def ping():
 @router.get("/asr/upload_url")
 async def asr_get_upload_url(
     fmt: str = "webm",
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     if not (settings.TOS_ACCESS_KEY_ID and settings.TOS_SECRET_ACCESS_KEY and settings.TOS_BUCKET and settings.TOS_REGION and settings.TOS_ENDPOINT):
         raise HTTPException(status_code=500, detail="TOS 未配置完整")
 
     fmt = fmt or settings.VOLC_ASR_FORMAT or "webm"
-    object_key = f"voice/{current_user.id}/{int(time.time()*1000)}-{uuid.uuid4().hex}.{fmt}"
+    object_key = f"{new_object_key(current_user.id)}.{fmt}"
 
     try:
-        client = _get_tos_client()
-        upload_url = _presign_url(client, 'PUT', settings.TOS_BUCKET, object_key, 600)
+        upload_url = presign_url('PUT', object_key, 600)
         if not upload_url:
             raise HTTPException(status_code=502, detail="获取上传URL失败")
-        # 根据 fmt 推导 Content-Type
-        content_type = "application/octet-stream"
-        if fmt == "webm":
-            content_type = "audio/webm"
-        elif fmt in ("ogg", "opus"):
-            content_type = "audio/ogg"
-        return {"upload_url": upload_url, "object_key": object_key, "content_type": content_type}
+        return {"upload_url": upload_url, "object_key": object_key, "content_type": content_type_for(fmt)}
     except HTTPException:
         raise
     except Exception as e:
@@ -215,7 +89,7 @@ async def asr_get_upload_url(
 @router.post("/asr/submit_by_key")
 async def asr_submit_by_key(
     body: SubmitByKeyRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     if not (settings.TOS_ACCESS_KEY_ID and settings.TOS_SECRET_ACCESS_KEY and settings.TOS_BUCKET and settings.TOS_REGION and settings.VOLC_ASR_ENDPOINT and settings.VOLC_ASR_APP_ID and settings.VOLC_ASR_TOKEN and settings.TOS_ENDPOINT):
         raise HTTPException(status_code=500, detail="TOS/ASR 未配置完整")
@@ -223,25 +97,16 @@ async def asr_submit_by_key(
     language = _map_lang(body.language or settings.VOLC_ASR_LANGUAGE)
     fmt = body.fmt or settings.VOLC_ASR_FORMAT or "webm"
 
-    try:
-        client = _get_tos_client()
-        signed_url = _presign_url(client, 'GET', settings.TOS_BUCKET, body.object_key, 600)
-        if not signed_url:
-            raise HTTPException(status_code=502, detail="获取下载URL失败")
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"TOS 预签名异常: {str(e)}")
+    # 调用 AUC submit + query（同一对象重复提交直接返回缓存结果）
+    return await transcribe_object(body.object_key, language, fmt, current_user.id, body.duration)
 
-    # 调用 AUC submit + query
-    return await _auc_submit_and_query(signed_url, language, fmt, str(current_user.id))
 
 @router.post("/asr/submit")
 async def asr_submit(
     audio: UploadFile = File(...),
     language: str = Form(None),
     fmt: str = Form(None),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
@@ -252,169 +117,294 @@ async def asr_submit(
         raise HTTPException(status_code=500, detail="TOS/ASR 未配置完整")
 
 
-    # 读取音频
-    audio_bytes = await audio.read()
-    if not audio_bytes:
-        raise HTTPException(status_code=400, detail="音频为空")
+    language = _map_lang(language)
+    fmt = fmt or settings.VOLC_ASR_FORMAT or "webm"
+
+    # 上传到 TOS（按配置规范化/切分）并调用 AUC 接口识别
+    transcription = await transcribe_upload(audio, language, fmt, current_user.id)
+    return transcription.response()
+
+
+@router.post("/answer", response_model=VoiceAnswerResult, status_code=status.HTTP_201_CREATED)
+async def submit_voice_answer(
+    audio: UploadFile = File(...),
+    question_id: int = Form(...),
+    language: str = Form(None),
+    fmt: str = Form(None),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    提交语音回答（识别并保存）
+
+    - **audio**: 录音文件
+    - **question_id**: 问题ID
+    - **language/fmt**: 语言与音频格式
+
+    一次调用完成上传、识别与回答创建：回答保存音频对象键与按分句计算的时长，
+    分句时间轴另存转写表；响应不含 AUC 原始返回
+    """
+    if not (settings.TOS_ACCESS_KEY_ID and settings.TOS_SECRET_ACCESS_KEY and settings.TOS_BUCKET and settings.TOS_REGION and settings.VOLC_ASR_ENDPOINT and settings.VOLC_ASR_APP_ID and settings.VOLC_ASR_TOKEN):
+        raise HTTPException(status_code=500, detail="TOS/ASR 未配置完整")
+
+    # 一次查询校验归属与是否已回答，先于识别，避免无效的识别费用
+    states = get_owned_question_states(db, current_user.id, [question_id])
+    if question_id not in states:
+        resolve_owned_question(db, current_user, question_id)
+    if states.get(question_id):
+        raise HTTPException(status_code=400, detail="该问题已有回答")
+    # 结束只读事务、归还连接，识别期间不占用连接池
+    db.rollback()
 
     language = _map_lang(language)
     fmt = fmt or settings.VOLC_ASR_FORMAT or "webm"
+    transcription = await transcribe_upload(audio, language, fmt, current_user.id)
+    if not transcription.text:
+        raise HTTPException(status_code=504, detail="语音识别未返回结果，请重试")
+
+    utterances = compact_utterances(transcription.utterances)
+    end_times = [u[1] for u in utterances if isinstance(u[1], (int, float))]
+    if end_times:
+        duration = max(end_times) / 1000
+    elif transcription.duration is not None:
+        duration = transcription.duration
+    else:
+        duration = estimate_duration(transcription.size, transcription.audio_info.fmt)
+
+    answer = create_voice_answer(
+        db, question_id, transcription.text, transcription.object_key,
+        int(round(duration)), language, utterances
+    )
+    if answer is None:
+        raise HTTPException(status_code=400, detail="该问题已有回答")
+
+    return VoiceAnswerResult(
+        answer=answer,
+        utterances=[TranscriptUtterance(start_ms=a, end_ms=b, text=t) for a, b, t in utterances]
+    )
+
+
+def _stream_duration(received: int, fmt: str, sample_rate: int, last_end_ms: Optional[int]) -> Optional[int]:
+    """
+    流式识别音频的时长（秒）
 
-    # 步骤1：上传到 TOS
-    key = f"voice/{current_user.id}/{int(time.time()*1000)}-{uuid.uuid4().hex}.{fmt}"
+    原始 PCM（16bit 单声道）按收到的字节数与采样率计算；
+    其他编码按最后一句最终结果的结束时间，没有时按字节数估算。
+    """
+    if not received:
+        return None
+    if fmt.lower() == "pcm" and sample_rate > 0:
+        return round(received / (sample_rate * 2))
+    if last_end_ms:
+        return round(last_end_ms / 1000)
+    return round(estimate_duration(received, fmt))
+
+
+async def _ws_reject(websocket: WebSocket, status_code: int, detail: str) -> None:
+    """发送错误事件并以 4000+HTTP状态码 关闭连接"""
+    await websocket.send_json({"type": "error", "detail": detail})
+    await websocket.close(code=4000 + status_code)
+
+
+@router.websocket("/asr/stream")
+async def asr_stream(
+    websocket: WebSocket,
+    token: str = Query(...),
+    language: Optional[str] = None,
+    fmt: str = "pcm",
+    sample_rate: int = 16000,
+    question_id: Optional[int] = None,
+):
+    """
+    实时流式语音识别
+
+    - **token**: 访问令牌（浏览器 WebSocket 无法设置请求头，通过查询参数传递）
+    - **language/fmt/sample_rate**: 音频参数
+    - **question_id**: 可选，识别结束后将最终文本保存为该问题的语音回答
+
+    客户端以二进制帧推送音频，发送 {"type": "end"} 结束、{"type": "cancel"} 放弃；
+    服务端推送 partial/final 识别结果，结束时推送 done（含全文与回答ID）
+    """
+    await websocket.accept()
+
+    # 鉴权与归属校验使用短会话，不在整个连接期间占用数据库连接
     try:
-        endpoint = settings.TOS_ENDPOINT if settings.TOS_ENDPOINT.startswith("http") else f"https://{settings.TOS_ENDPOINT}"
-        client = tos.TosClientV2(settings.TOS_ACCESS_KEY_ID, settings.TOS_SECRET_ACCESS_KEY, endpoint, settings.TOS_REGION)
-        # 上传对象
-        object_key = key
-        content_type = "application/octet-stream"
-        if fmt == "webm":
-            content_type = "audio/webm"
-        elif fmt in ("ogg", "opus"):
-            content_type = "audio/ogg"
-
-        put_result = client.put_object(settings.TOS_BUCKET, object_key, content=audio_bytes, content_type=content_type)
-        if put_result.status_code not in (200, 204):
-            raise HTTPException(status_code=502, detail=f"TOS 上传失败: status={put_result.status_code}")
-
-        # 生成 10 分钟有效期的预签名下载链接
-        # 预签名URL：不同 SDK 版本返回值与枚举名可能不同，这里做兼容处理
-        method_enum = None
-        try:
-            # 常见枚举名称
-            method_enum = getattr(tos.HttpMethodType, 'HTTP_GET', None) or getattr(tos.HttpMethodType, 'Http_Method_Get', None)
-        except Exception:
-            method_enum = None
-
-        try:
-            if method_enum is not None:
-                pres = client.pre_signed_url(method_enum, settings.TOS_BUCKET, object_key, 600)
-            else:
-                pres = client.pre_signed_url('GET', settings.TOS_BUCKET, object_key, 600)
-        except Exception:
-            # 最后再退回字符串方式
-            pres = client.pre_signed_url('GET', settings.TOS_BUCKET, object_key, 600)
-
-        # 提取字符串 URL
-        if isinstance(pres, str):
-            signed_url = pres
-        else:
-            signed_url = getattr(pres, 'signed_url', None) or getattr(pres, 'url', None) or getattr(pres, 'presigned_url', None)
-        if not signed_url:
-            raise HTTPException(status_code=502, detail="TOS 预签名URL获取失败")
+        with SessionLocal() as db:
+            current_user = authenticate_token(db, token)
+            if question_id is not None:
+                resolve_owned_question(db, current_user, question_id)
+    except HTTPException as e:
+        await _ws_reject(websocket, e.status_code, e.detail)
+        return
+
+    try:
+        session = await get_streaming_provider().open(_map_lang(language), fmt, sample_rate)
     except Exception as e:
-        raise HTTPException(status_code=502, detail=f"TOS SDK 异常: {str(e)}")
-    
-    print("signed_url:", signed_url)
-    # 步骤2：调用 AUC 接口
-    audio_codec = "opus" if fmt in ("ogg", "webm", "opus") else "raw"
-    payload = {
-        "user": {"uid": str(current_user.id)},
-        "audio": {
-            "format": fmt,
-            "codec": audio_codec,
-            "rate": 16000,
-            "bits": 16,
-            "channel": 1,
-            "url": signed_url,
-        },
-        "language": language,
-        "request": {
-            "model_name": "bigmodel",
-            "enable_itn": True,
-            "enable_punc": True,
-            "show_utterances": True,
-        },
-    }
-    request_id = str(uuid.uuid4())
-    headers = {
-        "Content-Type": "application/json",
-        "X-Api-App-Key": settings.VOLC_ASR_APP_ID,
-        "X-Api-Access-Key": settings.VOLC_ASR_TOKEN,
-        "X-Api-Resource-Id": "volc.bigasr.auc",
-        "X-Api-Request-Id": request_id,
-        "X-Api-Sequence": "-1",
-    }
+        logger.error(f"流式ASR会话建立失败: {e}")
+        await _ws_reject(websocket, 502, f"流式ASR会话建立失败: {str(e)}")
+        return
+
+    finals = []
+    last_end_ms: Optional[int] = None
+
+    async def _forward_results():
+        nonlocal last_end_ms
+        async for event in session.results():
+            if event.is_final:
+                finals.append(event.text)
+                if event.end_ms is not None:
+                    last_end_ms = max(last_end_ms or 0, event.end_ms)
+            await websocket.send_json({
+                "type": "final" if event.is_final else "partial",
+                "text": event.text,
+                "start_ms": event.start_ms,
+                "end_ms": event.end_ms,
+            })
+
+    forwarder = asyncio.create_task(_forward_results())
+    received = 0
     try:
-        async with httpx.AsyncClient() as client:
-            # 明确以 raw JSON 字符串发送至 submit 接口
-            import json as _json
-            body = _json.dumps(payload, ensure_ascii=False)
-            submit_endpoint = settings.VOLC_ASR_ENDPOINT
-            resp = await client.post(submit_endpoint, headers=headers, content=body.encode('utf-8'), timeout=60.0)
-            if resp.status_code != 200:
-                # 将上游错误透传给前端，方便定位
-                text = resp.text
-                try:
-                    j = resp.json()
-                    text = j.get('message') or j.get('detail') or text
-                except Exception:
-                    pass
-                raise HTTPException(status_code=resp.status_code, detail=f"ASR请求失败: {text}")
-
-            # 根据文档：submit 只负责提交，需调用 query 查询结果
-            # 推导 query 端点：优先读取配置，其次将 submit 替换为 query
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes") is not None:
+                received += len(message["bytes"])
+                if received > settings.MAX_UPLOAD_SIZE:
+                    await _ws_reject(websocket, 413, "音频超过大小限制")
+                    return
+                await session.send_audio(message["bytes"])
+                continue
             try:
-                query_endpoint = getattr(settings, 'VOLC_ASR_QUERY_ENDPOINT')
-            except Exception:
-                query_endpoint = None
-            if not query_endpoint:
-                se = submit_endpoint.rstrip('/')
-                if se.endswith('/submit'):
-                    query_endpoint = se[:-len('/submit')] + '/query'
-                else:
-                    query_endpoint = se + '/query'
-
-            # 轮询查询，直至拿到结果或超时
-            query_headers = {
-                "Content-Type": "application/json",
-                "X-Api-App-Key": settings.VOLC_ASR_APP_ID,
-                "X-Api-Access-Key": settings.VOLC_ASR_TOKEN,
-                "X-Api-Resource-Id": "volc.bigasr.auc",
-                "X-Api-Request-Id": request_id,
-            }
-
-            last_raw_text = None
-            last_data = None
-            deadline = time.time() + 45.0
-            while time.time() < deadline:
-                q_resp = await client.post(query_endpoint, headers=query_headers, content=b"{}", timeout=60.0)
-                last_raw_text = q_resp.text
-                if q_resp.status_code != 200:
-                    # 查询未就绪时，服务可能返回非200或空体，等待重试
-                    await asyncio.sleep(1.2)
-                    continue
-                try:
-                    last_data = q_resp.json()
-                except Exception:
-                    last_data = {}
-
-                # 解析结果：兼容 result 为对象或数组
-                parsed_text = None
-                try:
-                    result_obj = last_data.get("result")
-                    if isinstance(result_obj, dict):
-                        parsed_text = result_obj.get("text")
-                        if not parsed_text:
-                            utterances = result_obj.get("utterances") or []
-                            if isinstance(utterances, list) and utterances:
-                                parsed_text = "".join([u.get("text", "") for u in utterances if isinstance(u, dict)])
-                    elif isinstance(result_obj, list) and result_obj:
-                        first = result_obj[0]
-                        if isinstance(first, dict):
-                            parsed_text = first.get("text") or "".join([d.get("text", "") for d in result_obj if isinstance(d, dict)])
-                except Exception:
-                    parsed_text = None
-
-                if parsed_text:
-                    return {"text": parsed_text, "raw": last_data, "raw_text": last_raw_text}
-
-                await asyncio.sleep(1.2)
-
-            # 超时仍无结果
-            return {"text": None, "raw": last_data or {}, "raw_text": last_raw_text}
-    except HTTPException:
-        raise
+                command = json.loads(message.get("text") or "{}").get("type")
+            except (ValueError, AttributeError):
+                command = None
+            if command == "cancel":
+                await websocket.close()
+                return
+            if command == "end":
+                break
+
+        finish_started = time.monotonic()
+        await session.finish()
+        await forwarder
+        ASR_STREAM_FINALIZE_SECONDS.observe(time.monotonic() - finish_started)
+        text = "".join(finals)
+
+        answer_id = None
+        if question_id is not None and text:
+            answer_create = AnswerCreate(
+                question_id=question_id,
+                answer_text=text,
+                answer_type=AnswerTypeEnum.VOICE,
+                duration=_stream_duration(received, fmt, sample_rate, last_end_ms),
+            )
+            with SessionLocal() as db:
+                # 关联用户：提交后使该用户的读缓存失效
+                bind_session_user(db, current_user.id)
+                answer = create_answer(db, answer_create)
+            if answer is None:
+                await websocket.send_json({"type": "error", "detail": "该问题已有回答"})
+            else:
+                answer_id = answer.id
+
+        await websocket.send_json({"type": "done", "text": text, "answer_id": answer_id})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        forwarder.cancel()
+        await session.close()
+
+
+def _require_tts() -> None:
+    if not settings.TTS_ENABLED:
+        raise HTTPException(status_code=503, detail="语音合成未启用")
+
+
+@router.get("/tts/question/{question_id}")
+async def tts_question(
+    question_id: int,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    获取问题朗读音频地址
+
+    - **question_id**: 问题ID
+
+    已预合成时直接返回；否则当场合成（同一文本的合成只进行一次）
+    """
+    _require_tts()
+    question = resolve_owned_question(db, current_user, question_id)
+    text = question.question_text
+    # 结束只读事务、归还连接，合成期间不占用连接池
+    db.rollback()
+
+    try:
+        audio, source = await tts_cache.ensure(text)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"AUC调用异常: {str(e)}")
+        logger.warning(f"语音合成失败 question_id={question_id}: {e}")
+        raise HTTPException(status_code=502, detail="语音合成失败，请重试")
+    return {"question_id": question_id, "url": audio_url(audio), "cached": source == "hit"}
+
+
+@router.get("/tts/interview/{interview_id}")
+async def tts_interview(
+    interview_id: int,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    获取面试全部问题的朗读音频地址（便于前端预加载）
+
+    - **interview_id**: 面试ID
+
+    未合成的问题并发合成；合成失败的问题 url 为 null
+    """
+    _require_tts()
+    interview = resolve_owned_interview(db, current_user, interview_id)
+    rows = db.query(QuestionModel.id, QuestionModel.question_text).filter(
+        QuestionModel.interview_id == interview.id
+    ).order_by(QuestionModel.question_order).all()
+    db.rollback()
+
+    audios = await synthesize_many(text for _, text in rows)
+    return {
+        "interview_id": interview_id,
+        "items": [
+            {"question_id": qid, "url": audio_url(audio) if audio else None}
+            for (qid, _), audio in zip(rows, audios)
+        ],
+    }
+
 
+@router.get("/tts/audio/{filename}")
+async def tts_audio(filename: str, request: Request):
+    """
+    获取合成音频（文件名为内容摘要，可长期缓存）
+
+    无需鉴权，便于直接作为 <audio> 的 src；TOS 存储时重定向到预签名链接
+    """
+    _require_tts()
+    if not is_valid_filename(filename):
+        raise HTTPException(status_code=404, detail="音频不存在")
+
+    if settings.TTS_STORAGE == "tos":
+        max_age = max(settings.TTS_URL_EXPIRES - settings.TOS_PRESIGN_REFRESH_MARGIN, 0)
+        return RedirectResponse(
+            audio_url(TtsAudio(*filename.split(".", 1))),
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+            headers={"Cache-Control": f"private, max-age={max_age}"},
+        )
+
+    etag = f'"{filename.split(".", 1)[0]}"'
+    headers = {"Cache-Control": AUDIO_CACHE_CONTROL, "ETag": etag}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    path = local_path(filename)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="音频不存在")
+    return FileResponse(path, media_type=content_type_for(filename.rsplit(".", 1)[1]), headers=headers)
@@ -0,0 +1,51 @@
+"""
+布隆过滤器
+
+固定大小的位数组 + 双重哈希，判断"一定不存在 / 可能存在"；
+不支持删除，需要删除时由调用方按精确集合重建。
+"""
+from hashlib import blake2b
+from typing import Iterable
+import math
+
+
+class BloomFilter:
+    """布隆过滤器（单个元素的增删查在 GIL 下原子，无需额外加锁）"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        Args:
+            capacity: 预计元素数（超出后误判率上升，但不会漏判）
+            error_rate: 目标误判率
+        """
+        capacity = max(capacity, 1)
+        self.size = max(int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        """加入元素"""
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def update(self, items: Iterable[str]) -> None:
+        """批量加入元素"""
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def clear(self) -> None:
+        """清空"""
+        self._bits = bytearray(len(self._bits))
+        self.count = 0
@@ -0,0 +1,136 @@
+"""
+响应压缩
+
+按 Accept-Encoding 协商 br（已安装 brotli 时）或 gzip，只压缩超过阈值的一次性响应体：
+流式响应（NDJSON 进度、文件下载）与已编码、不可压缩的内容（音频、图片）原样透传。
+"""
+from typing import Optional
+import asyncio
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import settings
+from app.core.metrics import Counter
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSED_BYTES = Counter(
+    "http_compressed_bytes_total", "压缩前后的响应体字节数", ["encoding", "stage"]
+)
+
+# 超过该大小的响应体在线程中压缩，避免阻塞事件循环
+_OFFLOAD_SIZE = 256 * 1024
+
+_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def _compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or media_type.endswith("+json") or media_type in _COMPRESSIBLE_TYPES
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    选择响应编码（br 优先于 gzip，q=0 视为拒绝）
+
+    Args:
+        accept_encoding: 请求头 Accept-Encoding
+
+    Returns:
+        Optional[str]: br / gzip，均不可用时为None
+    """
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.RESPONSE_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.RESPONSE_GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """ASGI 中间件：压缩超过 RESPONSE_COMPRESSION_MIN_SIZE 的一次性响应体"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def _send(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # 等到第一段响应体再决定是否压缩
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            if (
+                message.get("more_body")
+                or len(body) < settings.RESPONSE_COMPRESSION_MIN_SIZE
+                or "content-encoding" in headers
+                or not _compressible(headers.get("content-type"))
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            if len(body) > _OFFLOAD_SIZE:
+                compressed = await asyncio.to_thread(_compress, body, encoding)
+            else:
+                compressed = _compress(body, encoding)
+            COMPRESSED_BYTES.inc(len(body), encoding=encoding, stage="original")
+            COMPRESSED_BYTES.inc(len(compressed), encoding=encoding, stage="compressed")
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            # 编码后的表示与原始表示字节不同，强 ETag 降为弱 ETag
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, _send)
@@ -0,0 +1,100 @@
+"""
+条件请求（ETag / If-None-Match）
+
+面试产物（问题、回答、评价）只增不改，ETag 由行ID与创建时间计算，
+路由先用只查这些列的校验查询得到 ETag，命中 If-None-Match 时直接返回 304，不加载也不序列化响应体。
+"""
+from hashlib import sha1
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+from app.config import settings
+from app.core.metrics import Counter
+from app.models.interview import InterviewStatusEnum
+
+
+CONDITIONAL_REQUESTS = Counter(
+    "http_conditional_requests_total", "带 ETag 的读取请求次数", ["result"]
+)
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    由资源标识计算强 ETag
+
+    Args:
+        parts: 资源类型、行ID、创建时间等
+
+    Returns:
+        str: 带引号的 ETag
+    """
+    source = "|".join("" if p is None else str(p) for p in parts)
+    return f'"{sha1(source.encode("utf-8")).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match 是否命中（弱比较：忽略 W/ 前缀，压缩后的表示同样命中）
+
+    Args:
+        if_none_match: 请求头 If-None-Match
+        etag: 当前 ETag
+
+    Returns:
+        bool: 是否命中
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def artifact_cache_control(interview_status: Optional[InterviewStatusEnum]) -> str:
+    """
+    面试产物的 Cache-Control：已完成的面试允许私有缓存 ARTIFACT_CACHE_MAX_AGE 秒，其余每次重新校验
+
+    Args:
+        interview_status: 所属面试状态
+
+    Returns:
+        str: Cache-Control
+    """
+    if interview_status == InterviewStatusEnum.COMPLETED:
+        return f"private, max-age={settings.ARTIFACT_CACHE_MAX_AGE}"
+    return "private, no-cache"
+
+
+def check_not_modified(
+    request: Request,
+    response: Optional[Response],
+    etag: str,
+    cache_control: str
+) -> Optional[Response]:
+    """
+    处理 If-None-Match，并为 200 响应设置 ETag 与 Cache-Control
+
+    Args:
+        request: 请求
+        response: 路由的响应（用于设置 200 响应的响应头）；为None时由调用方自行附加响应头
+        etag: 当前 ETag
+        cache_control: Cache-Control
+
+    Returns:
+        Optional[Response]: 命中时为 304 响应，否则为None（调用方继续加载并返回响应体）
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        CONDITIONAL_REQUESTS.inc(result="not_modified")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    CONDITIONAL_REQUESTS.inc(result="full")
+    if response is not None:
+        response.headers.update(headers)
+    return None
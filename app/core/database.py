@@ -1,50 +1,470 @@
 """
 数据库连接和会话管理
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc, insert, select, tuple_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.pool import QueuePool
+from starlette.requests import HTTPConnection
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generator, Iterator, List, Optional
+import asyncio
+import itertools
+import logging
+import threading
+import time
 
 from app.config import settings
+from app.core.metrics import Counter, Gauge, Histogram
+from app.core.request_context import current_request, current_route
+from app.core.tracing import AnySpan, begin_span, start_span, truncate_statement
 
 
-# 创建数据库引擎
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=settings.DATABASE_ECHO,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+logger = logging.getLogger(__name__)
+
+# 只读请求方法，这些请求默认路由到副本
+_READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+# 连接池指标
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds", "从连接池获取连接的等待时间", ["pool"]
+)
+CONNECTION_HOLD_SECONDS = Histogram(
+    "db_connection_hold_seconds", "连接从借出到归还的持有时间", ["pool", "route"]
+)
+SESSION_HELD_OUTBOUND = Counter(
+    "db_session_held_outbound_total", "持有数据库连接期间执行的慢外部调用次数", ["operation", "route"]
+)
+DB_QUERIES = Counter(
+    "db_queries_total", "执行的 SQL 语句数", ["pool", "route"]
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "SQL 语句执行耗时", ["pool", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
 )
 
+_pools: Dict[str, QueuePool] = {}
+
+
+def _pool_gauge(getter):
+    return lambda: {(name,): float(getter(pool)) for name, pool in _pools.items()}
+
+
+Gauge("db_pool_size", "连接池常驻连接数", ["pool"], callback=_pool_gauge(lambda p: p.size()))
+Gauge("db_pool_checked_out", "已借出的连接数", ["pool"], callback=_pool_gauge(lambda p: p.checkedout()))
+Gauge("db_pool_overflow", "当前溢出连接数", ["pool"], callback=_pool_gauge(lambda p: max(p.overflow(), 0)))
+
+
+class InstrumentedQueuePool(QueuePool):
+    """记录获取连接等待时间的连接池"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - start, pool=self.metrics_name)
+
+
+def _create_engine(url: str, name: str) -> Engine:
+    """
+    创建带连接池指标的数据库引擎
+
+    Args:
+        url: 数据库URL
+        name: 连接池名称（指标标签）
+
+    Returns:
+        Engine: 数据库引擎
+    """
+    new_engine = create_engine(
+        url,
+        echo=settings.DATABASE_ECHO,
+        poolclass=InstrumentedQueuePool,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING == "always",
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE
+    )
+    new_engine.pool.metrics_name = name
+    _pools[name] = new_engine.pool
+
+    @event.listens_for(new_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        now = time.monotonic()
+        info = connection_record.info
+        # idle 策略：仅对空闲超过阈值的连接做一次探测
+        last_checkin = info.get("checkin_at")
+        if (
+            settings.DATABASE_POOL_PRE_PING == "idle"
+            and last_checkin is not None
+            and now - last_checkin > settings.DATABASE_POOL_PING_IDLE_SECONDS
+        ):
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            except Exception:
+                # 连接池会丢弃该连接并重新获取
+                raise exc.DisconnectionError()
+            finally:
+                cursor.close()
+
+        ctx = current_request()
+        if ctx is not None:
+            ctx.held_connections += 1
+        info["checkout_at"] = now
+        info["request"] = ctx
+        info["route"] = current_route()
+
+    @event.listens_for(new_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        now = time.monotonic()
+        info = connection_record.info
+        checkout_at = info.pop("checkout_at", None)
+        if checkout_at is not None:
+            CONNECTION_HOLD_SECONDS.observe(now - checkout_at, pool=name, route=info.pop("route", "-"))
+        ctx = info.pop("request", None)
+        if ctx is not None:
+            ctx.held_connections -= 1
+        info["checkin_at"] = now
+
+    @event.listens_for(new_engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        context.query_started_at = time.perf_counter()
+        context.trace_span = begin_span("db.query", "client", {
+            "db.system": conn.dialect.name,
+            "db.pool": name,
+            "db.statement": truncate_statement(statement),
+        })
+
+    @event.listens_for(new_engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        route = current_route()
+        DB_QUERIES.inc(pool=name, route=route)
+        DB_QUERY_SECONDS.observe(time.perf_counter() - context.query_started_at, pool=name, route=route)
+        context.trace_span.end()
+
+    @event.listens_for(new_engine, "handle_error")
+    def _on_error(exception_context):
+        span = getattr(exception_context.execution_context, "trace_span", None)
+        if span is not None:
+            span.record_error(exception_context.original_exception)
+            span.end()
+
+    return new_engine
+
+
+# 创建数据库引擎（主库）
+engine = _create_engine(settings.DATABASE_URL, "primary")
+
+
+class ReplicaSet:
+    """
+    只读副本集合
+
+    轮询选择健康副本；后台监控定期检测复制延迟，
+    延迟超过阈值或无法连接的副本会被移出轮询，恢复后自动加回。
+    """
+
+    def __init__(self, urls: List[str]):
+        self.engines: List[Engine] = [
+            _create_engine(url, f"replica{i}") for i, url in enumerate(urls)
+        ]
+        self.lag: Dict[int, Optional[float]] = {i: 0.0 for i in range(len(self.engines))}
+        self._healthy: List[Engine] = list(self.engines)
+        self._cycle = itertools.cycle(self._healthy)
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def choose(self) -> Optional[Engine]:
+        """轮询选择一个健康副本，没有可用副本时返回None"""
+        with self._lock:
+            if not self._healthy:
+                return None
+            return next(self._cycle)
+
+    def refresh(self) -> None:
+        """检测所有副本的复制延迟并更新轮询列表（阻塞调用）"""
+        healthy = []
+        for idx, replica in enumerate(self.engines):
+            lag = _measure_replica_lag(replica)
+            self.lag[idx] = lag
+            if lag is not None and lag <= settings.DATABASE_REPLICA_MAX_LAG_SECONDS:
+                healthy.append(replica)
+            else:
+                logger.warning(f"只读副本 #{idx} 不可用或延迟过高（lag={lag}），已移出轮询")
+
+        with self._lock:
+            if healthy != self._healthy:
+                self._healthy = healthy
+                self._cycle = itertools.cycle(healthy)
+
+
+def _measure_replica_lag(replica: Engine) -> Optional[float]:
+    """
+    测量副本复制延迟
+
+    Args:
+        replica: 副本引擎
+
+    Returns:
+        Optional[float]: 延迟秒数；连接失败或复制中断时返回None
+    """
+    try:
+        with replica.connect() as conn:
+            if conn.dialect.name != "mysql":
+                # 非MySQL副本（如本地替身库）仅检测连通性
+                conn.exec_driver_sql("SELECT 1")
+                return 0.0
+
+            # MySQL 8.0.22+ 使用 REPLICA 关键字，旧版本退回 SLAVE
+            for sql, column in (
+                ("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+                ("SHOW SLAVE STATUS", "Seconds_Behind_Master"),
+            ):
+                try:
+                    row = conn.exec_driver_sql(sql).mappings().first()
+                except Exception:
+                    continue
+                if row is None:
+                    # 未配置复制关系，视为无延迟
+                    return 0.0
+                lag = row.get(column)
+                return float(lag) if lag is not None else None
+            return 0.0
+    except Exception as e:
+        logger.warning(f"副本延迟检测失败: {e}")
+        return None
+
+
+replicas = ReplicaSet(settings.replica_urls)
+
+
+class RoutingSession(Session):
+    """
+    读写分离会话
+
+    - 刷新（写入）与标记为主库的会话始终使用主库
+    - 其余读取轮询健康副本，无可用副本时退回主库
+    """
+
+    def commit(self) -> None:
+        # 提交（含刷新产生的 INSERT/UPDATE）记为一个 span
+        with start_span("db.commit"):
+            super().commit()
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if not replicas or self._flushing or self.info.get("use_primary"):
+            return engine
+        if clause is not None and getattr(clause, "is_dml", False):
+            return engine
+        # 同一会话内固定使用同一个副本，避免一个请求占用多个副本连接
+        replica = self.info.get("replica")
+        if replica is None:
+            replica = self.info["replica"] = replicas.choose()
+        return replica or engine
+
+
 # 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
 
 # 创建Base类
 Base = declarative_base()
 
 
-def get_db() -> Generator[Session, None, None]:
+# 用户最近一次写入时间（monotonic），用于读己之写
+_recent_writes: Dict[int, float] = {}
+_RECENT_WRITES_LIMIT = 10000
+
+# 用户写入提交后的回调（参数为用户ID），如按用户失效读缓存
+_user_write_hooks: List[Callable[[int], None]] = []
+
+
+def on_user_write(hook: Callable[[int], None]) -> Callable[[int], None]:
+    """
+    注册用户写入提交后的回调（绑定了用户的会话提交了写入时调用）
+
+    Args:
+        hook: 回调函数，参数为用户ID
+
+    Returns:
+        Callable[[int], None]: 原回调（可作装饰器使用）
+    """
+    _user_write_hooks.append(hook)
+    return hook
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _remember_flush(session: Session, flush_context) -> None:
+    session.info["has_writes"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _remember_dml(orm_execute_state) -> None:
+    # session.execute(insert/update/delete) 不经过 flush，同样记为写入
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_user_write(session: Session) -> None:
+    user_id = session.info.get("user_id")
+    if session.info.pop("has_writes", False) and user_id is not None:
+        for hook in _user_write_hooks:
+            try:
+                hook(user_id)
+            except Exception as e:
+                logger.warning(f"用户写入回调失败: {e}")
+        now = time.monotonic()
+        _recent_writes[user_id] = now
+        if len(_recent_writes) > _RECENT_WRITES_LIMIT:
+            # 清理已过粘滞窗口的记录
+            expired = now - settings.DATABASE_STICKY_PRIMARY_SECONDS
+            for uid in [k for k, v in _recent_writes.items() if v < expired]:
+                _recent_writes.pop(uid, None)
+
+
+def bind_session_user(db: Session, user_id: int) -> None:
+    """
+    将会话与当前用户关联
+
+    用户在粘滞窗口内有过写入时，本次请求的读取固定走主库。
+
+    Args:
+        db: 数据库会话
+        user_id: 用户ID
+    """
+    db.info["user_id"] = user_id
+    last_write = _recent_writes.get(user_id)
+    if last_write is None:
+        return
+    if time.monotonic() - last_write < settings.DATABASE_STICKY_PRIMARY_SECONDS:
+        db.info["use_primary"] = True
+    else:
+        _recent_writes.pop(user_id, None)
+
+
+def get_db(connection: HTTPConnection) -> Generator[Session, None, None]:
     """
     获取数据库会话
     用于FastAPI的依赖注入
+
+    只读请求（GET/HEAD/OPTIONS）默认读副本，其余请求固定使用主库。
     """
     db = SessionLocal()
+    if connection.scope.get("method") not in _READ_METHODS:
+        db.info["use_primary"] = True
     try:
         yield db
     finally:
         db.close()
 
 
-def init_db() -> None:
+def insert_ignore_conflicts(
+    db: Session,
+    model: Any,
+    rows: List[Dict[str, Any]],
+    index_elements: List[str]
+) -> List[Any]:
     """
-    初始化数据库
-    创建所有表
+    单条多行INSERT，唯一键冲突的行被忽略
+
+    取代"先查询是否存在再插入"的写法，避免并发下的竞态。
+    支持 RETURNING 的数据库（PostgreSQL、SQLite 3.35+）直接返回本语句插入的主键；
+    MySQL 的 ON DUPLICATE KEY UPDATE 会把冲突行也计入影响行数且不支持 RETURNING，
+    改为在同一事务内比对插入前后唯一键对应的主键（依赖默认的 REPEATABLE READ 快照，
+    插入前查询之后由其他事务提交的冲突行不会被误认为本语句插入）。
+
+    Args:
+        db: 数据库会话
+        model: ORM模型类
+        rows: 待插入的行
+        index_elements: 唯一约束列
+
+    Returns:
+        List[Any]: 本语句实际插入的行的主键
     """
-    Base.metadata.create_all(bind=engine)
+    if not rows:
+        return []
+
+    pk = model.__mapper__.primary_key[0]
+    dialect = engine.dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(model).values(rows)
+        # 冲突时将唯一列更新为自身，相当于不做任何修改
+        stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in index_elements})
+    elif dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+        stmt = dialect_insert(model).values(rows).on_conflict_do_nothing(index_elements=index_elements)
+    else:
+        stmt = insert(model).values(rows)
+
+    if dialect != "mysql" and engine.dialect.insert_returning:
+        return list(db.execute(stmt.returning(pk)).scalars())
+
+    columns = [getattr(model, c) for c in index_elements]
+    if len(columns) == 1:
+        key, values = columns[0], [r[index_elements[0]] for r in rows]
+    else:
+        key, values = tuple_(*columns), [tuple(r[c] for c in index_elements) for r in rows]
+    lookup = select(pk).where(key.in_(values))
+    # 写入前后的查询都固定走主库，与 INSERT 处于同一事务
+    existing = set(db.execute(lookup, bind_arguments={"bind": engine}).scalars())
+    db.execute(stmt)
+    return [
+        pk_value for pk_value in db.execute(lookup, bind_arguments={"bind": engine}).scalars()
+        if pk_value not in existing
+    ]
+
 
+@contextmanager
+def outbound_call(operation: str) -> Iterator[AnySpan]:
+    """
+    包裹LLM、ASR等外部调用
+
+    调用记录为链路追踪的 client span（调用方可在其上附加属性）；
+    若调用期间当前请求仍持有数据库连接且耗时超过阈值，记录告警，
+    提示应在外部调用前提交/关闭会话以免耗尽连接池。
+
+    Args:
+        operation: 外部调用名称（如 llm.generate_questions）
+
+    Yields:
+        AnySpan: 本次调用的 span（未采样时为空 span）
+    """
+    start = time.perf_counter()
+    try:
+        with start_span(operation, "client") as span:
+            yield span
+    finally:
+        elapsed = time.perf_counter() - start
+        ctx = current_request()
+        if ctx is not None and ctx.held_connections > 0 and elapsed > settings.DATABASE_HOLD_WARN_SECONDS:
+            SESSION_HELD_OUTBOUND.inc(operation=operation, route=ctx.route)
+            logger.warning(
+                f"{ctx.route} 在外部调用 {operation} 期间持有 {ctx.held_connections} 个数据库连接，"
+                f"耗时 {elapsed:.2f}s"
+            )
 
 
+async def monitor_replica_lag() -> None:
+    """后台任务：定期检测副本延迟"""
+    while True:
+        await asyncio.to_thread(replicas.refresh)
+        await asyncio.sleep(settings.DATABASE_REPLICA_CHECK_INTERVAL)
 
 
+def init_db() -> None:
+    """
+    初始化数据库
+    创建所有表
+    """
+    Base.metadata.create_all(bind=engine)
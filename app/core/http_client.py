@@ -0,0 +1,56 @@
+"""
+共享 HTTP 客户端
+
+应用生命周期内复用同一个连接池（keep-alive，可选 HTTP/2），
+避免每次调用上游服务都重新建立 TCP/TLS 连接。
+"""
+from typing import Optional
+import logging
+
+import httpx
+
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    获取共享的异步 HTTP 客户端（首次调用时创建）
+
+    Returns:
+        httpx.AsyncClient: 共享客户端
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        http2 = settings.HTTP_CLIENT_HTTP2 and _http2_available()
+        if settings.HTTP_CLIENT_HTTP2 and not http2:
+            logger.warning("未安装 h2，共享 HTTP 客户端退回 HTTP/1.1")
+        _client = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(settings.HTTP_CLIENT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+            ),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """关闭共享客户端（应用关闭时调用）"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,94 @@
+"""
+HTTP 请求指标与 /metrics 导出
+
+- 按路由模板记录请求耗时与状态码，未匹配路由的请求统一记为 unmatched，避免原始路径导致标签数量膨胀
+- 多 worker 部署时后台任务定期把本进程快照写入 METRICS_MULTIPROC_DIR，/metrics 合并所有 worker
+"""
+import asyncio
+import logging
+import time
+
+from app.config import settings
+from app.core.metrics import Counter, Gauge, Histogram, collect, render_prometheus, write_snapshot
+
+
+logger = logging.getLogger(__name__)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP 请求数", ["method", "route", "status"]
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP 请求耗时（至响应体发送完毕）", ["method", "route"]
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "正在处理的 HTTP 请求数", ["method"]
+)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _route_label(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class HttpMetricsMiddleware:
+    """ASGI 中间件：记录 HTTP 请求数、耗时与并发数（WebSocket 长连接不计入）"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        start = time.perf_counter()
+
+        async def _send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(method=method)
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            HTTP_IN_FLIGHT.dec(method=method)
+            route = _route_label(scope)
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status_code))
+
+
+def render_metrics() -> str:
+    """
+    导出所有 worker 合并后的 Prometheus 文本格式指标
+
+    Returns:
+        str: 文本格式的指标
+    """
+    metrics = collect(
+        settings.METRICS_MULTIPROC_DIR or None,
+        gauge_max_age=settings.METRICS_FLUSH_INTERVAL * 3
+    )
+    return render_prometheus(metrics)
+
+
+def flush_metrics() -> None:
+    """把本进程的指标快照写入多进程目录（未配置目录时不写）"""
+    if not settings.METRICS_MULTIPROC_DIR:
+        return
+    try:
+        write_snapshot(settings.METRICS_MULTIPROC_DIR)
+    except OSError as e:
+        logger.warning(f"指标快照写入失败: {e}")
+
+
+async def flush_metrics_periodically() -> None:
+    """后台任务：每 METRICS_FLUSH_INTERVAL 秒写入一次本进程的指标快照"""
+    while True:
+        await asyncio.to_thread(flush_metrics)
+        await asyncio.sleep(settings.METRICS_FLUSH_INTERVAL)
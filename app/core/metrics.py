@@ -0,0 +1,330 @@
+"""
+轻量指标注册表
+
+进程内的计数器、仪表盘和直方图，供连接池等热点路径记录运行指标。
+
+多 worker 部署时（配置 METRICS_MULTIPROC_DIR），各 worker 定期把本进程快照写入该目录，
+采集时合并所有 worker 的快照：计数器与直方图累加（已退出 worker 的最后快照继续计入，保证单调），
+仪表盘只累加仍在刷新的 worker。该目录应在服务启动前清空。
+"""
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+LabelValues = Tuple[str, ...]
+
+# 默认直方图分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry: List["_Metric"] = []
+_registry_lock = threading.Lock()
+
+
+class _Metric:
+    """指标基类"""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[dict]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[dict]:
+        with self._lock:
+            items = list(self._values.items())
+        return [{"labels": dict(zip(self.labelnames, k)), "value": v} for k, v in items]
+
+
+class Gauge(_Metric):
+    """
+    仪表盘
+
+    可直接设置数值，也可传入 callback 在采集时计算（返回 标签值元组 -> 数值）。
+    """
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[dict]:
+        with self._lock:
+            values = dict(self._values)
+        if self._callback is not None:
+            values.update(self._callback())
+        return [{"labels": dict(zip(self.labelnames, k)), "value": v} for k, v in values.items()]
+
+
+class Histogram(_Metric):
+    """累积分桶直方图"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签值 -> [各桶计数..., 总数, 总和]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            if idx < len(self.buckets):
+                state[idx] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    def samples(self) -> List[dict]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        result = []
+        for key, state in items:
+            cumulative, buckets = 0.0, {}
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                buckets[bound] = cumulative
+            result.append({
+                "labels": dict(zip(self.labelnames, key)),
+                "buckets": buckets,
+                "count": state[-2],
+                "sum": state[-1],
+            })
+        return result
+
+
+def snapshot(prefix: str = "") -> Dict[str, dict]:
+    """
+    导出当前进程的指标快照
+
+    Args:
+        prefix: 只导出名称以该前缀开头的指标
+
+    Returns:
+        Dict[str, dict]: 指标名 -> 类型、说明与样本
+    """
+    with _registry_lock:
+        metrics = [m for m in _registry if m.name.startswith(prefix)]
+    return {
+        m.name: {"type": m.type, "help": m.documentation, "samples": m.samples()}
+        for m in metrics
+    }
+
+
+def _sample_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted(labels.items()))
+
+
+def _merge_into(merged: Dict[str, dict], metrics: Dict[str, dict], include_gauges: bool) -> None:
+    """把一个进程的快照累加到合并结果（直方图分桶按上界对齐）"""
+    for name, metric in metrics.items():
+        if metric["type"] == "gauge" and not include_gauges:
+            continue
+        target = merged.setdefault(name, {"type": metric["type"], "help": metric["help"], "samples": {}})
+        samples = target["samples"]
+        for sample in metric["samples"]:
+            key = _sample_key(sample["labels"])
+            current = samples.get(key)
+            if metric["type"] != "histogram":
+                if current is None:
+                    samples[key] = dict(sample)
+                else:
+                    current["value"] += sample["value"]
+                continue
+            if current is None:
+                samples[key] = {**sample, "buckets": dict(sample["buckets"])}
+                continue
+            for bound, count in sample["buckets"].items():
+                current["buckets"][bound] = current["buckets"].get(bound, 0.0) + count
+            current["count"] += sample["count"]
+            current["sum"] += sample["sum"]
+
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"metrics_{pid}.json")
+
+
+def write_snapshot(directory: str) -> None:
+    """
+    把当前进程的指标快照写入多进程目录（先写临时文件再替换，读取方不会读到半个文件）
+
+    Args:
+        directory: 多进程指标目录
+    """
+    metrics = snapshot()
+    for metric in metrics.values():
+        if metric["type"] == "histogram":
+            for sample in metric["samples"]:
+                # JSON 对象键只能是字符串，分桶改为 [上界, 计数] 列表
+                sample["buckets"] = list(sample["buckets"].items())
+    os.makedirs(directory, exist_ok=True)
+    path = _snapshot_path(directory, os.getpid())
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"updated_at": time.time(), "metrics": metrics}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_snapshot(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取指标快照失败 {path}: {e}")
+        return None
+    for metric in data["metrics"].values():
+        if metric["type"] == "histogram":
+            for sample in metric["samples"]:
+                sample["buckets"] = {float(bound): count for bound, count in sample["buckets"]}
+    return data
+
+
+def collect(directory: Optional[str] = None, gauge_max_age: float = 0.0) -> Dict[str, dict]:
+    """
+    采集指标：当前进程的实时快照，配置了多进程目录时合并其他 worker 写入的快照
+
+    Args:
+        directory: 多进程指标目录，为空时只采集当前进程
+        gauge_max_age: 其他 worker 的快照超过该时长（秒）未刷新时不再计入其仪表盘
+
+    Returns:
+        Dict[str, dict]: 指标名 -> 类型、说明与样本（样本按标签合并）
+    """
+    merged: Dict[str, dict] = {}
+    _merge_into(merged, snapshot(), include_gauges=True)
+    if directory and os.path.isdir(directory):
+        own_path = _snapshot_path(directory, os.getpid())
+        now = time.time()
+        for entry in os.scandir(directory):
+            if not entry.name.endswith(".json") or entry.path == own_path:
+                continue
+            data = _read_snapshot(entry.path)
+            if data is None:
+                continue
+            fresh = now - data.get("updated_at", 0.0) <= gauge_max_age
+            _merge_into(merged, data["metrics"], include_gauges=fresh)
+    return {
+        name: {**metric, "samples": list(metric["samples"].values())}
+        for name, metric in merged.items()
+    }
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _escape_help(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels.items())
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def render_prometheus(metrics: Dict[str, dict]) -> str:
+    """
+    按 Prometheus 文本格式（0.0.4）输出指标
+
+    Args:
+        metrics: snapshot() 或 collect() 的结果
+
+    Returns:
+        str: 文本格式的指标
+    """
+    lines: List[str] = []
+    for name in sorted(metrics):
+        metric = metrics[name]
+        lines.append(f"# HELP {name} {_escape_help(metric['help'])}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for sample in metric["samples"]:
+            labels = sample["labels"]
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(sample['value'])}")
+                continue
+            for bound, count in sorted(sample["buckets"].items()):
+                lines.append(
+                    f"{name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {_format_value(count)}"
+                )
+            lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {_format_value(sample['count'])}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(sample['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {_format_value(sample['count'])}")
+    lines.append("")
+    return "\n".join(lines)
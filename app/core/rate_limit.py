@@ -0,0 +1,150 @@
+"""
+令牌桶限流
+
+用于登录/注册等需要密码哈希的接口：超限请求在任何密码计算之前直接返回 429 和 Retry-After。
+状态默认保存在进程内（有界 LRU，按桶加满所需时间过期）；
+启用 RATE_LIMIT_REDIS 时改用 Redis 中的原子令牌桶，多 worker 共享同一额度，Redis 故障时退回进程内。
+"""
+from typing import Optional
+import logging
+import math
+import time
+
+from fastapi import HTTPException, Request, status
+
+from app.config import settings
+from app.core.cache import TTLCache
+from app.core.metrics import Counter
+from app.core.redis import get_async_redis
+
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED = Counter(
+    "auth_rate_limited_total", "被限流拒绝的请求数", ["limiter"]
+)
+
+_REDIS_PREFIX = "rate_limit:"
+
+# 原子令牌桶：返回需要等待的秒数（0 表示放行）
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 't', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class TokenBucketLimiter:
+    """按键的令牌桶：容量 capacity，每分钟补充 per_minute 个令牌"""
+
+    def __init__(self, name: str, capacity: int, per_minute: float):
+        self.name = name
+        self.capacity = max(capacity, 1)
+        self.rate = max(per_minute, 0.001) / 60
+        # 桶加满后与新建无异，过期即可丢弃
+        self._buckets = TTLCache(
+            maxsize=settings.RATE_LIMIT_MAX_KEYS,
+            ttl=self.capacity / self.rate
+        )
+
+    def _take_local(self, key: str, now: float) -> float:
+        tokens, ts = self._buckets.get(key, (float(self.capacity), now))
+        tokens = min(self.capacity, tokens + max(now - ts, 0.0) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets.set(key, (tokens, now))
+        return wait
+
+    async def take(self, key: str) -> float:
+        """
+        消耗一个令牌
+
+        Args:
+            key: 限流键（IP、用户名等）
+
+        Returns:
+            float: 需要等待的秒数，0 表示放行
+        """
+        now = time.time()
+        redis = get_async_redis() if settings.RATE_LIMIT_REDIS else None
+        if redis is not None:
+            try:
+                wait = await redis.eval(
+                    _TOKEN_BUCKET_LUA, 1, f"{_REDIS_PREFIX}{self.name}:{key}",
+                    self.capacity, self.rate, now
+                )
+                return float(wait)
+            except Exception as e:
+                logger.warning(f"Redis 限流失败，退回进程内限流: {e}")
+        return self._take_local(key, now)
+
+
+login_ip_limiter = TokenBucketLimiter(
+    "login_ip", settings.RATE_LIMIT_LOGIN_IP_BURST, settings.RATE_LIMIT_LOGIN_IP_PER_MINUTE
+)
+login_user_limiter = TokenBucketLimiter(
+    "login_user", settings.RATE_LIMIT_LOGIN_USER_BURST, settings.RATE_LIMIT_LOGIN_USER_PER_MINUTE
+)
+register_ip_limiter = TokenBucketLimiter(
+    "register_ip", settings.RATE_LIMIT_REGISTER_IP_BURST, settings.RATE_LIMIT_REGISTER_IP_PER_MINUTE
+)
+availability_ip_limiter = TokenBucketLimiter(
+    "availability_ip", settings.RATE_LIMIT_AVAILABILITY_IP_BURST,
+    settings.RATE_LIMIT_AVAILABILITY_IP_PER_MINUTE
+)
+
+
+def client_ip(request: Request) -> str:
+    """
+    获取客户端 IP（RATE_LIMIT_TRUST_FORWARDED 时取 X-Forwarded-For 的第一个地址）
+
+    Args:
+        request: 请求
+
+    Returns:
+        str: 客户端 IP
+    """
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "-"
+
+
+async def enforce_rate_limit(limiter: TokenBucketLimiter, key: Optional[str]) -> None:
+    """
+    消耗一个令牌，超限时抛出 429
+
+    Args:
+        limiter: 限流器
+        key: 限流键，为空时不限流
+
+    Raises:
+        HTTPException: 超限时429（带 Retry-After）
+    """
+    if not settings.RATE_LIMIT_ENABLED or not key:
+        return
+    wait = await limiter.take(key)
+    if wait > 0:
+        RATE_LIMITED.inc(limiter=limiter.name)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="请求过于频繁，请稍后重试",
+            headers={"Retry-After": str(max(math.ceil(wait), 1))},
+        )
@@ -0,0 +1,44 @@
+"""
+Redis 连接（可选）
+
+仅在 REDIS_ENABLED 时使用，redis 包按需导入。
+"""
+from typing import Any, Optional
+
+from app.config import settings
+
+
+_client: Optional[Any] = None
+_async_client: Optional[Any] = None
+
+
+def get_redis() -> Optional[Any]:
+    """
+    获取同步 Redis 客户端
+
+    Returns:
+        Optional[redis.Redis]: 未启用 Redis 时返回None
+    """
+    global _client
+    if not settings.REDIS_ENABLED:
+        return None
+    if _client is None:
+        import redis
+        _client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
+
+
+def get_async_redis() -> Optional[Any]:
+    """
+    获取异步 Redis 客户端
+
+    Returns:
+        Optional[redis.asyncio.Redis]: 未启用 Redis 时返回None
+    """
+    global _async_client
+    if not settings.REDIS_ENABLED:
+        return None
+    if _async_client is None:
+        import redis.asyncio
+        _async_client = redis.asyncio.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _async_client
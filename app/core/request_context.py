@@ -0,0 +1,57 @@
+"""
+请求上下文
+
+通过 contextvars 在一次请求内共享路由模板等信息，
+供连接池、外部调用等底层代码按路由记录指标。
+"""
+from contextvars import ContextVar
+from typing import Optional
+
+
+class RequestContext:
+    """单个请求的上下文"""
+
+    __slots__ = ("scope", "held_connections")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        # 当前请求持有的数据库连接数
+        self.held_connections = 0
+
+    @property
+    def route(self) -> str:
+        """路由模板（如 /api/v1/answers/{answer_id}），路由匹配前为原始路径"""
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "")
+
+
+_current: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def current_request() -> Optional[RequestContext]:
+    """获取当前请求上下文，不在请求内时返回None"""
+    return _current.get()
+
+
+def current_route() -> str:
+    """获取当前请求的路由模板，不在请求内时返回"-" """
+    ctx = _current.get()
+    return ctx.route if ctx else "-"
+
+
+class RequestContextMiddleware:
+    """ASGI 中间件：为每个 HTTP/WebSocket 请求建立上下文"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        token = _current.set(RequestContext(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,304 @@
+"""
+按用户的读缓存
+
+热点 GET 接口（面试列表/详情/统计、问题与评价读取）的响应按 用户+版本+路由+参数 缓存序列化后的响应体。
+每个用户一个版本号：该用户的会话提交任何写入后版本号递增，其全部缓存条目随之失效，无需逐条删除。
+版本号永不重复（以时间为下界递增，缺失时分配新值），旧版本下缓存的条目不会在之后被误命中。
+- 条目存放在进程内按字节数限制容量的 LRU，同时受 RESPONSE_CACHE_TTL_SECONDS 限制；
+  RESPONSE_CACHE_REDIS 时条目同时写入 Redis，多 worker 共享
+- 启用 Redis 时版本号存放在 Redis，任一 worker 上的写入对所有 worker 立即生效；
+  未启用时版本号仅在进程内（单 worker 部署）。Redis 不可用时本次请求不走缓存
+- 防击穿：同一键同一时刻只有一个请求重新计算，其余请求等待其结果；
+  共享模式下用 Redis 短锁协调各 worker，等待超时后自行计算
+- 配置了只读副本时，未命中的计算固定读主库：版本号跨 worker 共享，而读己之写的粘滞窗口只在写入的 worker 内，
+  其他 worker 读到尚未同步的副本会把旧数据缓存在新版本下，并经共享条目返回给所有 worker
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+import asyncio
+import inspect
+import itertools
+import json
+import logging
+import time
+
+from fastapi import Request, Response, status
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.cache import SizedLRUCache
+from app.core.conditional import etag_matches
+from app.core.database import on_user_write, replicas
+from app.core.metrics import Counter, Gauge
+from app.core.redis import get_redis, get_async_redis
+from app.core.responses import serialize
+
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests_total", "读缓存查询次数", ["route", "result"]
+)
+RESPONSE_CACHE_BYTES = Gauge(
+    "response_cache_bytes", "进程内读缓存占用字节数"
+)
+
+_REDIS_PREFIX = "resp_cache:"
+
+# 原子递增版本号，且不小于 Redis 服务器当前毫秒时间：
+# 版本号键过期或被淘汰后重新计数也不会回到旧值，旧版本下缓存的条目不会被误命中
+_BUMP_VERSION_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local v = redis.call('INCR', KEYS[1])
+if v < now then
+    v = now
+    redis.call('SET', KEYS[1], string.format('%d', v))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return string.format('%d', v)
+"""
+# 共享模式下等待其他 worker 计算结果的轮询间隔（秒）
+_LOCK_POLL_INTERVAL = 0.05
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """已序列化的 200 响应"""
+    body: bytes
+    headers: Tuple[Tuple[str, str], ...] = ()
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers)
+
+    def to_response(self, request: Request) -> Response:
+        """生成响应（带 ETag 且命中 If-None-Match 时为 304）"""
+        headers = dict(self.headers)
+        etag = headers.get("ETag")
+        if etag and etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+    def dumps(self) -> str:
+        return json.dumps({"h": self.headers, "b": self.body.decode("utf-8")}, ensure_ascii=False)
+
+    @classmethod
+    def loads(cls, raw: str) -> "CachedResponse":
+        data = json.loads(raw)
+        return cls(data["b"].encode("utf-8"), tuple(tuple(h) for h in data["h"]))
+
+
+def cached_json(value: Any, response_model: Any = Any, headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+    """
+    按响应模型序列化返回值，生成可缓存的响应
+
+    Args:
+        value: 路由返回值（ORM 对象、模型实例、dict 或其列表）
+        response_model: 响应模型，默认按值推断
+        headers: 附加响应头（如 ETag、Cache-Control）
+
+    Returns:
+        CachedResponse: 可缓存的响应
+    """
+    return CachedResponse(serialize(value, response_model), tuple((headers or {}).items()))
+
+
+_entries = SizedLRUCache(
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS
+)
+# 进程内版本号：用户ID -> (版本, 递增时间)；版本取自以启动时刻（毫秒）为起点的递增序列，不会复用
+_versions: Dict[int, Tuple[int, float]] = {}
+_VERSIONS_LIMIT = 100000
+_clock = itertools.count(time.time_ns() // 1_000_000)
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def _shared() -> bool:
+    """条目是否在 Redis 中共享"""
+    return settings.RESPONSE_CACHE_REDIS and settings.REDIS_ENABLED
+
+
+def _bump_local_version(user_id: int) -> int:
+    now = time.monotonic()
+    version = next(_clock)
+    _versions[user_id] = (version, now)
+    if len(_versions) > _VERSIONS_LIMIT:
+        # 递增时间早于一个 TTL 的记录可以丢弃：此前写入的条目均已过期
+        expired = now - settings.RESPONSE_CACHE_TTL_SECONDS
+        for uid in [k for k, v in _versions.items() if v[1] < expired]:
+            _versions.pop(uid, None)
+    return version
+
+
+@on_user_write
+def bump_user_version(user_id: int) -> None:
+    """
+    递增用户的缓存版本，使其全部读缓存失效（用户会话提交写入后自动调用）
+
+    Args:
+        user_id: 用户ID
+    """
+    _bump_local_version(user_id)
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        # 版本号只增不减（见 _BUMP_VERSION_LUA），过期只用于回收长期无写入用户的键
+        client.eval(
+            _BUMP_VERSION_LUA, 1, f"{_REDIS_PREFIX}v:{user_id}",
+            settings.RESPONSE_CACHE_TTL_SECONDS + 60
+        )
+    except Exception as e:
+        logger.warning(f"读缓存版本递增失败: {e}")
+
+
+async def _current_version(user_id: int) -> Optional[int]:
+    """
+    用户当前缓存版本；启用 Redis 但不可用时返回None（本次不走缓存）
+
+    版本号不存在（从未写入、已过期或被淘汰）时分配一个新版本，而不是退回固定初始值，
+    保证同一用户的版本号永不重复
+    """
+    client = get_async_redis()
+    if client is None:
+        state = _versions.get(user_id)
+        return state[0] if state else _bump_local_version(user_id)
+    key = f"{_REDIS_PREFIX}v:{user_id}"
+    try:
+        value = await client.get(key)
+        if value is None:
+            value = await client.eval(_BUMP_VERSION_LUA, 1, key, settings.RESPONSE_CACHE_TTL_SECONDS + 60)
+    except Exception as e:
+        logger.warning(f"读缓存版本获取失败: {e}")
+        return None
+    return int(value)
+
+
+async def _shared_get(key: str) -> Optional[CachedResponse]:
+    try:
+        raw = await get_async_redis().get(f"{_REDIS_PREFIX}e:{key}")
+    except Exception as e:
+        logger.warning(f"共享读缓存读取失败: {e}")
+        return None
+    return CachedResponse.loads(raw) if raw else None
+
+
+async def _shared_set(key: str, entry: CachedResponse) -> None:
+    try:
+        await get_async_redis().set(
+            f"{_REDIS_PREFIX}e:{key}", entry.dumps(), ex=settings.RESPONSE_CACHE_TTL_SECONDS
+        )
+    except Exception as e:
+        logger.warning(f"共享读缓存写入失败: {e}")
+
+
+async def _lookup(key: str) -> Optional[CachedResponse]:
+    entry = _entries.get(key)
+    if entry is None and _shared():
+        entry = await _shared_get(key)
+        if entry is not None:
+            _entries.set(key, entry, entry.size)
+    return entry
+
+
+async def _wait_for_peer(key: str) -> Optional[CachedResponse]:
+    """共享模式：其他 worker 正在计算时等待其写入结果，超时返回None"""
+    client = get_async_redis()
+    try:
+        if await client.set(f"{_REDIS_PREFIX}lock:{key}", "1", nx=True, px=5000):
+            return None
+    except Exception:
+        return None
+    deadline = time.monotonic() + settings.RESPONSE_CACHE_LOCK_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(_LOCK_POLL_INTERVAL)
+        entry = await _shared_get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+async def _release_lock(key: str) -> None:
+    try:
+        await get_async_redis().delete(f"{_REDIS_PREFIX}lock:{key}")
+    except Exception:
+        pass
+
+
+async def _compute(compute: Callable) -> Union[Response, CachedResponse]:
+    result = compute()
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def cached_response(
+    request: Request,
+    db: Session,
+    user_id: int,
+    key: str,
+    compute: Callable[[], Union[Response, CachedResponse]]
+) -> Response:
+    """
+    读穿缓存：命中时直接返回缓存的响应体，未命中时计算并缓存
+
+    compute 返回 CachedResponse 时缓存；返回 Response（如校验查询得到的 304）时不缓存、原样返回。
+    compute 抛出的异常（404/403 等）直接向上传播，不缓存。
+
+    Args:
+        request: 请求（用于 If-None-Match）
+        db: compute 使用的数据库会话（未命中时固定读主库）
+        user_id: 当前用户ID
+        key: 路由与参数组成的缓存键
+        compute: 计算函数（同步或异步）
+
+    Returns:
+        Response: 响应
+    """
+    route = key.split(":", 1)[0]
+    version = await _current_version(user_id) if settings.RESPONSE_CACHE_ENABLED else None
+    if version is None:
+        result = await _compute(compute)
+        return result if isinstance(result, Response) else result.to_response(request)
+
+    full_key = f"{user_id}:{version}:{key}"
+    entry = await _lookup(full_key)
+    if entry is not None:
+        RESPONSE_CACHE_REQUESTS.inc(route=route, result="hit")
+        return entry.to_response(request)
+
+    future = _inflight.get(full_key)
+    if future is not None:
+        result = await asyncio.shield(future)
+        if isinstance(result, CachedResponse):
+            RESPONSE_CACHE_REQUESTS.inc(route=route, result="joined")
+            return result.to_response(request)
+
+    if _shared():
+        entry = await _wait_for_peer(full_key)
+        if entry is not None:
+            RESPONSE_CACHE_REQUESTS.inc(route=route, result="joined")
+            _entries.set(full_key, entry, entry.size)
+            return entry.to_response(request)
+
+    RESPONSE_CACHE_REQUESTS.inc(route=route, result="miss")
+    if replicas:
+        db.info["use_primary"] = True
+    future = _inflight[full_key] = asyncio.get_running_loop().create_future()
+    result = None
+    try:
+        result = await _compute(compute)
+        if isinstance(result, CachedResponse):
+            _entries.set(full_key, result, result.size)
+            RESPONSE_CACHE_BYTES.set(_entries.nbytes)
+            if _shared():
+                await _shared_set(full_key, result)
+    finally:
+        # 计算失败时结果为None，等待者各自重新计算
+        future.set_result(result)
+        _inflight.pop(full_key, None)
+        if _shared():
+            await _release_lock(full_key)
+    return result if isinstance(result, Response) else result.to_response(request)
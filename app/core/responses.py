@@ -0,0 +1,125 @@
+"""
+JSON 响应
+
+- 默认响应类：安装了 orjson 时使用 ORJSONResponse，否则退回标准库 JSONResponse
+- SerializedRoute：启用 RESPONSE_SKIP_REVALIDATION 时，声明了 response_model 的路由
+  直接用 pydantic 的 Rust 序列化器输出 JSON：返回值已是响应模型实例时不再重复校验，
+  ORM 对象只按属性校验一次；跳过 FastAPI 的"导出为 dict → 再校验 → 转 JSON 兼容对象 → 编码"流程
+"""
+from typing import Any, Dict
+import functools
+import inspect
+
+from fastapi import Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None and settings.RESPONSE_ORJSON:
+    from fastapi.responses import ORJSONResponse as DefaultJSONResponse
+else:
+    DefaultJSONResponse = JSONResponse
+
+
+# 注入 FastAPI 子响应的附加参数名（保留路由设置的响应头与状态码）
+_SUB_RESPONSE = "_serialized_route_response"
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def _adapter(response_model: Any) -> TypeAdapter:
+    adapter = _adapters.get(response_model)
+    if adapter is None:
+        adapter = _adapters[response_model] = TypeAdapter(response_model)
+    return adapter
+
+
+def _is_validated(value: Any, response_model: Any) -> bool:
+    """返回值是否已是响应模型实例（或其列表）"""
+    if isinstance(response_model, type) and issubclass(response_model, BaseModel):
+        return isinstance(value, response_model)
+    item_type = getattr(response_model, "__args__", (None,))[0]
+    return (
+        isinstance(value, list)
+        and isinstance(item_type, type) and issubclass(item_type, BaseModel)
+        and all(isinstance(v, item_type) for v in value)
+    )
+
+
+def serialize(value: Any, response_model: Any) -> bytes:
+    """
+    按响应模型把返回值序列化为 JSON
+
+    Args:
+        value: 路由返回值（模型实例、ORM 对象、dict 或其列表）
+        response_model: 响应模型
+
+    Returns:
+        bytes: JSON 内容
+    """
+    adapter = _adapter(response_model)
+    if not _is_validated(value, response_model):
+        value = adapter.validate_python(value, from_attributes=True)
+    return adapter.dump_json(value, by_alias=True)
+
+
+def _wrap_endpoint(endpoint, response_model: Any, status_code: Any):
+    """包装路由函数：直接返回已序列化的响应"""
+    signature = inspect.signature(endpoint)
+    # FastAPI 只向一个 Response 参数注入子响应：路由自己声明了就沿用
+    own_param = next(
+        (p.name for p in signature.parameters.values() if p.annotation is Response), None
+    )
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        sub_response: Response = kwargs[own_param] if own_param else kwargs.pop(_SUB_RESPONSE)
+        result = await endpoint(*args, **kwargs)
+        if isinstance(result, Response):
+            return result
+        response = Response(
+            content=serialize(result, response_model),
+            status_code=sub_response.status_code or status_code or 200,
+            media_type="application/json",
+        )
+        for name, value in sub_response.headers.items():
+            if name != "content-length":
+                response.headers.append(name, value)
+        return response
+
+    if own_param:
+        return wrapper
+    wrapper.__signature__ = signature.replace(parameters=[
+        *signature.parameters.values(),
+        inspect.Parameter(_SUB_RESPONSE, inspect.Parameter.KEYWORD_ONLY, annotation=Response),
+    ])
+    return wrapper
+
+
+class SerializedRoute(APIRoute):
+    """路由类：RESPONSE_SKIP_REVALIDATION 开启时跳过响应模型的重复校验"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        response_model = kwargs.get("response_model")
+        if (
+            settings.RESPONSE_SKIP_REVALIDATION
+            and response_model is not None
+            and not isinstance(response_model, DefaultPlaceholder)
+            and inspect.iscoroutinefunction(endpoint)
+            # include_router 会用已包装的函数再次创建路由
+            and not getattr(endpoint, "__serialized__", False)
+        ):
+            status_code = kwargs.get("status_code")
+            if isinstance(status_code, DefaultPlaceholder):
+                status_code = status_code.value
+            endpoint = _wrap_endpoint(endpoint, response_model, status_code)
+            endpoint.__serialized__ = True
+        super().__init__(path, endpoint, **kwargs)
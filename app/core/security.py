@@ -1,16 +1,45 @@
 """
 安全相关功能：密码加密、JWT生成和验证
 """
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import List, Optional, Tuple, Union, Any
+import asyncio
+import time
+import uuid
+from fastapi import HTTPException, status
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 
 from app.config import settings
-
-
-# 密码加密上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.metrics import Counter, Gauge, Histogram
+from app.core.token_revocation import is_token_revoked
+
+
+# 密码加密上下文：成本因子低于 BCRYPT_ROUNDS 的哈希视为过期，验证通过后重新哈希
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt 计算期间释放 GIL，放到专用线程池执行，避免阻塞事件循环
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_hash_pending = 0
+
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds", "密码哈希/验证耗时（含排队）", ["op"]
+)
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending", "排队与执行中的密码哈希任务数"
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "因排队已满被拒绝的密码哈希任务数", ["op"]
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -40,6 +69,76 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    批量加密密码（同步，供批量开通的进程池调用）
+
+    Args:
+        passwords: 明文密码列表
+
+    Returns:
+        List[str]: 与输入一一对应的哈希密码
+    """
+    return [pwd_context.hash(p) for p in passwords]
+
+
+async def _run_hash(op: str, func, *args):
+    """在密码哈希线程池中执行，排队任务超过 PASSWORD_HASH_QUEUE_LIMIT 时返回 503"""
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_QUEUE_LIMIT:
+        PASSWORD_HASH_REJECTED.inc(op=op)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="请求过多，请稍后重试",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
+    PASSWORD_HASH_PENDING.set(_hash_pending)
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_pending -= 1
+        PASSWORD_HASH_PENDING.set(_hash_pending)
+        PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started, op=op)
+
+
+async def hash_password(password: str) -> str:
+    """
+    在专用线程池中加密密码
+
+    Args:
+        password: 明文密码
+
+    Returns:
+        str: 哈希密码
+
+    Raises:
+        HTTPException: 排队已满时503
+    """
+    return await _run_hash("hash", pwd_context.hash, password)
+
+
+async def verify_and_update_password(
+    plain_password: str,
+    hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    在专用线程池中验证密码，并在哈希成本过期时生成新哈希
+
+    Args:
+        plain_password: 明文密码
+        hashed_password: 哈希密码
+
+    Returns:
+        Tuple[bool, Optional[str]]: 是否匹配；匹配且需要升级时附带新哈希，否则为None
+
+    Raises:
+        HTTPException: 排队已满时503
+    """
+    return await _run_hash("verify", pwd_context.verify_and_update, plain_password, hashed_password)
+
+
 def create_access_token(
     subject: Union[str, Any],
     expires_delta: Optional[timedelta] = None
@@ -61,7 +160,8 @@ def create_access_token(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     
-    to_encode = {"exp": expire, "sub": str(subject)}
+    # jti 用于单个令牌吊销；iat 保留小数，用于按用户吊销此前签发的令牌
+    to_encode = {"exp": expire, "sub": str(subject), "jti": uuid.uuid4().hex, "iat": time.time()}
     encoded_jwt = jwt.encode(
         to_encode,
         settings.SECRET_KEY,
@@ -84,7 +184,10 @@ def create_refresh_token(subject: Union[str, Any]) -> str:
         days=settings.REFRESH_TOKEN_EXPIRE_DAYS
     )
     
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
+    to_encode = {
+        "exp": expire, "sub": str(subject), "type": "refresh",
+        "jti": uuid.uuid4().hex, "iat": time.time()
+    }
     encoded_jwt = jwt.encode(
         to_encode,
         settings.SECRET_KEY,
@@ -101,7 +204,7 @@ def decode_token(token: str) -> Optional[dict]:
         token: JWT令牌
         
     Returns:
-        Optional[dict]: 解码后的payload，如果失败返回None
+        Optional[dict]: 解码后的payload，如果失败或令牌已被吊销返回None
     """
     try:
         payload = jwt.decode(
@@ -109,9 +212,11 @@ def decode_token(token: str) -> Optional[dict]:
             settings.SECRET_KEY,
             algorithms=[settings.ALGORITHM]
         )
-        return payload
     except JWTError:
         return None
+    if is_token_revoked(payload):
+        return None
+    return payload
 
 
 
@@ -0,0 +1,217 @@
+"""
+令牌吊销
+
+登出、刷新令牌轮换与修改密码时登记吊销记录，每个请求在内存中校验：
+先查布隆过滤器（绝大多数未吊销令牌在此直接放行），命中后再查精确集合。
+吊销记录分两类：
+- 单个令牌：j:{jti}，直到令牌原本的过期时间
+- 用户全部令牌：u:{用户ID}，签发时间早于截止时间的令牌失效（修改密码），直到刷新令牌的最长有效期
+记录过期后自动清理并重建布隆过滤器。
+启用 Redis 时记录写入 Redis（带过期时间）并通过发布/订阅同步到其他 worker，
+启动时从 Redis 加载；未启用时仅在进程内生效（单 worker 部署）。
+"""
+from typing import Dict, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from app.config import settings
+from app.core.bloom import BloomFilter
+from app.core.metrics import Counter
+from app.core.redis import get_redis, get_async_redis
+
+
+logger = logging.getLogger(__name__)
+
+# 跨 worker 同步频道与记录前缀
+REVOCATION_CHANNEL = "token_revocation:notify"
+_REDIS_PREFIX = "token_revoked:"
+
+# 过期记录清理间隔（秒）
+_PURGE_INTERVAL = 60.0
+
+REVOCATION_CHECKS = Counter(
+    "token_revocation_checks_total", "令牌吊销校验次数", ["result"]
+)
+
+
+class RevocationList:
+    """吊销记录（布隆过滤器 + 精确集合）"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._bloom = BloomFilter(capacity, error_rate)
+        # 键 -> (过期时间, 截止时间)；单个令牌的截止时间为0
+        self._entries: Dict[str, Tuple[float, float]] = {}
+        self._next_purge = time.time() + _PURGE_INTERVAL
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, key: str, expires_at: float, cutoff: float = 0.0) -> bool:
+        """
+        登记吊销记录
+
+        Args:
+            key: 记录键
+            expires_at: 记录过期时间（时间戳）
+            cutoff: 截止时间（仅用户记录使用）
+
+        Returns:
+            bool: 是否为新记录（已存在且未过期时返回False）
+        """
+        now = time.time()
+        self._maybe_purge(now)
+        current = self._entries.get(key)
+        if current is not None and current[0] > now and current[1] >= cutoff:
+            return False
+        if current is not None:
+            expires_at = max(expires_at, current[0])
+        self._entries[key] = (expires_at, cutoff)
+        self._bloom.add(key)
+        return True
+
+    def get(self, key: str) -> Optional[Tuple[float, float]]:
+        """获取未过期的记录（布隆过滤器判定不存在时不查精确集合）"""
+        if key not in self._bloom:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            REVOCATION_CHECKS.inc(result="false_positive")
+            return None
+        return entry
+
+    def clear(self) -> None:
+        """清空全部记录"""
+        self._entries.clear()
+        self._bloom.clear()
+
+    def _maybe_purge(self, now: float) -> None:
+        if now < self._next_purge:
+            return
+        self._next_purge = now + _PURGE_INTERVAL
+        live = {k: v for k, v in self._entries.items() if v[0] > now}
+        if len(live) == len(self._entries):
+            return
+        bloom = BloomFilter(self._capacity, self._error_rate)
+        bloom.update(live)
+        self._entries, self._bloom = live, bloom
+
+
+_revoked = RevocationList(
+    settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+    settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE
+)
+
+
+def _user_key(user_id) -> str:
+    return f"u:{user_id}"
+
+
+def is_token_revoked(payload: dict) -> bool:
+    """
+    令牌是否已被吊销（纯内存判断）
+
+    Args:
+        payload: 已验证签名的令牌负载
+
+    Returns:
+        bool: 是否已吊销
+    """
+    jti = payload.get("jti")
+    if jti and _revoked.get(f"j:{jti}") is not None:
+        REVOCATION_CHECKS.inc(result="revoked")
+        return True
+    entry = _revoked.get(_user_key(payload.get("sub")))
+    if entry is not None and float(payload.get("iat") or 0) < entry[1]:
+        REVOCATION_CHECKS.inc(result="revoked")
+        return True
+    return False
+
+
+def _publish(key: str, expires_at: float, cutoff: float, only_new: bool = False) -> bool:
+    """写入 Redis 并通知其他 worker；only_new 时已存在则返回False"""
+    client = get_redis()
+    if client is None:
+        return True
+    ttl = max(int(expires_at - time.time()) + 1, 1)
+    value = f"{expires_at}|{cutoff}"
+    try:
+        if not client.set(_REDIS_PREFIX + key, value, ex=ttl, nx=only_new):
+            return False
+        client.publish(REVOCATION_CHANNEL, f"{key}|{value}")
+    except Exception as e:
+        logger.warning(f"令牌吊销同步失败: {e}")
+    return True
+
+
+def revoke_token(payload: dict) -> bool:
+    """
+    吊销单个令牌，直到其原本的过期时间
+
+    Args:
+        payload: 令牌负载（需含 jti 与 exp）
+
+    Returns:
+        bool: 是否为首次吊销（用于发现刷新令牌被重复使用）
+    """
+    jti = payload.get("jti")
+    if not jti:
+        return True
+    key = f"j:{jti}"
+    expires_at = float(payload.get("exp") or time.time() + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+    if not _revoked.add(key, expires_at):
+        return False
+    return _publish(key, expires_at, 0.0, only_new=True)
+
+
+def revoke_user_tokens(user_id: int) -> None:
+    """
+    吊销用户此刻之前签发的全部令牌（修改密码等场景）
+
+    Args:
+        user_id: 用户ID
+    """
+    now = time.time()
+    key = _user_key(user_id)
+    expires_at = now + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+    _revoked.add(key, expires_at, cutoff=now)
+    _publish(key, expires_at, now)
+
+
+def _apply(key: str, value: str) -> None:
+    expires_at, cutoff = value.split("|")
+    _revoked.add(key, float(expires_at), float(cutoff))
+
+
+async def _load(client) -> None:
+    """从 Redis 加载全部未过期的吊销记录"""
+    async for redis_key in client.scan_iter(match=_REDIS_PREFIX + "*", count=1000):
+        value = await client.get(redis_key)
+        if value:
+            _apply(redis_key[len(_REDIS_PREFIX):], value)
+
+
+async def sync_revocations() -> None:
+    """后台任务：启动时加载吊销记录，之后订阅其他 worker 的吊销通知"""
+    client = get_async_redis()
+    if client is None:
+        return
+
+    while True:
+        try:
+            pubsub = client.pubsub()
+            await pubsub.subscribe(REVOCATION_CHANNEL)
+            # 先订阅再加载，避免错过加载期间的新记录
+            await _load(client)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    key, value = message["data"].split("|", 1)
+                    _apply(key, value)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 连接中断期间可能错过通知，重连后重新加载（本地记录保留，宁可多拒）
+            logger.warning(f"令牌吊销订阅中断: {e}")
+            await asyncio.sleep(1.0)
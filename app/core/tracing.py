@@ -0,0 +1,346 @@
+"""
+请求链路追踪
+
+轻量实现（不依赖 OpenTelemetry SDK）：每个 HTTP/WebSocket 请求一个 trace，trace id 经 contextvars
+在路由、依赖、服务层与线程池间传递；SQL 语句、提交、LLM 调用、TOS 与 ASR 等外部调用记录为子 span。
+- 头部采样：请求开始时按 TRACING_SAMPLE_RATE 决定是否记录，未采样的请求只分配 trace id，span 均为空操作
+- 请求头带 W3C traceparent 时沿用其 trace id 与父 span；其采样标记仅在 TRACING_TRUST_PARENT_SAMPLED
+  开启（上游可信）时沿用，否则仍按本地采样率决定；响应头 X-Trace-Id 返回 trace id
+- 结束的 span 进入有界队列，由后台任务批量导出为 JSON Lines 文件或 OTLP/HTTP（JSON 编码）；队列满时丢弃新 span
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import settings
+from app.core.http_client import get_http_client
+from app.core.metrics import Counter
+
+
+logger = logging.getLogger(__name__)
+
+TRACING_SPANS = Counter(
+    "tracing_spans_total", "记录的 span 数", ["result"]
+)
+
+# OTLP SpanKind
+_OTLP_KINDS = {"internal": 1, "server": 2, "client": 3}
+# db.statement 属性的最大长度
+_MAX_STATEMENT_LENGTH = 2000
+
+
+class Span:
+    """已采样 trace 中的一个 span"""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind",
+        "start_ns", "end_ns", "attributes", "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        kind: str = "internal",
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes) if attributes else {}
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException) -> None:
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        """结束 span 并放入导出队列（重复调用无效）"""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if len(_pending) >= settings.TRACING_MAX_QUEUE:
+            TRACING_SPANS.inc(result="dropped")
+            return
+        _pending.append(self)
+        TRACING_SPANS.inc(result="recorded")
+
+    def to_dict(self) -> dict:
+        """JSON Lines 导出格式"""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def to_otlp(self) -> dict:
+        """OTLP/HTTP JSON 编码的 span"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": _OTLP_KINDS.get(self.kind, 1),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 0},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """未采样或不在请求内时使用的空 span"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+AnySpan = Union[Span, _NoopSpan]
+
+_pending: deque = deque()
+_current_span: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+_current_trace_id: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+
+
+def _otlp_attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def current_trace_id() -> Optional[str]:
+    """当前请求的 trace id（未采样的请求同样有），不在请求内时返回None"""
+    return _current_trace_id.get()
+
+
+def current_span() -> Optional[Span]:
+    """当前 span，未采样或不在请求内时返回None"""
+    return _current_span.get()
+
+
+def begin_span(
+    name: str,
+    kind: str = "internal",
+    attributes: Optional[Dict[str, Any]] = None,
+    parent: Optional[Span] = None
+) -> AnySpan:
+    """
+    开始一个子 span（不设为当前 span，由调用方调用 end()），适用于 SQLAlchemy 事件等成对回调
+
+    Args:
+        name: span 名称
+        kind: internal / server / client
+        attributes: 属性
+        parent: 父 span，默认为当前 span
+
+    Returns:
+        AnySpan: 新 span；没有已采样的父 span 时为空 span
+    """
+    parent = parent or _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+
+@contextmanager
+def start_span(
+    name: str,
+    kind: str = "internal",
+    attributes: Optional[Dict[str, Any]] = None,
+    parent: Optional[Span] = None
+) -> Iterator[AnySpan]:
+    """
+    在上下文内开始子 span 并设为当前 span，异常记录到 span 后继续抛出
+
+    Args:
+        name: span 名称
+        kind: internal / server / client
+        attributes: 属性
+        parent: 父 span，默认为当前 span（后台任务中可显式传入发起请求的 span）
+
+    Yields:
+        AnySpan: 新 span；没有已采样的父 span 时为空 span
+    """
+    span = begin_span(name, kind, attributes, parent)
+    if span is NOOP_SPAN:
+        yield span
+        return
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+def truncate_statement(statement: str) -> str:
+    """截断 SQL 语句（只记录语句文本，不记录参数）"""
+    return statement if len(statement) <= _MAX_STATEMENT_LENGTH else statement[:_MAX_STATEMENT_LENGTH] + "..."
+
+
+def _parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """解析 W3C traceparent：返回 (trace id, 父 span id, 是否采样)，格式无效时返回None"""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1] + parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1].lower(), parts[2].lower(), bool(flags & 1)
+
+
+class TracingMiddleware:
+    """ASGI 中间件：为每个 HTTP/WebSocket 请求建立 trace 与根 span"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        parent = _parse_traceparent(Headers(scope=scope).get("traceparent"))
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+            if not settings.TRACING_TRUST_PARENT_SAMPLED:
+                sampled = random.random() < settings.TRACING_SAMPLE_RATE
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+            sampled = random.random() < settings.TRACING_SAMPLE_RATE
+
+        span = None
+        if sampled:
+            span = Span(scope["path"], trace_id, parent_id, "server", {
+                "http.method": scope.get("method", "GET"),
+                "http.target": scope["path"],
+            })
+        trace_token = _current_trace_id.set(trace_id)
+        span_token = _current_span.set(span)
+        status_code = 500
+
+        async def _send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Trace-Id"] = trace_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        except BaseException as e:
+            if span is not None:
+                span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(span_token)
+            _current_trace_id.reset(trace_token)
+            if span is not None:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.name = f"{scope.get('method', 'WS')} {route}"
+                    span.set_attribute("http.route", route)
+                if scope["type"] == "http":
+                    span.set_attribute("http.status_code", status_code)
+                span.end()
+
+
+def _drain(limit: int) -> List[Span]:
+    spans = []
+    while _pending and len(spans) < limit:
+        spans.append(_pending.popleft())
+    return spans
+
+
+def _write_jsonl(spans: List[Span]) -> None:
+    directory = os.path.dirname(settings.TRACING_JSONL_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(settings.TRACING_JSONL_PATH, "a", encoding="utf-8") as f:
+        for span in spans:
+            f.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+
+def _otlp_payload(spans: List[Span]) -> dict:
+    return {"resourceSpans": [{
+        "resource": {"attributes": [
+            _otlp_attribute("service.name", settings.APP_NAME),
+            _otlp_attribute("service.version", settings.APP_VERSION),
+        ]},
+        "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": [s.to_otlp() for s in spans]}],
+    }]}
+
+
+async def export_spans() -> None:
+    """导出队列中已结束的 span（按 TRACING_EXPORT_BATCH_SIZE 分批），导出失败时丢弃该批"""
+    while _pending:
+        spans = _drain(settings.TRACING_EXPORT_BATCH_SIZE)
+        try:
+            if settings.TRACING_EXPORTER == "otlp":
+                resp = await get_http_client().post(settings.TRACING_OTLP_ENDPOINT, json=_otlp_payload(spans))
+                resp.raise_for_status()
+            else:
+                await asyncio.to_thread(_write_jsonl, spans)
+            TRACING_SPANS.inc(len(spans), result="exported")
+        except Exception as e:
+            TRACING_SPANS.inc(len(spans), result="export_failed")
+            logger.warning(f"链路追踪导出失败（{len(spans)} 个 span）: {e}")
+
+
+async def export_spans_periodically() -> None:
+    """后台任务：每 TRACING_EXPORT_INTERVAL 秒导出一次"""
+    while True:
+        await asyncio.sleep(settings.TRACING_EXPORT_INTERVAL)
+        await export_spans()
@@ -0,0 +1,102 @@
+"""
+已认证用户缓存
+
+get_current_user 每个请求都需要确认用户存在且已激活，
+这里按用户ID缓存权限校验所需的最少字段，避免每次请求都查询用户表。
+启用 Redis 时通过发布/订阅通知其他 worker 同步失效。
+"""
+from typing import Optional
+import asyncio
+import logging
+
+from app.config import settings
+from app.core.cache import TTLCache
+from app.core.redis import get_redis, get_async_redis
+
+
+logger = logging.getLogger(__name__)
+
+# 跨 worker 失效通知频道
+INVALIDATION_CHANNEL = "user_principal:invalidate"
+
+
+class UserPrincipal:
+    """已认证用户的轻量标识（仅含权限校验所需字段）"""
+
+    __slots__ = ("id", "is_active")
+
+    def __init__(self, id: int, is_active: bool):
+        self.id = id
+        self.is_active = is_active
+
+    def __repr__(self):
+        return f"<UserPrincipal(id={self.id}, is_active={self.is_active})>"
+
+
+_principals = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS
+)
+
+
+def get_cached_principal(user_id: int) -> Optional[UserPrincipal]:
+    """
+    获取缓存的用户标识
+
+    Args:
+        user_id: 用户ID
+
+    Returns:
+        Optional[UserPrincipal]: 未命中时返回None
+    """
+    return _principals.get(user_id)
+
+
+def cache_principal(principal: UserPrincipal) -> None:
+    """
+    缓存用户标识
+
+    Args:
+        principal: 用户标识
+    """
+    _principals.set(principal.id, principal)
+
+
+def invalidate_user(user_id: int) -> None:
+    """
+    使用户缓存失效（用户信息变更、禁用或删除后调用）
+
+    Args:
+        user_id: 用户ID
+    """
+    _principals.delete(user_id)
+
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.publish(INVALIDATION_CHANNEL, str(user_id))
+    except Exception as e:
+        logger.warning(f"用户缓存失效通知发送失败: {e}")
+
+
+async def listen_invalidations() -> None:
+    """后台任务：订阅其他 worker 发出的失效通知"""
+    client = get_async_redis()
+    if client is None:
+        return
+
+    while True:
+        try:
+            pubsub = client.pubsub()
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    _principals.delete(int(message["data"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 连接中断期间可能错过通知，清空本地缓存后重连
+            logger.warning(f"用户缓存失效订阅中断: {e}")
+            _principals.clear()
+            await asyncio.sleep(1.0)
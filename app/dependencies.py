@@ -7,34 +7,36 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.config import settings
+from app.core.database import get_db, bind_session_user
 from app.core.security import decode_token
+from app.core.tracing import start_span
+from app.core.user_cache import UserPrincipal, get_cached_principal, cache_principal
 from app.models.user import User
+from app.models.interview import Interview
+from app.models.question import Question
+from app.models.answer import Answer
+from app.models.evaluation import Evaluation
 
 
 # HTTP Bearer认证方案
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+def authenticate_token(db: Session, token: str) -> UserPrincipal:
     """
-    获取当前登录用户
+    校验访问令牌并解析当前用户
     
     Args:
-        credentials: JWT认证凭据
         db: 数据库会话
+        token: JWT访问令牌
         
     Returns:
-        User: 当前用户对象
+        UserPrincipal: 当前用户标识
         
     Raises:
-        HTTPException: 认证失败时抛出401错误
+        HTTPException: 认证失败时抛出401错误，用户被禁用时抛出403错误
     """
-    token = credentials.credentials
-    
     # 解码token
     payload = decode_token(token)
     if payload is None:
@@ -53,8 +55,20 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # 查询用户
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    # 关联会话与用户（近期有写入时读主库）
+    bind_session_user(db, int(user_id))
+
+    # 优先使用缓存，未命中时只查询校验所需字段
+    user = get_cached_principal(int(user_id))
+    if user is None:
+        row = db.query(User.id, User.is_active).filter(User.id == int(user_id)).first()
+        if row is None and not db.info.get("use_primary"):
+            # 副本可能尚未同步新注册的用户，回退主库确认
+            db.info["use_primary"] = True
+            row = db.query(User.id, User.is_active).filter(User.id == int(user_id)).first()
+        if row is not None:
+            user = UserPrincipal(id=row.id, is_active=row.is_active)
+            cache_principal(user)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -72,9 +86,35 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> UserPrincipal:
+    """
+    获取当前登录用户
+    
+    仅返回权限校验所需的用户标识（id/is_active），并按用户ID缓存；
+    需要完整用户对象的路由请使用 get_current_user_model。
+    
+    Args:
+        credentials: JWT认证凭据
+        db: 数据库会话
+        
+    Returns:
+        UserPrincipal: 当前用户标识
+        
+    Raises:
+        HTTPException: 认证失败时抛出401错误
+    """
+    with start_span("auth.authenticate") as span:
+        user = authenticate_token(db, credentials.credentials)
+        span.set_attribute("enduser.id", user.id)
+    return user
+
+
 def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user)
+) -> UserPrincipal:
     """
     获取当前活跃用户（已废弃，使用get_current_user即可）
     
@@ -82,11 +122,175 @@ def get_current_active_user(
         current_user: 当前用户
         
     Returns:
-        User: 当前活跃用户
+        UserPrincipal: 当前活跃用户
+    """
+    return current_user
+
+
+def get_current_user_model(
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    获取当前用户的完整ORM对象（按需加载）
+    
+    Args:
+        current_user: 当前用户标识
+        db: 数据库会话
+        
+    Returns:
+        User: 当前用户对象
+    
+    Raises:
+        HTTPException: 用户已不存在时抛出401错误
+    """
+    user = db.get(User, current_user.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="用户不存在",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+def get_current_admin(
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> UserPrincipal:
+    """
+    获取当前管理员（用户名在 ADMIN_USERNAMES 中）
+
+    Args:
+        current_user: 当前用户标识
+        db: 数据库会话
+
+    Returns:
+        UserPrincipal: 当前管理员标识
+
+    Raises:
+        HTTPException: 非管理员时403
     """
+    admins = settings.admin_usernames
+    username = db.query(User.username).filter(User.id == current_user.id).scalar() if admins else None
+    if username is None or username not in admins:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="需要管理员权限"
+        )
     return current_user
 
 
+def _ensure_owner(owner_id: Optional[int], current_user: UserPrincipal, not_found: str, forbidden: str) -> None:
+    """根据归属用户ID抛出404/403"""
+    if owner_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=not_found
+        )
+    if owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=forbidden
+        )
+
+
+def resolve_owned_interview(db: Session, current_user: UserPrincipal, interview_id: int) -> Interview:
+    """
+    获取属于当前用户的面试记录
+
+    使用 db.get，同一会话内后续按ID获取同一面试（如服务层的
+    get_interview_by_id）直接命中身份映射，不再查询数据库。
+
+    Raises:
+        HTTPException: 不存在时404，不属于当前用户时403
+    """
+    interview = db.get(Interview, interview_id)
+    _ensure_owner(
+        interview.user_id if interview else None, current_user,
+        "面试记录不存在", "无权访问此面试记录"
+    )
+    return interview
+
+
+def resolve_owned_question(db: Session, current_user: UserPrincipal, question_id: int) -> Question:
+    """
+    获取属于当前用户的问题（问题与归属用户一次联表查询）
+
+    Raises:
+        HTTPException: 不存在时404，不属于当前用户时403
+    """
+    row = db.query(Question, Interview.user_id).join(
+        Interview, Interview.id == Question.interview_id
+    ).filter(Question.id == question_id).first()
+    _ensure_owner(row[1] if row else None, current_user, "问题不存在", "无权访问此问题")
+    return row[0]
+
+
+def resolve_owned_answer(db: Session, current_user: UserPrincipal, answer_id: int) -> Answer:
+    """
+    获取属于当前用户的回答（回答→问题→面试一次联表查询）
 
+    Raises:
+        HTTPException: 不存在时404，不属于当前用户时403
+    """
+    row = db.query(Answer, Interview.user_id).join(
+        Question, Question.id == Answer.question_id
+    ).join(
+        Interview, Interview.id == Question.interview_id
+    ).filter(Answer.id == answer_id).first()
+    _ensure_owner(row[1] if row else None, current_user, "答案不存在", "无权访问此答案")
+    return row[0]
 
 
+def resolve_owned_evaluation(db: Session, current_user: UserPrincipal, evaluation_id: int) -> Evaluation:
+    """
+    获取属于当前用户的评价（评价与归属用户一次联表查询）
+
+    Raises:
+        HTTPException: 不存在时404，不属于当前用户时403
+    """
+    row = db.query(Evaluation, Interview.user_id).join(
+        Interview, Interview.id == Evaluation.interview_id
+    ).filter(Evaluation.id == evaluation_id).first()
+    _ensure_owner(row[1] if row else None, current_user, "评价不存在", "无权访问此评价")
+    return row[0]
+
+
+# 以下依赖按路径参数解析资源并校验归属。
+# FastAPI 在同一请求内缓存依赖结果，同一处理函数多次依赖只会查询一次。
+
+def get_owned_interview(
+    interview_id: int,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> Interview:
+    """依赖：路径中的面试记录（需属于当前用户）"""
+    return resolve_owned_interview(db, current_user, interview_id)
+
+
+def get_owned_question(
+    question_id: int,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> Question:
+    """依赖：路径中的问题（需属于当前用户）"""
+    return resolve_owned_question(db, current_user, question_id)
+
+
+def get_owned_answer(
+    answer_id: int,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> Answer:
+    """依赖：路径中的回答（需属于当前用户）"""
+    return resolve_owned_answer(db, current_user, answer_id)
+
+
+def get_owned_evaluation(
+    evaluation_id: int,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> Evaluation:
+    """依赖：路径中的评价（需属于当前用户）"""
+    return resolve_owned_evaluation(db, current_user, evaluation_id)
@@ -3,11 +3,28 @@ FastAPI主应用
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+import asyncio
 import logging
 
 from app.config import settings
-from app.core.database import init_db
+from app.core.database import init_db, replicas, monitor_replica_lag
+from app.core.metrics import snapshot as metrics_snapshot
+from app.core.request_context import RequestContextMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.http_metrics import (
+    HttpMetricsMiddleware, PROMETHEUS_CONTENT_TYPE, flush_metrics, flush_metrics_periodically, render_metrics
+)
+from app.core.responses import DefaultJSONResponse
+from app.core.tracing import TracingMiddleware, export_spans, export_spans_periodically
+from app.core.user_cache import listen_invalidations
+from app.core.token_revocation import sync_revocations
+from app.core.http_client import close_http_client
+from app.services.asr_service import poll_scheduler
+from app.services.availability_service import listen_availability, warm_availability_index
+from app.services import storage_service
+from app.services.audio_service import shutdown_audio_pool
+from app.services.provisioning_service import shutdown_provision_pool
 
 # 配置日志
 logging.basicConfig(
@@ -22,9 +39,13 @@ app = FastAPI(
     version=settings.APP_VERSION,
     docs_url=settings.DOCS_URL,
     redoc_url=settings.REDOC_URL,
-    description="AI模拟面试平台后端API"
+    description="AI模拟面试平台后端API",
+    default_response_class=DefaultJSONResponse
 )
 
+# 中间件：后添加的包在先添加的外层，请求由外到内依次为
+# 链路追踪 → HTTP 请求指标 → 响应压缩 → 请求上下文 → CORS
+
 # 配置CORS
 app.add_middleware(
     CORSMiddleware,
@@ -34,6 +55,21 @@ app.add_middleware(
     allow_headers=settings.ALLOWED_HEADERS,
 )
 
+# 请求上下文（路由模板等，供连接池指标使用）
+app.add_middleware(RequestContextMiddleware)
+
+# 响应压缩（包在 CORS 与请求上下文之外，压缩最终响应体）
+if settings.RESPONSE_COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# HTTP 请求指标（包在压缩之外，耗时包含压缩）
+if settings.METRICS_ENABLED:
+    app.add_middleware(HttpMetricsMiddleware)
+
+# 链路追踪（最外层，根 span 覆盖整个请求，包括指标与压缩）
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -46,11 +82,48 @@ async def startup_event():
     except Exception as e:
         logger.error(f"数据库初始化失败: {e}")
 
+    if replicas:
+        logger.info(f"启用读写分离，只读副本数: {len(replicas.engines)}")
+        app.state.replica_monitor = asyncio.create_task(monitor_replica_lag())
+
+    # 用户名/邮箱可用性索引在后台预热，完成前注册判重走数据库
+    app.state.availability_warmup = asyncio.create_task(warm_availability_index())
+
+    if settings.REDIS_ENABLED:
+        app.state.user_cache_listener = asyncio.create_task(listen_invalidations())
+        app.state.revocation_listener = asyncio.create_task(sync_revocations())
+        app.state.availability_listener = asyncio.create_task(listen_availability())
+
+    if storage_service.is_configured():
+        storage_service.init_storage()
+
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROC_DIR:
+        app.state.metrics_flusher = asyncio.create_task(flush_metrics_periodically())
+
+    if settings.TRACING_ENABLED:
+        app.state.trace_exporter = asyncio.create_task(export_spans_periodically())
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """应用关闭事件"""
     logger.info(f"关闭 {settings.APP_NAME}")
+    for name in (
+        "replica_monitor", "user_cache_listener", "revocation_listener",
+        "availability_warmup", "availability_listener", "metrics_flusher", "trace_exporter",
+    ):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+    if settings.TRACING_ENABLED:
+        await export_spans()
+    if settings.METRICS_ENABLED:
+        # 最后一次快照：退出后其计数仍计入合并结果
+        flush_metrics()
+    await poll_scheduler.stop()
+    await close_http_client()
+    shutdown_audio_pool()
+    shutdown_provision_pool()
 
 
 @app.get("/")
@@ -73,9 +146,32 @@ async def health_check():
     )
 
 
+@app.get("/health/db")
+async def db_pool_health():
+    """数据库连接池状态与指标"""
+    return {
+        "replica_lag": {f"replica{i}": lag for i, lag in replicas.lag.items()},
+        "metrics": metrics_snapshot("db_"),
+    }
+
+
+@app.get("/health/asr")
+async def asr_health():
+    """语音识别轮询指标"""
+    return {"metrics": metrics_snapshot("asr_")}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus 指标（多 worker 部署时合并所有 worker）"""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(content=await asyncio.to_thread(render_metrics), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 # 导入并注册路由
 from app.api.v1 import auth, interviews, questions, answers, evaluations
-from app.api.v1 import voice
+from app.api.v1 import voice, admin
 
 app.include_router(auth.router, prefix=f"{settings.API_V1_PREFIX}/auth", tags=["认证"])
 app.include_router(interviews.router, prefix=f"{settings.API_V1_PREFIX}/interviews", tags=["面试管理"])
@@ -83,6 +179,7 @@ app.include_router(questions.router, prefix=f"{settings.API_V1_PREFIX}/questions
 app.include_router(answers.router, prefix=f"{settings.API_V1_PREFIX}/answers", tags=["答案管理"])
 app.include_router(evaluations.router, prefix=f"{settings.API_V1_PREFIX}/evaluations", tags=["评价管理"])
 app.include_router(voice.router, prefix=f"{settings.API_V1_PREFIX}/voice", tags=["语音"])
+app.include_router(admin.router, prefix=f"{settings.API_V1_PREFIX}/admin", tags=["管理"])
 
 
 if __name__ == "__main__":
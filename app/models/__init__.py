@@ -5,6 +5,7 @@ from app.models.user import User
 from app.models.interview import Interview
 from app.models.question import Question
 from app.models.answer import Answer
+from app.models.answer_transcript import AnswerTranscript
 from app.models.evaluation import Evaluation
 from app.models.setting import Setting
 
@@ -13,6 +14,7 @@ __all__ = [
     "Interview",
     "Question",
     "Answer",
+    "AnswerTranscript",
     "Evaluation",
     "Setting"
 ]
@@ -30,6 +30,7 @@ class Answer(Base):
     
     # 关系
     question = relationship("Question", back_populates="answer")
+    transcript = relationship("AnswerTranscript", back_populates="answer", uselist=False, cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Answer(id={self.id}, question_id={self.question_id}, type='{self.answer_type}')>"
@@ -0,0 +1,27 @@
+"""
+回答转写模型
+"""
+from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class AnswerTranscript(Base):
+    """语音回答转写表（分句时间轴）"""
+    
+    __tablename__ = "answer_transcripts"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    answer_id = Column(Integer, ForeignKey("answers.id", ondelete="CASCADE"), nullable=False, index=True, unique=True)
+    language = Column(String(10), nullable=False, default="zh-CN")
+    # 紧凑分句列表：[[起始毫秒, 结束毫秒, 文本], ...]
+    utterances = Column(JSON, nullable=False)
+    created_at = Column(DateTime, server_default=func.current_timestamp())
+    
+    # 关系
+    answer = relationship("Answer", back_populates="transcript")
+    
+    def __repr__(self):
+        return f"<AnswerTranscript(id={self.id}, answer_id={self.answer_id})>"
@@ -11,7 +11,10 @@ from app.schemas.user import (
 from app.schemas.auth import (
     Token,
     TokenPayload,
-    LoginRequest
+    LoginRequest,
+    LogoutRequest,
+    ChangePasswordRequest,
+    AvailabilityResult
 )
 from app.schemas.interview import (
     InterviewBase,
@@ -28,7 +31,11 @@ from app.schemas.question import (
 from app.schemas.answer import (
     AnswerBase,
     AnswerCreate,
-    Answer
+    Answer,
+    AnswerBulkCreate,
+    AnswerBulkResult,
+    TranscriptUtterance,
+    VoiceAnswerResult
 )
 from app.schemas.evaluation import (
     EvaluationBase,
@@ -44,10 +51,12 @@ from app.schemas.setting import (
 
 __all__ = [
     "UserBase", "UserCreate", "UserUpdate", "UserInDB", "User",
-    "Token", "TokenPayload", "LoginRequest",
+    "Token", "TokenPayload", "LoginRequest", "LogoutRequest", "ChangePasswordRequest",
+    "AvailabilityResult",
     "InterviewBase", "InterviewCreate", "InterviewUpdate", "Interview", "InterviewWithDetails",
     "QuestionBase", "QuestionCreate", "Question",
-    "AnswerBase", "AnswerCreate", "Answer",
+    "AnswerBase", "AnswerCreate", "Answer", "AnswerBulkCreate", "AnswerBulkResult",
+    "TranscriptUtterance", "VoiceAnswerResult",
     "EvaluationBase", "EvaluationCreate", "Evaluation",
     "SettingBase", "SettingCreate", "SettingUpdate", "Setting"
 ]
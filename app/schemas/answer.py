@@ -2,7 +2,7 @@
 回答相关模式
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -36,6 +36,25 @@ class Answer(AnswerBase):
         from_attributes = True
 
 
+class AnswerBulkCreate(BaseModel):
+    """批量回答创建模式"""
+    answers: List[AnswerCreate] = Field(..., min_length=1, max_length=50)
 
 
+class AnswerBulkResult(BaseModel):
+    """批量回答提交结果"""
+    created: List[Answer]
+    skipped: List[int] = []  # 已有回答而被跳过的问题ID
 
+
+class TranscriptUtterance(BaseModel):
+    """语音回答分句"""
+    start_ms: Optional[int] = None
+    end_ms: Optional[int] = None
+    text: str
+
+
+class VoiceAnswerResult(BaseModel):
+    """语音回答提交结果"""
+    answer: Answer
+    utterances: List[TranscriptUtterance] = []
@@ -30,3 +30,20 @@ class RefreshTokenRequest(BaseModel):
     """刷新令牌请求模式"""
     refresh_token: str
 
+
+
+class LogoutRequest(BaseModel):
+    """登出请求模式（可同时吊销刷新令牌）"""
+    refresh_token: Optional[str] = None
+
+
+class ChangePasswordRequest(BaseModel):
+    """修改密码请求模式"""
+    old_password: str = Field(..., min_length=6)
+    new_password: str = Field(..., min_length=6)
+
+
+class AvailabilityResult(BaseModel):
+    """用户名/邮箱可用性结果（未查询的字段为None）"""
+    username: Optional[bool] = None
+    email: Optional[bool] = None
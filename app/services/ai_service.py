@@ -4,9 +4,13 @@ AI服务
 """
 from typing import List, Dict
 import json
+import time
 from openai import OpenAI
 
 from app.config import settings
+from app.core.database import outbound_call
+from app.core.metrics import Counter, Histogram
+from app.core.tracing import start_span
 from app.utils.ai_prompts import (
     get_question_generation_prompt,
     get_evaluation_prompt,
@@ -33,6 +37,49 @@ def _build_client() -> OpenAI | None:
 
 client = _build_client()
 
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds", "LLM 调用耗时", ["operation", "outcome"]
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "LLM 消耗的 token 数", ["operation", "kind"]
+)
+
+
+def _chat_completion(operation: str, **kwargs):
+    """
+    调用对话补全接口，记录耗时与 token 用量（指标与链路追踪 span 属性）
+
+    Args:
+        operation: 调用名称（如 generate_questions）
+        kwargs: chat.completions.create 的参数
+
+    Returns:
+        对话补全响应
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with outbound_call(f"llm.{operation}") as span:
+            span.set_attributes({
+                "llm.model": kwargs.get("model"),
+                "llm.max_tokens": kwargs.get("max_tokens"),
+                "llm.temperature": kwargs.get("temperature"),
+            })
+            response = client.chat.completions.create(**kwargs)
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                span.set_attributes({
+                    "llm.prompt_tokens": usage.prompt_tokens or 0,
+                    "llm.completion_tokens": usage.completion_tokens or 0,
+                })
+        outcome = "success"
+    finally:
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, operation=operation, outcome=outcome)
+    if usage is not None:
+        LLM_TOKENS.inc(usage.prompt_tokens or 0, operation=operation, kind="prompt")
+        LLM_TOKENS.inc(usage.completion_tokens or 0, operation=operation, kind="completion")
+    return response
+
 
 def generate_interview_questions(
     position: str,
@@ -63,18 +110,20 @@ def generate_interview_questions(
         raise Exception("AI服务未配置：请设置 OPENAI_API_KEY 或兼容端点")
     
     # 生成提示词
-    prompt = get_question_generation_prompt(
-        position=position,
-        description=description,
-        skills=skills,
-        difficulty=difficulty,
-        language=language,
-        num_questions=num_questions
-    )
+    with start_span("llm.build_prompt", attributes={"llm.operation": "generate_questions"}):
+        prompt = get_question_generation_prompt(
+            position=position,
+            description=description,
+            skills=skills,
+            difficulty=difficulty,
+            language=language,
+            num_questions=num_questions
+        )
     
     try:
         # 调用 OpenAI/兼容 API
-        response = client.chat.completions.create(
+        response = _chat_completion(
+            "generate_questions",
             model=settings.OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": "你是一位专业的面试官。"},
@@ -129,16 +178,18 @@ def evaluate_interview_answers(
         raise Exception("AI服务未配置：请设置 OPENAI_API_KEY 或兼容端点")
     
     # 生成提示词
-    prompt = get_evaluation_prompt(
-        position=position,
-        questions=questions,
-        answers=answers,
-        language=language
-    )
+    with start_span("llm.build_prompt", attributes={"llm.operation": "evaluate_answers"}):
+        prompt = get_evaluation_prompt(
+            position=position,
+            questions=questions,
+            answers=answers,
+            language=language
+        )
     
     try:
         # 调用 OpenAI/兼容 API
-        response = client.chat.completions.create(
+        response = _chat_completion(
+            "evaluate_answers",
             model=settings.OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": "你是一位资深的HR和技术专家。"},
@@ -202,15 +253,17 @@ def analyze_single_answer(
         raise Exception("AI服务未配置：请设置 OPENAI_API_KEY 或兼容端点")
     
     # 生成提示词
-    prompt = get_answer_analysis_prompt(
-        question=question,
-        answer=answer,
-        language=language
-    )
+    with start_span("llm.build_prompt", attributes={"llm.operation": "analyze_answer"}):
+        prompt = get_answer_analysis_prompt(
+            question=question,
+            answer=answer,
+            language=language
+        )
     
     try:
         # 调用 OpenAI/兼容 API
-        response = client.chat.completions.create(
+        response = _chat_completion(
+            "analyze_answer",
             model=settings.OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": "你是一位面试评估专家。"},
@@ -0,0 +1,150 @@
+"""
+回答服务
+处理回答相关的业务逻辑
+"""
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+
+from app.core.database import insert_ignore_conflicts
+from app.models.interview import Interview
+from app.models.question import Question
+from app.models.answer import Answer, AnswerTypeEnum
+from app.models.answer_transcript import AnswerTranscript
+from app.schemas.answer import AnswerCreate
+
+
+def get_owned_question_states(db: Session, user_id: int, question_ids: List[int]) -> Dict[int, bool]:
+    """
+    一次查询校验问题归属并返回各问题是否已有回答
+
+    Args:
+        db: 数据库会话
+        user_id: 用户ID
+        question_ids: 问题ID列表
+
+    Returns:
+        Dict[int, bool]: 属于该用户的问题ID -> 是否已有回答；
+        不存在或不属于该用户的问题不会出现在结果中
+    """
+    if not question_ids:
+        return {}
+
+    rows = db.query(Question.id, Answer.id).join(
+        Interview, Interview.id == Question.interview_id
+    ).outerjoin(
+        Answer, Answer.question_id == Question.id
+    ).filter(
+        Question.id.in_(question_ids),
+        Interview.user_id == user_id
+    ).all()
+
+    return {question_id: answer_id is not None for question_id, answer_id in rows}
+
+
+def create_answer(db: Session, answer_create: AnswerCreate) -> Optional[Answer]:
+    """
+    创建回答
+
+    依赖 question_id 唯一约束判断是否已回答，避免先查后插的竞态。
+
+    Args:
+        db: 数据库会话
+        answer_create: 回答创建数据（调用方需已完成权限校验）
+
+    Returns:
+        Optional[Answer]: 创建的回答，问题已有回答时返回None
+    """
+    db_answer = Answer(
+        question_id=answer_create.question_id,
+        answer_text=answer_create.answer_text,
+        answer_type=AnswerTypeEnum(answer_create.answer_type.value),
+        audio_url=answer_create.audio_url,
+        duration=answer_create.duration
+    )
+    db.add(db_answer)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+    db.refresh(db_answer)
+    return db_answer
+
+
+def create_voice_answer(
+    db: Session,
+    question_id: int,
+    answer_text: str,
+    audio_key: str,
+    duration: Optional[int],
+    language: str,
+    utterances: List[list]
+) -> Optional[Answer]:
+    """
+    创建语音回答及其分句转写（同一事务提交）
+
+    Args:
+        db: 数据库会话
+        question_id: 问题ID（调用方需已完成权限校验）
+        answer_text: 识别文本
+        audio_key: 音频对象键
+        duration: 回答时长（秒）
+        language: 识别语言
+        utterances: 紧凑分句列表 [[起始毫秒, 结束毫秒, 文本], ...]
+
+    Returns:
+        Optional[Answer]: 创建的回答，问题已有回答时返回None
+    """
+    db_answer = Answer(
+        question_id=question_id,
+        answer_text=answer_text,
+        answer_type=AnswerTypeEnum.VOICE,
+        audio_url=audio_key,
+        duration=duration
+    )
+    db_answer.transcript = AnswerTranscript(language=language, utterances=utterances)
+    db.add(db_answer)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+    db.refresh(db_answer)
+    return db_answer
+
+
+def create_answers_bulk(db: Session, answers_create: List[AnswerCreate]) -> List[Answer]:
+    """
+    批量创建回答
+
+    使用单条多行INSERT写入，已有回答的问题在数据库层面被忽略。
+
+    Args:
+        db: 数据库会话
+        answers_create: 回答创建数据列表（调用方需已完成权限校验）
+
+    Returns:
+        List[Answer]: 本次实际写入的回答（并发下已被其他请求回答的问题不包含在内）
+    """
+    if not answers_create:
+        return []
+
+    rows = [
+        {
+            "question_id": a.question_id,
+            "answer_text": a.answer_text,
+            "answer_type": AnswerTypeEnum(a.answer_type.value),
+            "audio_url": a.audio_url,
+            "duration": a.duration,
+        }
+        for a in answers_create
+    ]
+    inserted_ids = insert_ignore_conflicts(db, Answer, rows, ["question_id"])
+    db.commit()
+
+    if not inserted_ids:
+        return []
+    return db.query(Answer).filter(
+        Answer.id.in_(inserted_ids)
+    ).order_by(Answer.id).all()
@@ -0,0 +1,708 @@
+"""
+语音识别服务
+火山引擎录音文件识别（AUC）的请求构造、结果解析、集中轮询，以及上传音频的识别流程
+"""
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+
+from fastapi import HTTPException, UploadFile
+
+from app.config import settings
+from app.core.database import outbound_call
+from app.core.http_client import get_http_client
+from app.core.metrics import Histogram
+from app.core.tracing import Span, current_span, start_span
+from app.services.audio_service import (
+    AudioInfo, AudioSegment, AUDIO_BYTES, default_audio_info, split_audio
+)
+from app.services.storage_service import (
+    get_tos_client, presign_url, content_type_for, upload_stream, read_upload, put_bytes, head_etag,
+    get_bytes
+)
+from app.services.transcript_cache import transcript_cache, cache_key
+
+
+logger = logging.getLogger(__name__)
+
+ASR_POLLS_PER_TRANSCRIPT = Histogram(
+    "asr_polls_per_transcript", "每次识别的查询次数", ["outcome"],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34)
+)
+ASR_TIME_TO_TRANSCRIPT = Histogram(
+    "asr_time_to_transcript_seconds", "提交识别到拿到结果的耗时", ["outcome"]
+)
+ASR_TRANSCRIBE_SECONDS = Histogram(
+    "asr_transcribe_seconds", "上传音频到返回识别结果的端到端耗时", ["normalized"]
+)
+
+# 各格式的大致码率（字节/秒），用于按音频大小估算时长
+_BYTES_PER_SECOND = {
+    "wav": 32000,   # 16kHz 16bit 单声道
+    "pcm": 32000,
+    "mp3": 16000,   # 128kbps
+    "webm": 4000,   # opus 约 32kbps
+    "ogg": 4000,
+    "opus": 4000,
+}
+
+
+def estimate_duration(size: int, fmt: str) -> float:
+    """
+    根据音频字节数估算时长
+
+    Args:
+        size: 音频字节数
+        fmt: 音频格式
+
+    Returns:
+        float: 估算时长（秒）
+    """
+    return size / _BYTES_PER_SECOND.get((fmt or "").lower(), 4000)
+
+
+def auc_headers(request_id: str, submit: bool = False) -> Dict[str, str]:
+    """
+    构造 AUC 请求头
+
+    Args:
+        request_id: 识别任务ID
+        submit: 是否为提交请求
+
+    Returns:
+        Dict[str, str]: 请求头
+    """
+    headers = {
+        "Content-Type": "application/json",
+        "X-Api-App-Key": settings.VOLC_ASR_APP_ID,
+        "X-Api-Access-Key": settings.VOLC_ASR_TOKEN,
+        "X-Api-Resource-Id": "volc.bigasr.auc",
+        "X-Api-Request-Id": request_id,
+    }
+    if submit:
+        headers["X-Api-Sequence"] = "-1"
+    return headers
+
+
+def auc_query_endpoint() -> str:
+    """查询端点：优先读取配置，其次将 submit 端点替换为 query"""
+    if settings.VOLC_ASR_QUERY_ENDPOINT:
+        return settings.VOLC_ASR_QUERY_ENDPOINT
+    se = settings.VOLC_ASR_ENDPOINT.rstrip('/')
+    if se.endswith('/submit'):
+        return se[:-len('/submit')] + '/query'
+    return se + '/query'
+
+
+def parse_auc_text(data: Any) -> Optional[str]:
+    """
+    解析识别文本：兼容 result 为对象或数组
+
+    Args:
+        data: query 接口返回的 JSON
+
+    Returns:
+        Optional[str]: 识别文本，尚未完成时返回None
+    """
+    try:
+        result_obj = data.get("result")
+        if isinstance(result_obj, dict):
+            text = result_obj.get("text")
+            if not text:
+                utterances = result_obj.get("utterances") or []
+                if isinstance(utterances, list) and utterances:
+                    text = "".join([u.get("text", "") for u in utterances if isinstance(u, dict)])
+            return text or None
+        if isinstance(result_obj, list) and result_obj:
+            first = result_obj[0]
+            if isinstance(first, dict):
+                return first.get("text") or "".join([d.get("text", "") for d in result_obj if isinstance(d, dict)]) or None
+    except Exception:
+        return None
+    return None
+
+
+def parse_auc_utterances(data: Any) -> List[dict]:
+    """
+    解析分句结果（含 start_time/end_time，单位毫秒）
+
+    Args:
+        data: query 接口返回的 JSON
+
+    Returns:
+        List[dict]: 分句列表，无分句时为空
+    """
+    result_obj = data.get("result") if isinstance(data, dict) else None
+    if isinstance(result_obj, list) and result_obj:
+        result_obj = result_obj[0]
+    if not isinstance(result_obj, dict):
+        return []
+    utterances = result_obj.get("utterances") or []
+    return [u for u in utterances if isinstance(u, dict)] if isinstance(utterances, list) else []
+
+
+def compact_utterances(utterances: List[dict]) -> List[list]:
+    """
+    压缩分句为 [起始毫秒, 结束毫秒, 文本]，丢弃逐词信息等冗余字段
+
+    Args:
+        utterances: AUC 分句列表
+
+    Returns:
+        List[list]: 紧凑分句列表
+    """
+    return [
+        [u.get("start_time"), u.get("end_time"), u.get("text", "")]
+        for u in utterances if u.get("text")
+    ]
+
+
+def _shift_times(item: dict, offset_ms: int) -> dict:
+    shifted = dict(item)
+    for name in ("start_time", "end_time"):
+        if isinstance(shifted.get(name), (int, float)):
+            shifted[name] += offset_ms
+    if isinstance(shifted.get("words"), list):
+        shifted["words"] = [_shift_times(w, offset_ms) for w in shifted["words"] if isinstance(w, dict)]
+    return shifted
+
+
+def stitch_results(
+    results: List[Dict[str, Any]],
+    offsets_ms: List[int],
+    separator: str = ""
+) -> Tuple[Optional[str], List[dict]]:
+    """
+    按顺序拼接各段识别结果，分句时间戳加上所在段的偏移
+
+    Args:
+        results: 各段识别结果（wait_for 的返回值）
+        offsets_ms: 各段在原录音中的起始偏移（毫秒）
+        separator: 段间文本分隔符
+
+    Returns:
+        Tuple[Optional[str], List[dict]]: 全文（全部失败时为None）与分句列表
+    """
+    texts, utterances = [], []
+    for result, offset_ms in zip(results, offsets_ms):
+        if not result.get("text"):
+            continue
+        texts.append(result["text"])
+        utterances.extend(_shift_times(u, offset_ms) for u in parse_auc_utterances(result.get("raw")))
+    return (separator.join(texts) or None), utterances
+
+
+class _PollJob:
+    """一个等待结果的识别任务"""
+
+    __slots__ = (
+        "request_id", "endpoint", "future", "next_at", "deadline",
+        "started", "interval", "polls", "last_data", "last_raw_text", "trace_parent", "in_flight",
+    )
+
+    def __init__(self, request_id: str, endpoint: str, future: asyncio.Future, first_delay: float):
+        now = time.monotonic()
+        # 轮询在调度器任务中执行，查询 span 挂在发起等待的请求 span 下
+        self.trace_parent: Optional[Span] = current_span()
+        self.request_id = request_id
+        self.endpoint = endpoint
+        self.future = future
+        self.started = now
+        self.next_at = now + first_delay
+        self.deadline = now + settings.ASR_POLL_TIMEOUT_SECONDS
+        self.interval = settings.ASR_POLL_INITIAL_INTERVAL
+        self.polls = 0
+        self.last_data: Any = None
+        self.last_raw_text: Optional[str] = None
+        # 已派发查询、尚未完成（含等待并发名额）
+        self.in_flight = False
+
+
+class AsrPollScheduler:
+    """
+    AUC 结果集中轮询器
+
+    所有进行中的识别任务由同一个循环统一调度：首次查询按音频时长延后，
+    之后按指数退避拉长间隔，到达截止时间仍无结果时返回 text=None。
+    每次查询是独立的任务（并发数受 ASR_POLL_CONCURRENCY 限制），
+    单个慢查询不会阻塞其他任务的查询，循环也无需等待上一批查询结束。
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, _PollJob] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._polls: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """启动轮询循环（需在事件循环内调用）"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._slots = asyncio.Semaphore(settings.ASR_POLL_CONCURRENCY)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止轮询循环，未完成的任务以超时结果返回"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._polls):
+            task.cancel()
+        if self._polls:
+            await asyncio.gather(*self._polls, return_exceptions=True)
+        for job in list(self._jobs.values()):
+            self._finish(job, None)
+
+    async def wait_for(self, request_id: str, audio_duration: Optional[float] = None) -> Dict[str, Any]:
+        """
+        等待已提交任务的识别结果
+
+        Args:
+            request_id: 识别任务ID（提交时的 X-Api-Request-Id）
+            audio_duration: 音频时长（秒），用于推迟首次查询
+
+        Returns:
+            Dict[str, Any]: {"text": 识别文本或None, "raw": 最后一次返回JSON, "raw_text": 最后一次返回原文}
+        """
+        self.start()
+        first_delay = settings.ASR_POLL_INITIAL_INTERVAL
+        if audio_duration:
+            first_delay = min(
+                max(audio_duration * settings.ASR_POLL_FIRST_DELAY_RATIO, first_delay),
+                settings.ASR_POLL_MAX_FIRST_DELAY
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        job = _PollJob(request_id, auc_query_endpoint(), future, first_delay)
+        self._jobs[request_id] = job
+        self._wakeup.set()
+        try:
+            return await future
+        finally:
+            # 调用方取消（如客户端断开）时不再继续查询
+            self._jobs.pop(request_id, None)
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            waiting = [j for j in self._jobs.values() if not j.in_flight and not j.future.done()]
+            for job in waiting:
+                if job.next_at <= now:
+                    job.in_flight = True
+                    task = asyncio.create_task(self._dispatch(job))
+                    self._polls.add(task)
+                    task.add_done_callback(self._polls.discard)
+
+            # 等待下一个到期任务，或新任务加入 / 查询完成（重新计算下次查询时间）
+            pending = [j.next_at for j in waiting if not j.in_flight]
+            timeout = max(min(pending) - now, 0) if pending else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _dispatch(self, job: _PollJob) -> None:
+        try:
+            async with self._slots:
+                if not job.future.done():
+                    await self._poll(job)
+        finally:
+            job.in_flight = False
+            self._wakeup.set()
+
+    async def _poll(self, job: _PollJob) -> None:
+        job.polls += 1
+        try:
+            with start_span("asr.poll", "client", {
+                "asr.request_id": job.request_id, "asr.poll": job.polls
+            }, parent=job.trace_parent) as span:
+                resp = await get_http_client().post(
+                    job.endpoint,
+                    headers=auc_headers(job.request_id),
+                    content=b"{}",
+                    timeout=settings.ASR_POLL_REQUEST_TIMEOUT,
+                )
+                span.set_attribute("http.status_code", resp.status_code)
+            job.last_raw_text = resp.text
+            if resp.status_code == 200:
+                try:
+                    job.last_data = resp.json()
+                except Exception:
+                    job.last_data = {}
+                text = parse_auc_text(job.last_data)
+                if text:
+                    self._finish(job, text)
+                    return
+        except Exception as e:
+            # 查询失败按未就绪处理，等待下次重试
+            logger.warning(f"AUC 查询失败 request_id={job.request_id}: {e}")
+
+        now = time.monotonic()
+        if now >= job.deadline:
+            self._finish(job, None)
+            return
+        job.next_at = min(now + job.interval, job.deadline)
+        job.interval = min(job.interval * settings.ASR_POLL_BACKOFF, settings.ASR_POLL_MAX_INTERVAL)
+
+    def _finish(self, job: _PollJob, text: Optional[str]) -> None:
+        self._jobs.pop(job.request_id, None)
+        outcome = "ok" if text else "timeout"
+        ASR_POLLS_PER_TRANSCRIPT.observe(job.polls, outcome=outcome)
+        ASR_TIME_TO_TRANSCRIPT.observe(time.monotonic() - job.started, outcome=outcome)
+        if not job.future.done():
+            job.future.set_result({
+                "text": text,
+                "raw": job.last_data or {},
+                "raw_text": job.last_raw_text,
+            })
+
+
+poll_scheduler = AsrPollScheduler()
+
+
+class _UserLimiter:
+    """按用户限制同时进行的识别任务数（无任务的用户不占用内存）"""
+
+    def __init__(self):
+        self._slots: Dict[str, List[Any]] = {}
+
+    @asynccontextmanager
+    async def slot(self, user_id: str):
+        entry = self._slots.get(user_id)
+        if entry is None:
+            entry = self._slots[user_id] = [asyncio.Semaphore(settings.ASR_CHUNK_USER_CONCURRENCY), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._slots.pop(user_id, None)
+
+
+_user_limiter = _UserLimiter()
+
+
+async def submit_and_wait(
+    signed_url: str,
+    language: str,
+    audio_info: AudioInfo,
+    user_id: str,
+    duration: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    提交 AUC 识别任务并等待结果
+
+    Args:
+        signed_url: 音频的预签名下载链接
+        language: 语言
+        audio_info: 音频流参数
+        user_id: 用户ID
+        duration: 音频时长（秒），用于安排首次查询
+
+    Returns:
+        Dict[str, Any]: {"text", "raw", "raw_text"}，超时时 text 为None
+    """
+    payload = {
+        "user": {"uid": str(user_id)},
+        "audio": {**audio_info.to_payload(), "url": signed_url},
+        "language": language,
+        "request": {
+            "model_name": "bigmodel",
+            "enable_itn": True,
+            "enable_punc": True,
+            "show_utterances": True,
+        },
+    }
+
+    request_id = str(uuid.uuid4())
+    try:
+        # 以 raw JSON 字符串发送至 submit 接口（共享连接池）
+        body = json.dumps(payload, ensure_ascii=False)
+        with start_span("asr.submit", "client", {"asr.request_id": request_id}) as span:
+            resp = await get_http_client().post(
+                settings.VOLC_ASR_ENDPOINT,
+                headers=auc_headers(request_id, submit=True),
+                content=body.encode('utf-8'),
+                timeout=60.0
+            )
+            span.set_attribute("http.status_code", resp.status_code)
+        if resp.status_code != 200:
+            # 将上游错误透传给前端，方便定位
+            text = resp.text
+            try:
+                j = resp.json()
+                text = j.get('message') or j.get('detail') or text
+            except Exception:
+                pass
+            raise HTTPException(status_code=resp.status_code, detail=f"ASR请求失败: {text}")
+
+        # submit 只负责提交，结果由集中轮询器查询
+        return await poll_scheduler.wait_for(request_id, duration)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"AUC调用异常: {str(e)}")
+
+
+def new_object_key(user_id: int) -> str:
+    """生成语音对象键（不含扩展名）"""
+    return f"voice/{user_id}/{int(time.time()*1000)}-{uuid.uuid4().hex}"
+
+
+@dataclass
+class Transcription:
+    """一次上传音频的识别结果"""
+    text: Optional[str]
+    utterances: List[dict]
+    raw: Any
+    raw_text: Optional[str]
+    object_key: str
+    audio_info: AudioInfo
+    size: int
+    duration: Optional[float] = None  # 秒
+    trim_ratio: Optional[float] = None  # 静音裁剪去掉的时长占比
+
+    def response(self) -> Dict[str, Any]:
+        """/voice/asr/submit 的响应格式"""
+        return {"text": self.text, "raw": self.raw, "raw_text": self.raw_text}
+
+
+async def _upload_segments(
+    user_id: int,
+    data: bytes,
+    fmt: str,
+    original_key: Optional[str] = None
+) -> Tuple[str, List[str], List[AudioSegment], int, Optional[float]]:
+    """
+    规范化/裁剪/切分后上传录音及各段
+
+    返回 (录音对象键, 各段对象键, 各段, 提交识别的字节数, 静音裁剪占比)；
+    保存的录音与各段偏移（即拼接后的分句时间戳）始终在同一时间轴：裁剪了静音时保存裁剪后的音频，
+    未裁剪时保存原始录音（original_key 为已在 TOS 中的原始录音时不再重复上传）。
+    """
+    client = get_tos_client()
+    base = new_object_key(user_id)
+    segments, trim_ratio, trimmed = await split_audio(data, fmt)
+    if len(segments) == 1:
+        # 单段：直接保存规范化后的音频
+        info = segments[0].info
+        object_key = f"{base}.{info.fmt}"
+        await put_bytes(client, object_key, segments[0].data, content_type_for(info.fmt))
+        return object_key, [object_key], segments, len(segments[0].data), trim_ratio
+
+    # 多段：保存与各段时间轴一致的整段录音，各段另存供识别使用
+    keys = [f"{base}.part{i + 1}.{seg.info.fmt}" for i, seg in enumerate(segments)]
+    uploads = [put_bytes(client, k, seg.data, content_type_for(seg.info.fmt)) for k, seg in zip(keys, segments)]
+    if trimmed is not None:
+        object_key = f"{base}.{trimmed.info.fmt}"
+        uploads.append(put_bytes(client, object_key, trimmed.data, content_type_for(trimmed.info.fmt)))
+    elif original_key is None:
+        object_key = f"{base}.{fmt}"
+        uploads.append(put_bytes(client, object_key, data, content_type_for(fmt)))
+    else:
+        object_key = original_key
+    await asyncio.gather(*uploads)
+    return object_key, keys, segments, sum(len(seg.data) for seg in segments), trim_ratio
+
+
+async def _recognize(
+    object_key: str,
+    keys: List[str],
+    segments: List[AudioSegment],
+    size: int,
+    language: str,
+    user_id: int,
+    trim_ratio: Optional[float] = None
+) -> Transcription:
+    """并发识别各段（按用户限流）并按顺序拼接；各段时长（裁剪后）用于安排首次查询"""
+
+    async def _transcribe(key: str, segment: AudioSegment) -> Dict[str, Any]:
+        duration = (
+            segment.duration_ms / 1000 if segment.duration_ms is not None
+            else estimate_duration(len(segment.data) or size, segment.info.fmt)
+        )
+        async with _user_limiter.slot(str(user_id)):
+            # 生成 10 分钟有效期的预签名下载链接
+            return await submit_and_wait(
+                presign_url('GET', key, 600), language, segment.info, str(user_id), duration
+            )
+
+    with outbound_call("asr.transcribe"):
+        results = await asyncio.gather(
+            *(_transcribe(k, seg) for k, seg in zip(keys, segments)), return_exceptions=True
+        )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+    if len(results) == 1:
+        result = results[0]
+        text, raw, raw_text = result["text"], result["raw"], result["raw_text"]
+        utterances = parse_auc_utterances(raw)
+        duration = segments[0].duration_ms / 1000 if segments[0].duration_ms is not None else None
+    else:
+        separator = " " if language.lower().startswith("en") else ""
+        text, utterances = stitch_results(results, [seg.offset_ms for seg in segments], separator)
+        raw = {
+            "result": {"text": text, "utterances": utterances},
+            "segments": [
+                {"offset_ms": seg.offset_ms, "duration_ms": seg.duration_ms, "text": r["text"]}
+                for seg, r in zip(segments, results)
+            ],
+        }
+        raw_text = None
+        duration = sum(seg.duration_ms or 0 for seg in segments) / 1000
+
+    return Transcription(
+        text=text, utterances=utterances, raw=raw, raw_text=raw_text,
+        object_key=object_key, audio_info=segments[0].info, size=size, duration=duration,
+        trim_ratio=trim_ratio
+    )
+
+
+async def transcribe_upload(
+    audio: UploadFile,
+    language: str,
+    fmt: str,
+    user_id: int
+) -> Transcription:
+    """
+    上传音频并识别
+
+    开启 ASR_CHUNK_ENABLED 时长录音在静音处切分为不超过 ASR_CHUNK_MAX_SECONDS 的段，
+    各段并发识别（每个用户同时最多 ASR_CHUNK_USER_CONCURRENCY 个任务），
+    全部完成后按顺序拼接文本与分句时间戳。
+    开启 AUDIO_VAD_ENABLED 时先裁剪静音，保存与识别的都是裁剪后的音频。
+    识别结果按 用户+音频SHA-256+语言+格式 缓存，重复提交同一音频不再调用 AUC。
+
+    Args:
+        audio: 上传的音频文件
+        language: 语言
+        fmt: 音频格式
+        user_id: 用户ID
+
+    Returns:
+        Transcription: 识别结果
+    """
+    started = time.monotonic()
+    streamed_key = None
+    try:
+        if settings.ASR_CHUNK_ENABLED or settings.AUDIO_NORMALIZE_ENABLED or settings.AUDIO_VAD_ENABLED:
+            data = await read_upload(audio)
+            digest = hashlib.sha256(data).hexdigest()
+
+            async def _prepare():
+                return await _upload_segments(user_id, data, fmt)
+        else:
+            # 流式上传（边读边传边计算哈希，超过 MAX_UPLOAD_SIZE 立即中止）
+            hasher = hashlib.sha256()
+            streamed_key = f"{new_object_key(user_id)}.{fmt}"
+            size = await upload_stream(
+                get_tos_client(), audio, streamed_key, content_type_for(fmt), hasher=hasher
+            )
+            AUDIO_BYTES.observe(size, stage="original")
+            digest = hasher.hexdigest()
+
+            async def _prepare():
+                return streamed_key, [streamed_key], [AudioSegment(b"", default_audio_info(fmt))], size, None
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"TOS SDK 异常: {str(e)}")
+
+    async def _run() -> Dict[str, Any]:
+        try:
+            object_key, keys, segments, size, trim_ratio = await _prepare()
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"TOS SDK 异常: {str(e)}")
+        return asdict(await _recognize(object_key, keys, segments, size, language, user_id, trim_ratio))
+
+    value, source = await transcript_cache.get_or_run(
+        cache_key(f"{user_id}:{digest}", language, fmt), _run
+    )
+    transcription = Transcription(**{**value, "audio_info": AudioInfo(**value["audio_info"])})
+    if streamed_key is not None:
+        # 本次已上传的对象
+        transcription.object_key = streamed_key
+
+    if source == "miss":
+        ASR_TRANSCRIBE_SECONDS.observe(
+            time.monotonic() - started,
+            normalized="true" if transcription.audio_info.normalized else "false"
+        )
+    return transcription
+
+
+async def transcribe_object(
+    object_key: str,
+    language: str,
+    fmt: str,
+    user_id: int,
+    duration: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    识别已上传到 TOS 的音频（前端直传后按对象键提交）
+
+    开启 AUDIO_VAD_ENABLED 时下载对象裁剪静音，另存裁剪后的音频再识别（原对象保留），
+    此时首次查询按裁剪后的实际时长安排。
+    结果按 对象键+ETag+语言+格式 缓存，重复提交同一对象不再调用 AUC。
+
+    Args:
+        object_key: 对象键
+        language: 语言
+        fmt: 音频格式
+        user_id: 用户ID
+        duration: 录音时长（秒），用于安排首次查询
+
+    Returns:
+        Dict[str, Any]: {"text", "raw", "raw_text"}
+    """
+    try:
+        etag = await head_etag(object_key)
+        # 生成 10 分钟有效期的预签名下载链接
+        signed_url = presign_url('GET', object_key, 600)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"TOS 访问异常: {str(e)}")
+
+    async def _run() -> Dict[str, Any]:
+        if settings.AUDIO_VAD_ENABLED:
+            try:
+                data = await get_bytes(object_key)
+                trimmed_key, keys, segments, size, trim_ratio = await _upload_segments(
+                    user_id, data, fmt, original_key=object_key
+                )
+            except HTTPException:
+                raise
+            except Exception as e:
+                raise HTTPException(status_code=502, detail=f"TOS SDK 异常: {str(e)}")
+            transcription = await _recognize(
+                trimmed_key, keys, segments, size, language, user_id, trim_ratio
+            )
+            return transcription.response()
+        with outbound_call("asr.transcribe"):
+            return await submit_and_wait(
+                signed_url, language, default_audio_info(fmt), str(user_id), duration
+            )
+
+    value, _ = await transcript_cache.get_or_run(
+        cache_key(f"{object_key}:{etag}", language, fmt), _run
+    )
+    return value
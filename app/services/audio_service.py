@@ -0,0 +1,516 @@
+"""
+音频处理服务
+上传音频规范化（解码、下混为单声道、重采样到 16kHz 并重新编码）、静音裁剪与长录音按静音切段，在进程池中执行
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import asyncio
+import io
+import logging
+import shutil
+import struct
+import subprocess
+import wave
+
+import numpy as np
+
+from app.config import settings
+from app.core.metrics import Counter, Histogram
+
+
+logger = logging.getLogger(__name__)
+
+AUDIO_BYTES = Histogram(
+    "asr_audio_bytes", "提交识别的音频大小（字节）", ["stage"],
+    buckets=(16e3, 64e3, 256e3, 512e3, 1e6, 2e6, 5e6, 10e6, 20e6)
+)
+NORMALIZE_SECONDS = Histogram(
+    "asr_normalize_seconds", "音频规范化耗时", ["outcome"]
+)
+SEGMENTS_PER_AUDIO = Histogram(
+    "asr_segments_per_audio", "长录音切分的段数", buckets=(1, 2, 3, 4, 6, 8, 12, 16, 24)
+)
+VAD_TRIM_RATIO = Histogram(
+    "asr_vad_trim_ratio", "静音裁剪去掉的时长占比",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+)
+VAD_REMOVED_SECONDS = Counter(
+    "asr_vad_removed_seconds_total", "静音裁剪累计去掉的音频时长（秒）"
+)
+
+# 静音检测帧长（毫秒）
+_FRAME_MS = 30
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+@dataclass
+class AudioInfo:
+    """提交给 ASR 的音频流参数（未知的字段为None，由服务端自行识别）"""
+    fmt: str
+    codec: str
+    rate: Optional[int] = None
+    bits: Optional[int] = None
+    channel: Optional[int] = None
+    normalized: bool = False
+
+    def to_payload(self) -> dict:
+        """转换为 AUC 请求中的 audio 字段（不含 url）"""
+        payload = {"format": self.fmt, "codec": self.codec}
+        for name in ("rate", "bits", "channel"):
+            value = getattr(self, name)
+            if value is not None:
+                payload[name] = value
+        return payload
+
+
+def default_audio_info(fmt: str) -> AudioInfo:
+    """未经规范化的音频：只声明容器与编码"""
+    return AudioInfo(fmt=fmt, codec="opus" if fmt in ("ogg", "webm", "opus") else "raw")
+
+
+def probe_wav(data: bytes) -> Optional[AudioInfo]:
+    """
+    解析 WAV 头部获取真实流参数
+
+    Args:
+        data: 音频数据
+
+    Returns:
+        Optional[AudioInfo]: 非 PCM WAV 时返回None
+    """
+    if len(data) < 36 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id, size = data[pos:pos + 4], struct.unpack("<I", data[pos + 4:pos + 8])[0]
+        if chunk_id == b"fmt " and pos + 24 <= len(data):
+            audio_format, channels, rate = struct.unpack("<HHI", data[pos + 8:pos + 16])
+            bits = struct.unpack("<H", data[pos + 22:pos + 24])[0]
+            if audio_format != 1:
+                return None
+            return AudioInfo(fmt="wav", codec="raw", rate=rate, bits=bits, channel=channels)
+        pos += 8 + size + (size & 1)
+    return None
+
+
+def _ffmpeg_normalize(ffmpeg: str, data: bytes, target: str, rate: int, bitrate: str, timeout: float) -> bytes:
+    """在工作进程中调用 ffmpeg：解码 → 单声道 → 重采样 → 重新编码"""
+    return _run_ffmpeg(
+        ffmpeg, data,
+        ["-i", "pipe:0", "-vn", "-ac", "1", "-ar", str(rate), *_encode_args(target, bitrate)],
+        timeout
+    )
+
+
+@dataclass
+class AudioSegment:
+    """切分后的一段音频"""
+    data: bytes
+    info: AudioInfo
+    offset_ms: int = 0
+    duration_ms: Optional[int] = None
+
+
+def _encode_args(target: str, bitrate: str) -> List[str]:
+    if target == "pcm":
+        return ["-c:a", "pcm_s16le", "-f", "wav", "pipe:1"]
+    return ["-c:a", "libopus", "-b:a", bitrate, "-application", "voip", "-f", "ogg", "pipe:1"]
+
+
+def _run_ffmpeg(ffmpeg: str, data: bytes, args: List[str], timeout: float) -> bytes:
+    proc = subprocess.run(
+        [ffmpeg, "-hide_banner", "-loglevel", "error", *args],
+        input=data, capture_output=True, timeout=timeout, check=False
+    )
+    if proc.returncode != 0 or not proc.stdout:
+        raise RuntimeError(proc.stderr.decode("utf-8", "ignore").strip() or f"ffmpeg 退出码 {proc.returncode}")
+    return proc.stdout
+
+
+def _frames(samples: np.ndarray, frame_samples: int) -> np.ndarray:
+    """按帧重排采样（末尾不足一帧的部分补零），返回 (帧数, 每帧采样数) 的 float64 数组"""
+    count = -(-len(samples) // frame_samples)
+    frames = np.zeros(count * frame_samples, dtype=np.float64)
+    frames[:len(samples)] = samples
+    return frames.reshape(count, frame_samples)
+
+
+def frame_rms(pcm: bytes, frame_samples: int) -> List[float]:
+    """
+    计算 16bit 单声道 PCM 每帧的 RMS 能量
+
+    Args:
+        pcm: s16le PCM 数据
+        frame_samples: 每帧采样数
+
+    Returns:
+        List[float]: 各帧 RMS
+    """
+    samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+    if not len(samples):
+        return []
+    frames = _frames(samples, frame_samples)
+    # 末帧按实际采样数求均值
+    counts = np.full(len(frames), frame_samples)
+    counts[-1] = len(samples) - (len(frames) - 1) * frame_samples
+    return np.sqrt((frames * frames).sum(axis=1) / counts).tolist()
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """连续为真的区间，返回 (起点数组, 终点数组)（左闭右开）"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def speech_mask(
+    energies_db: np.ndarray,
+    threshold_db: float,
+    noise_margin_db: float,
+    min_speech_frames: int,
+    pad_frames: int
+) -> np.ndarray:
+    """
+    基于帧能量的语音检测
+
+    阈值取 max(threshold_db, 底噪 + noise_margin_db)，底噪为各帧能量的 10% 分位；
+    短于 min_speech_frames 的能量突发视为噪声，语音段前后各扩展 pad_frames 帧。
+
+    Args:
+        energies_db: 各帧能量（dBFS）
+        threshold_db: 静音电平阈值
+        noise_margin_db: 高于底噪的余量
+        min_speech_frames: 最短语音帧数
+        pad_frames: 语音段前后保留的帧数
+
+    Returns:
+        np.ndarray: 各帧是否为语音（bool）
+    """
+    if not len(energies_db):
+        return np.zeros(0, dtype=bool)
+    threshold = max(threshold_db, float(np.percentile(energies_db, 10)) + noise_margin_db)
+    voiced = energies_db > threshold
+
+    starts, ends = _runs(voiced)
+    keep = (ends - starts) >= min_speech_frames
+    edges = np.zeros(len(voiced) + 1, dtype=np.int32)
+    np.add.at(edges, starts[keep], 1)
+    np.add.at(edges, ends[keep], -1)
+    voiced = np.cumsum(edges[:-1]) > 0
+
+    if pad_frames > 0 and voiced.any():
+        voiced = np.convolve(voiced, np.ones(2 * pad_frames + 1), mode="same") > 0
+    return voiced
+
+
+def compress_silence(
+    pcm: bytes,
+    rate: int,
+    threshold_db: float,
+    noise_margin_db: float,
+    min_speech_ms: int,
+    pad_ms: int,
+    max_silence_ms: int
+) -> bytes:
+    """
+    裁剪 16bit 单声道 PCM 中的静音
+
+    去掉首尾静音，语音之间超过 max_silence_ms 的静音只保留开头 max_silence_ms；
+    整段都没有检测到语音时原样返回，交由 ASR 判断。
+
+    Args:
+        pcm: s16le PCM 数据
+        rate: 采样率
+        threshold_db: 静音电平阈值（dBFS）
+        noise_margin_db: 高于底噪的余量
+        min_speech_ms: 最短语音时长
+        pad_ms: 语音段前后保留的余量
+        max_silence_ms: 句间静音保留的最大时长
+
+    Returns:
+        bytes: 裁剪后的 PCM
+    """
+    samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+    frame_samples = rate * _FRAME_MS // 1000
+    if len(samples) < frame_samples:
+        return pcm
+    frames = _frames(samples, frame_samples)
+    rms = np.sqrt((frames * frames).mean(axis=1))
+    energies_db = 20 * np.log10(np.maximum(rms, 1.0) / 32768)
+
+    voiced = speech_mask(
+        energies_db, threshold_db, noise_margin_db,
+        max(min_speech_ms // _FRAME_MS, 1), pad_ms // _FRAME_MS
+    )
+    if not voiced.any():
+        return pcm
+
+    # 句间静音保留开头 max_silence_ms：按每帧在所属静音段内的位置筛选
+    keep = voiced.copy()
+    starts, ends = _runs(~voiced)
+    lengths = ends - starts
+    interior = (starts > 0) & (ends < len(voiced))
+    limit = np.where(interior, np.minimum(lengths, max_silence_ms // _FRAME_MS), 0)
+    silent = np.flatnonzero(~voiced)
+    position = silent - np.repeat(starts, lengths)
+    keep[silent[position < np.repeat(limit, lengths)]] = True
+
+    sample_keep = np.repeat(keep, frame_samples)[:len(samples)]
+    return samples[sample_keep].astype("<i2").tobytes()
+
+
+def find_split_frames(
+    energies: List[float],
+    max_frames: int,
+    min_frames: int,
+    min_silence_frames: int,
+    threshold: float
+) -> List[int]:
+    """
+    在静音处选择切分点
+
+    每段长度不超过 max_frames：优先在 [min_frames, max_frames] 窗口内最靠后的
+    足够长的静音段中点切分；窗口内没有静音时，在窗口后半段能量最低的帧处强制切分。
+
+    Args:
+        energies: 各帧能量
+        max_frames: 每段最大帧数
+        min_frames: 每段最小帧数
+        min_silence_frames: 可作为切分点的最短静音帧数
+        threshold: 静音能量阈值
+
+    Returns:
+        List[int]: 切分点（帧下标，升序）
+    """
+    total = len(energies)
+    # 预先找出所有足够长的静音段 (起, 止)
+    runs, start = [], None
+    for i, e in enumerate(energies + [threshold]):
+        if e < threshold and i < total:
+            if start is None:
+                start = i
+        elif start is not None:
+            if i - start >= min_silence_frames:
+                runs.append((start, i))
+            start = None
+
+    cuts, seg_start = [], 0
+    while total - seg_start > max_frames:
+        lo, hi = seg_start + min_frames, seg_start + max_frames
+        candidates = [(a + b) // 2 for a, b in runs if lo <= (a + b) // 2 <= hi]
+        if candidates:
+            cut = candidates[-1]
+        else:
+            window_lo = max(lo, seg_start + max_frames // 2)
+            cut = min(range(window_lo, hi + 1), key=lambda i: energies[i])
+        cuts.append(cut)
+        seg_start = cut
+    return cuts
+
+
+def _decode_process_encode(
+    ffmpeg: str,
+    data: bytes,
+    target: str,
+    rate: int,
+    bitrate: str,
+    timeout: float,
+    split: Optional[Tuple[float, float, int, float]] = None,
+    vad: Optional[Tuple[float, float, int, int, int]] = None
+) -> Tuple[List[Tuple[int, int, bytes]], int, Optional[bytes]]:
+    """
+    在工作进程中解码为 PCM，按需裁剪静音、按静音切段，再逐段编码
+
+    Args:
+        split: 切段参数 (最长秒数, 最短秒数, 最短静音ms, 静音电平dB)，为None时不切段
+        vad: 静音裁剪参数（同 compress_silence 的阈值参数），为None时不裁剪
+
+    Returns:
+        Tuple[List[Tuple[int, int, bytes]], int, Optional[bytes]]: [(偏移ms, 时长ms, 数据)]、原始时长ms，
+        以及裁剪静音且切为多段时整段裁剪后音频的编码（与各段偏移同一时间轴，其余情况为None）
+    """
+    pcm = _run_ffmpeg(
+        ffmpeg, data,
+        ["-i", "pipe:0", "-vn", "-ac", "1", "-ar", str(rate), "-f", "s16le", "pipe:1"],
+        timeout
+    )
+    original_ms = len(pcm) * 1000 // (rate * 2)
+    if vad is not None:
+        pcm = compress_silence(pcm, rate, *vad)
+
+    frame_samples = rate * _FRAME_MS // 1000
+    energies = frame_rms(pcm, frame_samples)
+    cuts = []
+    if split is not None:
+        max_seconds, min_seconds, min_silence_ms, threshold_db = split
+        cuts = find_split_frames(
+            energies,
+            max_frames=int(max_seconds * 1000 / _FRAME_MS),
+            min_frames=int(min_seconds * 1000 / _FRAME_MS),
+            min_silence_frames=max(min_silence_ms // _FRAME_MS, 1),
+            threshold=32768 * 10 ** (threshold_db / 20),
+        )
+
+    def _encode(chunk: bytes) -> bytes:
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(rate)
+            w.writeframes(chunk)
+        encoded = buf.getvalue()
+        if target != "pcm":
+            encoded = _run_ffmpeg(ffmpeg, encoded, ["-i", "pipe:0", *_encode_args(target, bitrate)], timeout)
+        return encoded
+
+    segments = []
+    bounds = [0] + cuts + [len(energies)]
+    for a, b in zip(bounds, bounds[1:]):
+        chunk = pcm[a * frame_samples * 2:b * frame_samples * 2]
+        segments.append((a * _FRAME_MS, len(chunk) * 1000 // (rate * 2), _encode(chunk)))
+    trimmed = _encode(pcm) if vad is not None and len(segments) > 1 else None
+    return segments, original_ms, trimmed
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.AUDIO_NORMALIZE_WORKERS)
+    return _executor
+
+
+def shutdown_audio_pool() -> None:
+    """关闭规范化进程池（应用关闭时调用）"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def normalize_audio(data: bytes, fmt: str) -> Tuple[bytes, AudioInfo]:
+    """
+    规范化上传音频
+
+    AUDIO_NORMALIZE_ENABLED 关闭、找不到 ffmpeg 或转码失败时返回原始数据，
+    并尽量给出真实流参数（WAV 解析头部，其他格式只声明容器与编码）。
+
+    Args:
+        data: 原始音频数据
+        fmt: 原始音频格式
+
+    Returns:
+        Tuple[bytes, AudioInfo]: 提交识别的音频数据及其流参数
+    """
+    AUDIO_BYTES.observe(len(data), stage="original")
+    original = (data, probe_wav(data) or default_audio_info(fmt))
+
+    if not settings.AUDIO_NORMALIZE_ENABLED:
+        return original
+    ffmpeg = shutil.which(settings.FFMPEG_PATH)
+    if ffmpeg is None:
+        logger.warning("未找到 ffmpeg，跳过音频规范化")
+        return original
+
+    target = "pcm" if settings.AUDIO_NORMALIZE_FORMAT == "pcm" else "opus"
+    rate = settings.AUDIO_NORMALIZE_SAMPLE_RATE
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        normalized = await loop.run_in_executor(
+            _get_executor(), _ffmpeg_normalize, ffmpeg, data, target, rate,
+            settings.AUDIO_NORMALIZE_OPUS_BITRATE, settings.AUDIO_NORMALIZE_TIMEOUT
+        )
+    except Exception as e:
+        NORMALIZE_SECONDS.observe(loop.time() - started, outcome="error")
+        logger.warning(f"音频规范化失败，使用原始音频: {e}")
+        return original
+
+    NORMALIZE_SECONDS.observe(loop.time() - started, outcome="ok")
+    AUDIO_BYTES.observe(len(normalized), stage="normalized")
+    return normalized, _normalized_info(target, rate)
+
+
+def _normalized_info(target: str, rate: int) -> AudioInfo:
+    if target == "pcm":
+        return AudioInfo(fmt="wav", codec="raw", rate=rate, bits=16, channel=1, normalized=True)
+    return AudioInfo(fmt="ogg", codec="opus", rate=rate, bits=16, channel=1, normalized=True)
+
+
+async def split_audio(
+    data: bytes,
+    fmt: str
+) -> Tuple[List[AudioSegment], Optional[float], Optional[AudioSegment]]:
+    """
+    规范化、裁剪静音并按静音切分长录音
+
+    ASR_CHUNK_ENABLED 与 AUDIO_VAD_ENABLED 均关闭时等同于 normalize_audio（返回单段）；
+    开启 AUDIO_VAD_ENABLED 时先去掉首尾静音并压缩句间长静音，各段时间轴均为裁剪后的时间；
+    找不到 ffmpeg 或处理失败时返回原始音频单段。
+
+    Args:
+        data: 原始音频数据
+        fmt: 原始音频格式
+
+    Returns:
+        Tuple[List[AudioSegment], Optional[float], Optional[AudioSegment]]: 按时间顺序排列的音频段、
+        静音裁剪去掉的时长占比（未裁剪时为None），以及裁剪静音且切为多段时的整段裁剪后音频
+        （与各段偏移同一时间轴；其余情况为None，此时原始录音或唯一一段即与各段时间轴一致）
+    """
+    if not (settings.ASR_CHUNK_ENABLED or settings.AUDIO_VAD_ENABLED):
+        normalized, info = await normalize_audio(data, fmt)
+        return [AudioSegment(normalized, info)], None, None
+
+    AUDIO_BYTES.observe(len(data), stage="original")
+    original = [AudioSegment(data, probe_wav(data) or default_audio_info(fmt))]
+    ffmpeg = shutil.which(settings.FFMPEG_PATH)
+    if ffmpeg is None:
+        logger.warning("未找到 ffmpeg，跳过静音裁剪与长录音切分")
+        return original, None, None
+
+    split = None
+    if settings.ASR_CHUNK_ENABLED:
+        split = (
+            settings.ASR_CHUNK_MAX_SECONDS, settings.ASR_CHUNK_MIN_SECONDS,
+            settings.ASR_CHUNK_MIN_SILENCE_MS, settings.ASR_CHUNK_SILENCE_DB
+        )
+    vad = None
+    if settings.AUDIO_VAD_ENABLED:
+        vad = (
+            settings.AUDIO_VAD_THRESHOLD_DB, settings.AUDIO_VAD_NOISE_MARGIN_DB,
+            settings.AUDIO_VAD_MIN_SPEECH_MS, settings.AUDIO_VAD_PAD_MS,
+            settings.AUDIO_VAD_MAX_SILENCE_MS
+        )
+
+    target = "pcm" if settings.AUDIO_NORMALIZE_FORMAT == "pcm" else "opus"
+    rate = settings.AUDIO_NORMALIZE_SAMPLE_RATE
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        parts, original_ms, trimmed_data = await loop.run_in_executor(
+            _get_executor(), _decode_process_encode, ffmpeg, data, target, rate,
+            settings.AUDIO_NORMALIZE_OPUS_BITRATE, settings.AUDIO_NORMALIZE_TIMEOUT, split, vad
+        )
+    except Exception as e:
+        NORMALIZE_SECONDS.observe(loop.time() - started, outcome="error")
+        logger.warning(f"音频处理失败，使用原始音频: {e}")
+        return original, None, None
+
+    NORMALIZE_SECONDS.observe(loop.time() - started, outcome="ok")
+    SEGMENTS_PER_AUDIO.observe(len(parts))
+    info = _normalized_info(target, rate)
+    segments = []
+    for offset_ms, duration_ms, encoded in parts:
+        AUDIO_BYTES.observe(len(encoded), stage="normalized")
+        segments.append(AudioSegment(encoded, info, offset_ms, duration_ms))
+
+    trim_ratio = None
+    if vad is not None and original_ms > 0:
+        removed_ms = max(original_ms - sum(seg.duration_ms for seg in segments), 0)
+        trim_ratio = removed_ms / original_ms
+        VAD_TRIM_RATIO.observe(trim_ratio)
+        VAD_REMOVED_SECONDS.inc(removed_ms / 1000)
+    trimmed = None
+    if trimmed_data is not None:
+        trimmed = AudioSegment(trimmed_data, info, 0, sum(seg.duration_ms for seg in segments))
+    return segments, trim_ratio, trimmed
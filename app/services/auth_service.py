@@ -3,17 +3,25 @@
 处理用户认证相关的业务逻辑
 """
 from typing import Optional
+import logging
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from app.models.user import User
-from app.core.security import verify_password, create_access_token, create_refresh_token
+from app.core.security import verify_and_update_password, create_access_token, create_refresh_token
 from app.services.user_service import get_user_by_username
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+logger = logging.getLogger(__name__)
+
+
+async def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """
     验证用户凭据
 
+    密码验证在专用线程池中执行；验证通过且哈希成本低于 BCRYPT_ROUNDS 时
+    透明地以新成本重新哈希并保存（保存失败不影响本次登录）。
+
     Args:
         db: 数据库会话
         username: 用户名
@@ -26,12 +34,21 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     if not user:
         return None
 
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not valid:
         return None
 
     if not user.is_active:
         return None
 
+    if new_hash:
+        try:
+            user.hashed_password = new_hash
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"升级密码哈希失败 user_id={user.id}: {e}")
+
     return user
 
 
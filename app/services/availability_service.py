@@ -0,0 +1,160 @@
+"""
+用户名/邮箱可用性索引
+
+内存布隆过滤器收录全部已存在的用户名与邮箱（小写）：判定不存在时直接视为可用，
+可能存在时再用唯一索引做一次存在性查询确认。注册在哈希密码之前先查这里，
+重复注册不再白白消耗一次 bcrypt。
+启动时在后台线程中预热，预热完成前一律走数据库查询；新用户写入后加入过滤器，
+启用 Redis 时通过发布/订阅同步到其他 worker。
+"""
+from typing import Optional
+import asyncio
+import logging
+
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.bloom import BloomFilter
+from app.core.database import SessionLocal
+from app.core.metrics import Counter
+from app.core.redis import get_redis, get_async_redis
+from app.models.user import User
+
+
+logger = logging.getLogger(__name__)
+
+# 跨 worker 新增通知频道
+AVAILABILITY_CHANNEL = "user_availability:add"
+
+AVAILABILITY_CHECKS = Counter(
+    "user_availability_checks_total", "用户名/邮箱可用性检查次数", ["field", "result"]
+)
+
+
+def _key(field: str, value: str) -> str:
+    return f"{field}:{value.strip().lower()}"
+
+
+class AvailabilityIndex:
+    """用户名/邮箱布隆过滤器"""
+
+    def __init__(self):
+        self._bloom = BloomFilter(
+            settings.USER_AVAILABILITY_BLOOM_CAPACITY, settings.USER_AVAILABILITY_BLOOM_ERROR_RATE
+        )
+        self.ready = False
+        # 预热期间新增的键，预热后补录到新过滤器
+        self._warming = False
+        self._pending = []
+
+    def warm(self) -> None:
+        """从用户表加载全部用户名与邮箱（同步，应在后台线程中调用）"""
+        self._warming = True
+        with SessionLocal() as db:
+            total = db.query(User.id).count()
+            bloom = BloomFilter(
+                max(settings.USER_AVAILABILITY_BLOOM_CAPACITY, total * 2),
+                settings.USER_AVAILABILITY_BLOOM_ERROR_RATE
+            )
+            rows = db.query(User.username, User.email).yield_per(5000)
+            for username, email in rows:
+                bloom.add(_key("username", username))
+                bloom.add(_key("email", email))
+        self._bloom = bloom
+        self._warming = False
+        bloom.update(list(self._pending))
+        self._pending = []
+        self.ready = True
+        logger.info(f"用户名/邮箱可用性索引预热完成，用户数: {total}")
+
+    def add(self, username: str, email: str, publish: bool = True) -> None:
+        """
+        收录新用户的用户名与邮箱
+
+        Args:
+            username: 用户名
+            email: 邮箱
+            publish: 是否通知其他 worker
+        """
+        keys = (_key("username", username), _key("email", email))
+        self._bloom.update(keys)
+        if self._warming:
+            self._pending.extend(keys)
+        if not publish:
+            return
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.publish(AVAILABILITY_CHANNEL, f"{username}\n{email}")
+        except Exception as e:
+            logger.warning(f"可用性索引同步通知发送失败: {e}")
+
+    def _taken(self, db: Session, field: str, column, value: str) -> bool:
+        if self.ready and _key(field, value) not in self._bloom:
+            AVAILABILITY_CHECKS.inc(field=field, result="bloom_negative")
+            return False
+        taken = db.query(exists().where(column == value)).scalar()
+        AVAILABILITY_CHECKS.inc(field=field, result="taken" if taken else "false_positive")
+        return bool(taken)
+
+    def username_taken(self, db: Session, username: str) -> bool:
+        """用户名是否已被使用"""
+        return self._taken(db, "username", User.username, username)
+
+    def email_taken(self, db: Session, email: str) -> bool:
+        """邮箱是否已被使用"""
+        return self._taken(db, "email", User.email, email)
+
+
+availability_index = AvailabilityIndex()
+
+
+async def warm_availability_index() -> None:
+    """后台任务：在线程中预热可用性索引（失败时保持走数据库查询）"""
+    try:
+        await asyncio.to_thread(availability_index.warm)
+    except Exception as e:
+        logger.error(f"用户名/邮箱可用性索引预热失败: {e}")
+
+
+async def listen_availability() -> None:
+    """后台任务：订阅其他 worker 新增的用户名与邮箱"""
+    client = get_async_redis()
+    if client is None:
+        return
+
+    while True:
+        try:
+            pubsub = client.pubsub()
+            await pubsub.subscribe(AVAILABILITY_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    username, _, email = message["data"].partition("\n")
+                    availability_index.add(username, email, publish=False)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 连接中断期间可能错过通知，重新预热后再订阅
+            logger.warning(f"可用性索引订阅中断: {e}")
+            await asyncio.sleep(1.0)
+            await warm_availability_index()
+
+
+def check_availability(db: Session, username: Optional[str], email: Optional[str]) -> dict:
+    """
+    检查用户名/邮箱是否可用
+
+    Args:
+        db: 数据库会话
+        username: 用户名（可选）
+        email: 邮箱（可选）
+
+    Returns:
+        dict: {"username": 是否可用或None, "email": 是否可用或None}
+    """
+    return {
+        "username": None if not username else not availability_index.username_taken(db, username),
+        "email": None if not email else not availability_index.email_taken(db, email),
+    }
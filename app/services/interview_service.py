@@ -54,7 +54,8 @@ def get_interview_by_id(db: Session, interview_id: int) -> Optional[Interview]:
     Returns:
         Optional[Interview]: 面试对象或None
     """
-    return db.query(Interview).filter(Interview.id == interview_id).first()
+    # 优先命中会话身份映射（如已由权限校验加载），否则查询数据库
+    return db.get(Interview, interview_id)
 
 
 def get_user_interviews(
@@ -0,0 +1,335 @@
+"""
+批量开通用户服务
+
+管理员上传 CSV（表头 username,email,password）或 NDJSON（每行一个对象）批量创建用户：
+- 逐行校验并在文件内去重，已存在的用户名/邮箱按批一次查询，被拒绝的行不做密码哈希
+- 密码哈希分摊到进程池（bcrypt 为 CPU 密集型），下一批的哈希与当前批的写入重叠进行
+- 用户与默认设置按批多行插入、每批提交一次；并发注册造成的冲突只影响对应的行
+处理进度以事件（dict）逐个产出，由路由编码为 NDJSON 流。
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import csv
+import io
+import json
+import logging
+import math
+import os
+import time
+
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.database import SessionLocal, insert_ignore_conflicts
+from app.core.metrics import Counter
+from app.core.security import hash_passwords
+from app.models.setting import Setting
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.services.availability_service import availability_index
+from app.services.user_service import DEFAULT_SETTING
+
+
+logger = logging.getLogger(__name__)
+
+PROVISION_ROWS = Counter(
+    "bulk_provision_rows_total", "批量开通处理的行数", ["result"]
+)
+
+SUPPORTED_FORMATS = ("csv", "ndjson")
+_REQUIRED_FIELDS = ("username", "email", "password")
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+@dataclass
+class ProvisionRow:
+    """一行待开通的用户"""
+    row: int
+    username: str
+    email: str
+    password: str
+
+
+def _error(row: int, username: Optional[str], reason: str) -> dict:
+    return {"event": "error", "row": row, "username": username, "reason": reason}
+
+
+def detect_format(filename: Optional[str]) -> str:
+    """
+    按文件扩展名判断格式（.csv 为 CSV，其余按 NDJSON 处理）
+
+    Args:
+        filename: 上传文件名
+
+    Returns:
+        str: csv 或 ndjson
+    """
+    ext = os.path.splitext(filename or "")[1].lower()
+    return "csv" if ext == ".csv" else "ndjson"
+
+
+def _records(text: str, fmt: str, errors: List[dict]):
+    """逐条产出 (行号, 原始记录)，无法解析的行记入 errors"""
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        missing = [f for f in _REQUIRED_FIELDS if f not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV 缺少列: {', '.join(missing)}")
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for no, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            errors.append(_error(no, None, "JSON 格式错误"))
+            continue
+        if not isinstance(record, dict):
+            errors.append(_error(no, None, "每行应为一个 JSON 对象"))
+            continue
+        yield no, record
+
+
+def parse_rows(data: bytes, fmt: str) -> Tuple[List[ProvisionRow], List[dict]]:
+    """
+    解析并校验上传文件（同步，CPU 密集，应在线程中调用）
+
+    Args:
+        data: 文件内容（UTF-8，可带 BOM）
+        fmt: csv 或 ndjson
+
+    Returns:
+        Tuple[List[ProvisionRow], List[dict]]: 通过校验的行，以及被拒绝行的错误事件
+
+    Raises:
+        ValueError: 格式不支持、编码错误、缺少列或行数超过 BULK_PROVISION_MAX_ROWS
+    """
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"不支持的格式: {fmt}")
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ValueError("文件需为 UTF-8 编码")
+
+    rows: List[ProvisionRow] = []
+    errors: List[dict] = []
+    seen_usernames, seen_emails = set(), set()
+    for no, record in _records(text, fmt, errors):
+        if len(rows) + len(errors) >= settings.BULK_PROVISION_MAX_ROWS:
+            raise ValueError(f"行数超过上限 {settings.BULK_PROVISION_MAX_ROWS}")
+        username = record.get("username")
+        try:
+            user = UserCreate(
+                username=(username or "").strip(),
+                email=(record.get("email") or "").strip(),
+                password=record.get("password") or "",
+            )
+        except ValidationError as e:
+            detail = e.errors()[0]
+            field = ".".join(str(p) for p in detail["loc"])
+            errors.append(_error(no, username, f"{field}: {detail['msg']}"))
+            continue
+
+        # 与唯一索引一致按小写判重（MySQL 默认排序规则不区分大小写）
+        if user.username.lower() in seen_usernames:
+            errors.append(_error(no, user.username, "文件内用户名重复"))
+            continue
+        if user.email.lower() in seen_emails:
+            errors.append(_error(no, user.username, "文件内邮箱重复"))
+            continue
+        seen_usernames.add(user.username.lower())
+        seen_emails.add(user.email.lower())
+        rows.append(ProvisionRow(no, user.username, user.email, user.password))
+    return rows, errors
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.BULK_PROVISION_WORKERS)
+    return _executor
+
+
+def shutdown_provision_pool() -> None:
+    """关闭密码哈希进程池（应用关闭时调用）"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def _hash_all(passwords: List[str]) -> List[str]:
+    """把一批密码均分给进程池的各个进程计算哈希"""
+    if not passwords:
+        return []
+    loop = asyncio.get_running_loop()
+    size = math.ceil(len(passwords) / max(settings.BULK_PROVISION_WORKERS, 1))
+    chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    results = await asyncio.gather(*(
+        loop.run_in_executor(_get_executor(), hash_passwords, chunk) for chunk in chunks
+    ))
+    return [h for chunk in results for h in chunk]
+
+
+def _reject_existing(db: Session, rows: List[ProvisionRow]) -> Tuple[List[ProvisionRow], List[dict]]:
+    """剔除用户名/邮箱已存在的行（每批各一次 IN 查询）"""
+    taken_usernames = {
+        name.lower() for (name,) in
+        db.query(User.username).filter(User.username.in_([r.username for r in rows]))
+    }
+    taken_emails = {
+        email.lower() for (email,) in
+        db.query(User.email).filter(User.email.in_([r.email for r in rows]))
+    }
+    kept, errors = [], []
+    for r in rows:
+        if r.username.lower() in taken_usernames:
+            errors.append(_error(r.row, r.username, "用户名已被使用"))
+        elif r.email.lower() in taken_emails:
+            errors.append(_error(r.row, r.username, "邮箱已被使用"))
+        else:
+            kept.append(r)
+    return kept, errors
+
+
+def _insert_individually(
+    db: Session,
+    rows: List[ProvisionRow],
+    hashes: List[str]
+) -> Tuple[List[ProvisionRow], List[dict]]:
+    """逐行插入（每行一个保存点），用于多行插入遇到并发冲突时定位冲突行"""
+    created, errors = [], []
+    for r, hashed in zip(rows, hashes):
+        try:
+            with db.begin_nested():
+                user = User(username=r.username, email=r.email, hashed_password=hashed, is_active=True)
+                db.add(user)
+                db.flush()
+                db.add(Setting(user_id=user.id, **DEFAULT_SETTING))
+                db.flush()
+            created.append(r)
+        except IntegrityError:
+            errors.append(_error(r.row, r.username, "用户名或邮箱已被使用"))
+    db.commit()
+    return created, errors
+
+
+def _insert_batch(
+    db: Session,
+    rows: List[ProvisionRow],
+    hashes: List[str]
+) -> Tuple[List[ProvisionRow], List[dict]]:
+    """
+    多行插入一批用户及其默认设置并提交（同步，应在线程中调用）
+
+    用户名冲突的行被忽略；按哈希值回查确认哪些行由本次写入，未写入的行报告为冲突。
+    """
+    if not rows:
+        return [], []
+    values = [
+        {"username": r.username, "email": r.email, "hashed_password": h, "is_active": True}
+        for r, h in zip(rows, hashes)
+    ]
+    try:
+        insert_ignore_conflicts(db, User, values, ["username"])
+    except IntegrityError:
+        # 邮箱在查询之后被并发占用：回滚本批，逐行定位
+        db.rollback()
+        return _insert_individually(db, rows, hashes)
+
+    found: Dict[str, Tuple[int, str]] = {
+        username: (user_id, hashed) for user_id, username, hashed in
+        db.query(User.id, User.username, User.hashed_password).filter(
+            User.username.in_([r.username for r in rows])
+        )
+    }
+    created, errors, settings_rows = [], [], []
+    for r, hashed in zip(rows, hashes):
+        hit = found.get(r.username)
+        if hit is not None and hit[1] == hashed:
+            created.append(r)
+            settings_rows.append({"user_id": hit[0], **DEFAULT_SETTING})
+        else:
+            errors.append(_error(r.row, r.username, "用户名或邮箱已被使用"))
+    insert_ignore_conflicts(db, Setting, settings_rows, ["user_id"])
+    db.commit()
+    return created, errors
+
+
+async def provision_users(rows: List[ProvisionRow], errors: List[dict]) -> AsyncIterator[dict]:
+    """
+    批量开通用户，逐步产出进度事件
+
+    事件依次为：start（总行数）→ 解析阶段被拒绝行的 error → 每批处理后的 error 与 progress → done。
+    已提交的批次不会因后续失败或调用方断开而回滚。
+
+    Args:
+        rows: 通过校验的行
+        errors: 解析阶段被拒绝行的错误事件
+
+    Yields:
+        dict: 进度事件
+    """
+    total = len(rows) + len(errors)
+    created = 0
+    failed = len(errors)
+    started = time.perf_counter()
+    yield {"event": "start", "total": total}
+    for event in errors:
+        yield event
+    PROVISION_ROWS.inc(len(errors), result="rejected")
+
+    size = max(settings.BULK_PROVISION_BATCH_SIZE, 1)
+    batches = [rows[i:i + size] for i in range(0, len(rows), size)]
+    db = SessionLocal()
+    db.info["use_primary"] = True
+    hashing: Optional[asyncio.Task] = None
+    try:
+        kept: List[ProvisionRow] = []
+        for index, batch in enumerate(batches):
+            if index == 0:
+                kept, rejected = await asyncio.to_thread(_reject_existing, db, batch)
+                hashing = asyncio.ensure_future(_hash_all([r.password for r in kept]))
+            current, current_hashing = kept, hashing
+
+            # 下一批先判重并开始哈希，与本批写入重叠
+            next_rejected: List[dict] = []
+            if index + 1 < len(batches):
+                kept, next_rejected = await asyncio.to_thread(_reject_existing, db, batches[index + 1])
+                hashing = asyncio.ensure_future(_hash_all([r.password for r in kept]))
+
+            hashes = await current_hashing
+            inserted, conflicts = await asyncio.to_thread(_insert_batch, db, current, hashes)
+            for r in inserted:
+                availability_index.add(r.username, r.email)
+
+            for event in rejected + conflicts:
+                yield event
+            created += len(inserted)
+            failed += len(rejected) + len(conflicts)
+            PROVISION_ROWS.inc(len(inserted), result="created")
+            PROVISION_ROWS.inc(len(rejected) + len(conflicts), result="rejected")
+            rejected = next_rejected
+            yield {
+                "event": "progress",
+                "processed": created + failed,
+                "total": total,
+                "created": created,
+                "failed": failed,
+            }
+    finally:
+        if hashing is not None and not hashing.done():
+            hashing.cancel()
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"批量开通完成：新建 {created}，失败 {failed}，耗时 {elapsed:.1f}s")
+    yield {"event": "done", "total": total, "created": created, "failed": failed, "seconds": round(elapsed, 3)}
@@ -0,0 +1,336 @@
+"""
+对象存储服务
+进程级 TOS 客户端、预签名URL（本地签名+缓存）、内容类型推导与音频流式分片上传
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import asyncio
+import logging
+import threading
+
+import tos
+from tos.models2 import UploadedPart
+from fastapi import HTTPException, UploadFile, status
+
+from app.config import settings
+from app.core.cache import TTLCache
+from app.core.database import outbound_call
+from app.core.tracing import start_span
+from app.core.tos_signer import TosPresigner
+
+
+logger = logging.getLogger(__name__)
+
+# TOS SDK 为同步阻塞调用，统一放到专用线程池执行，避免阻塞事件循环
+_executor = ThreadPoolExecutor(
+    max_workers=settings.TOS_UPLOAD_WORKERS,
+    thread_name_prefix="tos-upload"
+)
+
+# TOS 分片上传要求除最后一片外每片不小于 5MB
+_MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+_client: Optional[tos.TosClientV2] = None
+_presigner: Optional[TosPresigner] = None
+_init_lock = threading.Lock()
+
+# (方法, 桶, 对象键, 有效期) -> 预签名URL，在临近过期前失效
+_presign_cache = TTLCache(maxsize=settings.TOS_PRESIGN_CACHE_SIZE, ttl=600)
+
+
+def is_configured() -> bool:
+    """TOS 配置是否完整"""
+    return bool(
+        settings.TOS_ACCESS_KEY_ID and settings.TOS_SECRET_ACCESS_KEY and settings.TOS_BUCKET
+        and settings.TOS_REGION and settings.TOS_ENDPOINT
+    )
+
+
+def init_storage() -> None:
+    """创建进程级 TOS 客户端与预签名器（应用启动时调用，重复调用无副作用）"""
+    global _client, _presigner
+    with _init_lock:
+        if _client is not None:
+            return
+        endpoint = settings.TOS_ENDPOINT if settings.TOS_ENDPOINT.startswith("http") else f"https://{settings.TOS_ENDPOINT}"
+        _presigner = TosPresigner(
+            settings.TOS_ACCESS_KEY_ID, settings.TOS_SECRET_ACCESS_KEY, settings.TOS_REGION, endpoint
+        )
+        _client = tos.TosClientV2(
+            settings.TOS_ACCESS_KEY_ID, settings.TOS_SECRET_ACCESS_KEY, endpoint, settings.TOS_REGION,
+            enable_verify_ssl=settings.TOS_SSL_VERIFY
+        )
+
+
+def get_tos_client() -> tos.TosClientV2:
+    """
+    获取进程级 TOS 客户端（未初始化时先创建）
+
+    Returns:
+        tos.TosClientV2: TOS 客户端
+    """
+    if _client is None:
+        init_storage()
+    return _client
+
+
+def presign_url(method: str, object_key: str, expires: int = 600) -> str:
+    """
+    生成预签名URL
+
+    本地签名，不发起网络请求；同一对象的链接在剩余有效期
+    大于 TOS_PRESIGN_REFRESH_MARGIN 秒时直接复用缓存。
+
+    Args:
+        method: HTTP 方法（GET/PUT）
+        object_key: 对象键
+        expires: 有效期（秒）
+
+    Returns:
+        str: 预签名URL
+    """
+    if _presigner is None:
+        init_storage()
+    cache_key = (method.upper(), settings.TOS_BUCKET, object_key, expires)
+    url = _presign_cache.get(cache_key)
+    with start_span("tos.presign", attributes={"tos.method": method.upper(), "tos.cached": url is not None}):
+        if url is None:
+            url = _presigner.presign(method, settings.TOS_BUCKET, object_key, expires)
+            reuse = expires - settings.TOS_PRESIGN_REFRESH_MARGIN
+            if reuse > 0:
+                _presign_cache.set(cache_key, url, ttl=reuse)
+    return url
+
+
+def content_type_for(fmt: str) -> str:
+    """根据音频格式推导 Content-Type"""
+    if fmt == "webm":
+        return "audio/webm"
+    if fmt in ("ogg", "opus"):
+        return "audio/ogg"
+    if fmt == "wav":
+        return "audio/wav"
+    if fmt == "mp3":
+        return "audio/mpeg"
+    return "application/octet-stream"
+
+
+async def _run(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, lambda: func(*args, **kwargs))
+
+
+async def _read_part(upload: UploadFile, part_size: int, received: int, hasher=None) -> bytes:
+    """读取一个分片，累计大小超过 MAX_UPLOAD_SIZE 时立即拒绝；传入 hasher 时同步更新摘要"""
+    chunks: List[bytes] = []
+    size = 0
+    while size < part_size:
+        chunk = await upload.read(min(settings.UPLOAD_CHUNK_SIZE, part_size - size))
+        if not chunk:
+            break
+        size += len(chunk)
+        if received + size > settings.MAX_UPLOAD_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"音频超过大小限制（{settings.MAX_UPLOAD_SIZE} 字节）"
+            )
+        if hasher is not None:
+            hasher.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def head_etag(object_key: str) -> str:
+    """
+    获取对象 ETag（在线程池中执行）
+
+    Args:
+        object_key: 对象键
+
+    Returns:
+        str: ETag
+
+    Raises:
+        HTTPException: 对象不存在时404
+    """
+    try:
+        with outbound_call("tos.head_object"):
+            result = await _run(get_tos_client().head_object, settings.TOS_BUCKET, object_key)
+    except Exception as e:
+        if getattr(e, "status_code", None) == 404:
+            raise HTTPException(status_code=404, detail="音频对象不存在")
+        raise
+    return (result.etag or "").strip('"')
+
+
+async def get_bytes(object_key: str) -> bytes:
+    """
+    在线程池中下载对象，超过 MAX_UPLOAD_SIZE 时拒绝
+
+    Args:
+        object_key: 对象键
+
+    Returns:
+        bytes: 对象内容
+
+    Raises:
+        HTTPException: 对象不存在时404，过大时413
+    """
+    def _get() -> bytes:
+        result = get_tos_client().get_object(settings.TOS_BUCKET, object_key)
+        if (result.content_length or 0) > settings.MAX_UPLOAD_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"音频超过大小限制（{settings.MAX_UPLOAD_SIZE} 字节）"
+            )
+        return result.read()
+
+    try:
+        with outbound_call("tos.get_object"):
+            return await _run(_get)
+    except HTTPException:
+        raise
+    except Exception as e:
+        if getattr(e, "status_code", None) == 404:
+            raise HTTPException(status_code=404, detail="音频对象不存在")
+        raise
+
+
+async def object_exists(object_key: str) -> bool:
+    """
+    对象是否存在（在线程池中执行 HEAD）
+
+    Args:
+        object_key: 对象键
+
+    Returns:
+        bool: 是否存在
+    """
+    try:
+        await head_etag(object_key)
+    except HTTPException as e:
+        if e.status_code == 404:
+            return False
+        raise
+    return True
+
+
+async def read_upload(upload: UploadFile) -> bytes:
+    """
+    分块读取整个上传文件，超过 MAX_UPLOAD_SIZE 时立即拒绝
+
+    Args:
+        upload: 上传文件
+
+    Returns:
+        bytes: 文件内容
+    """
+    data = await _read_part(upload, settings.MAX_UPLOAD_SIZE + 1, 0)
+    if not data:
+        raise HTTPException(status_code=400, detail="音频为空")
+    return data
+
+
+async def put_bytes(
+    client: tos.TosClientV2,
+    object_key: str,
+    data: bytes,
+    content_type: str,
+    cache_control: Optional[str] = None
+) -> None:
+    """
+    在线程池中单次上传对象
+
+    Args:
+        client: TOS 客户端
+        object_key: 对象键
+        data: 对象内容
+        content_type: 内容类型
+        cache_control: 对象的 Cache-Control 元数据（可选）
+    """
+    with outbound_call("tos.put_object"):
+        result = await _run(
+            client.put_object, settings.TOS_BUCKET, object_key,
+            content=data, content_type=content_type, cache_control=cache_control
+        )
+    if result.status_code not in (200, 204):
+        raise HTTPException(status_code=502, detail=f"TOS 上传失败: status={result.status_code}")
+
+
+async def upload_stream(
+    client: tos.TosClientV2,
+    upload: UploadFile,
+    object_key: str,
+    content_type: str,
+    hasher=None
+) -> int:
+    """
+    将上传文件流式写入 TOS
+
+    按分片读取上传内容，单片即可容纳时直接 put_object，否则走分片上传，
+    各分片在线程池中并行上传，同一时刻最多缓冲 TOS_UPLOAD_CONCURRENCY 个分片。
+
+    Args:
+        client: TOS 客户端
+        upload: 上传文件
+        object_key: 对象键
+        content_type: 内容类型
+        hasher: 可选的 hashlib 对象，读取时同步计算内容摘要
+
+    Returns:
+        int: 上传的字节数
+    """
+    bucket = settings.TOS_BUCKET
+    part_size = max(settings.TOS_UPLOAD_PART_SIZE, _MIN_PART_SIZE)
+
+    first = await _read_part(upload, part_size, 0, hasher)
+    if not first:
+        raise HTTPException(status_code=400, detail="音频为空")
+
+    if len(first) < part_size:
+        # 小文件：单次上传
+        await put_bytes(client, object_key, first, content_type)
+        return len(first)
+
+    with outbound_call("tos.create_multipart_upload"):
+        created = await _run(
+            client.create_multipart_upload, bucket, object_key, content_type=content_type
+        )
+    upload_id = created.upload_id
+
+    semaphore = asyncio.Semaphore(settings.TOS_UPLOAD_CONCURRENCY)
+    tasks: List[asyncio.Task] = []
+
+    async def _upload_part(part_number: int, data: bytes) -> UploadedPart:
+        try:
+            result = await _run(
+                client.upload_part, bucket, object_key, upload_id, part_number, content=data
+            )
+            return UploadedPart(part_number, result.etag)
+        finally:
+            semaphore.release()
+
+    total = 0
+    data = first
+    try:
+        with outbound_call("tos.upload_part"):
+            while data:
+                await semaphore.acquire()
+                tasks.append(asyncio.create_task(_upload_part(len(tasks) + 1, data)))
+                total += len(data)
+                data = await _read_part(upload, part_size, total, hasher)
+            parts = await asyncio.gather(*tasks)
+
+        with outbound_call("tos.complete_multipart_upload"):
+            await _run(client.complete_multipart_upload, bucket, object_key, upload_id, parts=list(parts))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            await _run(client.abort_multipart_upload, bucket, object_key, upload_id)
+        except Exception as e:
+            logger.warning(f"取消分片上传失败 key={object_key}: {e}")
+        raise
+    return total
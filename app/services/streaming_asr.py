@@ -0,0 +1,192 @@
+"""
+流式语音识别服务
+可插拔的流式 ASR 提供方接口，以及用于离线开发/测试的本地回放实现
+"""
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional
+import asyncio
+import json
+
+from app.config import settings
+
+
+@dataclass
+class TranscriptEvent:
+    """识别结果事件"""
+    text: str
+    is_final: bool
+    start_ms: Optional[int] = None
+    end_ms: Optional[int] = None
+
+
+class StreamingAsrSession:
+    """
+    一次流式识别会话
+
+    调用方持续 send_audio 推送音频帧，结束时调用 finish；
+    results 按到达顺序产出中间结果与最终结果，会话结束后迭代终止。
+    """
+
+    async def send_audio(self, chunk: bytes) -> None:
+        raise NotImplementedError
+
+    async def finish(self) -> None:
+        raise NotImplementedError
+
+    def results(self) -> AsyncIterator[TranscriptEvent]:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """释放会话资源（可重复调用）"""
+
+
+class StreamingAsrProvider:
+    """流式 ASR 提供方"""
+
+    name = ""
+
+    async def open(self, language: str, fmt: str, sample_rate: int) -> StreamingAsrSession:
+        """
+        建立识别会话
+
+        Args:
+            language: 语言（如 zh-CN）
+            fmt: 音频格式（pcm/opus/webm 等）
+            sample_rate: 采样率
+
+        Returns:
+            StreamingAsrSession: 识别会话
+        """
+        raise NotImplementedError
+
+
+class _MockSession(StreamingAsrSession):
+    """按脚本回放识别结果：每收到若干音频帧推进一段中间结果，句子揭示完毕即给出最终结果"""
+
+    _END = object()
+
+    def __init__(self, script: List[str], latency: float, frames_per_step: int):
+        self._script = script or [""]
+        self._latency = latency
+        self._frames_per_step = max(frames_per_step, 1)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._sentence = 0
+        self._revealed = 0
+        self._frames = 0
+        self._elapsed_ms = 0
+        self._sentence_start_ms = 0
+        self._closed = False
+
+    def _emit(self, event) -> None:
+        # 模拟后端处理延迟：事件带上可交付时间，按顺序延后产出
+        due = asyncio.get_running_loop().time() + self._latency
+        self._queue.put_nowait((due, event))
+
+    def _step(self) -> None:
+        if self._sentence >= len(self._script):
+            return
+        sentence = self._script[self._sentence]
+        step = max(len(sentence) // 4, 1)
+        self._revealed = min(self._revealed + step, len(sentence))
+        if self._revealed < len(sentence):
+            self._emit(TranscriptEvent(sentence[:self._revealed], False, self._sentence_start_ms))
+        else:
+            self._emit(TranscriptEvent(sentence, True, self._sentence_start_ms, self._elapsed_ms))
+            self._sentence += 1
+            self._revealed = 0
+            self._sentence_start_ms = self._elapsed_ms
+
+    async def send_audio(self, chunk: bytes) -> None:
+        self._frames += 1
+        # 假定每帧约 100ms
+        self._elapsed_ms += 100
+        if self._frames % self._frames_per_step == 0:
+            self._step()
+
+    async def finish(self) -> None:
+        # 音频结束：尚未揭示完的句子直接作为最终结果给出
+        while self._sentence < len(self._script):
+            sentence = self._script[self._sentence]
+            self._emit(TranscriptEvent(sentence, True, self._sentence_start_ms, self._elapsed_ms))
+            self._sentence += 1
+            self._sentence_start_ms = self._elapsed_ms
+        self._emit(self._END)
+
+    async def results(self) -> AsyncIterator[TranscriptEvent]:
+        loop = asyncio.get_running_loop()
+        while True:
+            due, event = await self._queue.get()
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if event is self._END:
+                return
+            yield event
+
+    async def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put_nowait((0.0, self._END))
+
+
+class MockStreamingProvider(StreamingAsrProvider):
+    """
+    本地回放提供方
+
+    回放 STREAMING_ASR_MOCK_SCRIPT 中的句子，结果延迟由
+    STREAMING_ASR_MOCK_LATENCY_MS 控制，无需任何外部服务。
+    """
+
+    name = "mock"
+
+    async def open(self, language: str, fmt: str, sample_rate: int) -> StreamingAsrSession:
+        try:
+            script = json.loads(settings.STREAMING_ASR_MOCK_SCRIPT)
+        except ValueError:
+            script = [settings.STREAMING_ASR_MOCK_SCRIPT]
+        return _MockSession(
+            [str(s) for s in script],
+            settings.STREAMING_ASR_MOCK_LATENCY_MS / 1000,
+            settings.STREAMING_ASR_MOCK_FRAMES_PER_STEP,
+        )
+
+
+_providers: Dict[str, Callable[[], StreamingAsrProvider]] = {
+    MockStreamingProvider.name: MockStreamingProvider,
+}
+_instances: Dict[str, StreamingAsrProvider] = {}
+
+
+def register_provider(name: str, factory: Callable[[], StreamingAsrProvider]) -> None:
+    """
+    注册流式 ASR 提供方
+
+    Args:
+        name: 提供方名称（对应 STREAMING_ASR_PROVIDER）
+        factory: 创建提供方实例的工厂
+    """
+    _providers[name] = factory
+    _instances.pop(name, None)
+
+
+def get_streaming_provider(name: Optional[str] = None) -> StreamingAsrProvider:
+    """
+    获取流式 ASR 提供方（进程内单例）
+
+    Args:
+        name: 提供方名称，默认读取 STREAMING_ASR_PROVIDER
+
+    Returns:
+        StreamingAsrProvider: 提供方实例
+
+    Raises:
+        ValueError: 未注册的提供方
+    """
+    name = name or settings.STREAMING_ASR_PROVIDER
+    if name not in _instances:
+        factory = _providers.get(name)
+        if factory is None:
+            raise ValueError(f"未知的流式ASR提供方: {name}")
+        _instances[name] = factory()
+    return _instances[name]
@@ -0,0 +1,134 @@
+"""
+识别结果缓存
+
+按音频内容（SHA-256，或对象键+ETag）、语言与格式缓存识别结果：
+客户端重试或超时后重复提交同一音频时直接返回缓存，
+同一内容的识别仍在进行时后到的请求加入该任务，不再重复提交付费的 AUC 任务。
+进程内为有界 LRU；启用 ASR_CACHE_REDIS 时同时写入 Redis，跨进程、跨重启复用。
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import json
+import logging
+
+from app.config import settings
+from app.core.cache import TTLCache
+from app.core.metrics import Counter
+from app.core.redis import get_async_redis
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS = Counter(
+    "asr_cache_requests_total", "识别结果缓存查询次数", ["result"]
+)
+
+_REDIS_PREFIX = "asr_transcript:"
+
+
+def cache_key(content_id: str, language: str, fmt: str) -> str:
+    """
+    组合缓存键
+
+    Args:
+        content_id: 内容标识（音频 SHA-256，或 对象键+ETag）
+        language: 语言
+        fmt: 音频格式
+
+    Returns:
+        str: 缓存键
+    """
+    return f"{content_id}:{language}:{fmt}"
+
+
+class TranscriptCache:
+    """识别结果缓存（含进行中任务去重）"""
+
+    def __init__(self):
+        self._local = TTLCache(
+            maxsize=settings.ASR_CACHE_MAX_SIZE,
+            ttl=settings.ASR_CACHE_TTL_SECONDS
+        )
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """获取缓存结果，未命中时返回None"""
+        value = self._local.get(key)
+        if value is not None:
+            return value
+        redis = get_async_redis() if settings.ASR_CACHE_REDIS else None
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(_REDIS_PREFIX + key)
+        except Exception as e:
+            logger.warning(f"读取识别缓存失败: {e}")
+            return None
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self._local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """写入缓存结果"""
+        self._local.set(key, value)
+        redis = get_async_redis() if settings.ASR_CACHE_REDIS else None
+        if redis is None:
+            return
+        try:
+            await redis.set(
+                _REDIS_PREFIX + key,
+                json.dumps(value, ensure_ascii=False),
+                ex=settings.ASR_CACHE_TTL_SECONDS
+            )
+        except Exception as e:
+            logger.warning(f"写入识别缓存失败: {e}")
+
+    async def get_or_run(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Dict[str, Any]]],
+        cacheable: Callable[[Dict[str, Any]], bool] = lambda v: bool(v.get("text"))
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        获取缓存结果，未命中时执行识别
+
+        同一键的识别正在进行时直接等待该任务；识别任务独立于发起请求，
+        发起方断开不会取消其他等待者。只缓存 cacheable 为真的结果（默认要求有文本）。
+
+        Args:
+            key: 缓存键
+            factory: 执行识别的协程工厂
+            cacheable: 判断结果是否可缓存
+
+        Returns:
+            Tuple[Dict[str, Any], str]: 识别结果与来源（hit/joined/miss）
+        """
+        cached = await self.get(key)
+        if cached is not None:
+            CACHE_REQUESTS.inc(result="hit")
+            return cached, "hit"
+
+        task = self._inflight.get(key)
+        source = "joined"
+        if task is None:
+            source = "miss"
+
+            async def _run():
+                try:
+                    value = await factory()
+                    if cacheable(value):
+                        await self.set(key, value)
+                    return value
+                finally:
+                    self._inflight.pop(key, None)
+
+            task = self._inflight[key] = asyncio.create_task(_run())
+            # 所有等待者都已取消时避免"异常未被获取"告警
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        CACHE_REQUESTS.inc(result=source)
+        return await asyncio.shield(task), source
+
+
+transcript_cache = TranscriptCache()
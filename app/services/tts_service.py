@@ -0,0 +1,375 @@
+"""
+语音合成服务
+
+可插拔的 TTS 提供方（火山引擎 HTTP 接口，以及用于离线开发/测试的本地提示音实现），
+合成结果按 提供方+音色+语速+文本 做内容寻址缓存，存放在本地 UPLOAD_DIR/tts 或 TOS：
+同一文本只合成一次，进行中的合成由后到的请求直接等待；音频文件名即内容摘要，可长期缓存。
+"""
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import base64
+import io
+import logging
+import math
+import os
+import re
+import struct
+import time
+import uuid
+import wave
+
+from app.config import settings
+from app.core.cache import TTLCache
+from app.core.database import outbound_call
+from app.core.http_client import get_http_client
+from app.core.metrics import Counter, Histogram
+from app.services.storage_service import (
+    content_type_for, get_tos_client, object_exists, presign_url, put_bytes
+)
+
+
+logger = logging.getLogger(__name__)
+
+TTS_REQUESTS = Counter(
+    "tts_requests_total", "语音合成缓存查询次数", ["result"]
+)
+TTS_SYNTHESIS_SECONDS = Histogram(
+    "tts_synthesis_seconds", "调用提供方合成一条音频的耗时", ["provider"]
+)
+
+# 文件名即内容摘要，内容永不变化
+AUDIO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_FILENAME_RE = re.compile(r"^[0-9a-f]{64}\.(wav|mp3|ogg)$")
+
+
+class TtsProvider:
+    """语音合成提供方"""
+
+    name = ""
+    fmt = "mp3"
+
+    async def synthesize(self, text: str, voice: str, speed: float) -> bytes:
+        """
+        合成一段文本
+
+        Args:
+            text: 文本
+            voice: 音色
+            speed: 语速倍率
+
+        Returns:
+            bytes: 音频内容（格式为 fmt）
+        """
+        raise NotImplementedError
+
+
+class MockTtsProvider(TtsProvider):
+    """
+    本地提示音提供方
+
+    按文本长度与语速生成确定性的 8kHz 单声道提示音 WAV，无需任何外部服务。
+    """
+
+    name = "mock"
+    fmt = "wav"
+
+    _RATE = 8000
+    _FREQ = 400
+
+    async def synthesize(self, text: str, voice: str, speed: float) -> bytes:
+        seconds = min(max(len(text) * 0.15 / max(speed, 0.1), 0.5), 20.0)
+        period = self._RATE // self._FREQ
+        cycle = struct.pack(
+            f"<{period}h",
+            *(int(8000 * math.sin(2 * math.pi * i / period)) for i in range(period))
+        )
+        frames = int(seconds * self._RATE)
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(self._RATE)
+            w.writeframes((cycle * (frames // period + 1))[:frames * 2])
+        return buf.getvalue()
+
+
+class VolcengineTtsProvider(TtsProvider):
+    """火山引擎语音合成（HTTP 非流式接口，返回 mp3）"""
+
+    name = "volcengine"
+    fmt = "mp3"
+
+    async def synthesize(self, text: str, voice: str, speed: float) -> bytes:
+        app_id = settings.VOLC_TTS_APP_ID or settings.VOLC_ASR_APP_ID
+        token = settings.VOLC_TTS_TOKEN or settings.VOLC_ASR_TOKEN
+        if not (app_id and token):
+            raise RuntimeError("火山引擎 TTS 未配置应用ID或令牌")
+        payload = {
+            "app": {"appid": app_id, "token": token, "cluster": settings.VOLC_TTS_CLUSTER},
+            "user": {"uid": "ai-interview"},
+            "audio": {"voice_type": voice, "encoding": self.fmt, "speed_ratio": speed},
+            "request": {
+                "reqid": str(uuid.uuid4()),
+                "text": text,
+                "text_type": "plain",
+                "operation": "query",
+            },
+        }
+        with outbound_call("volc.tts"):
+            resp = await get_http_client().post(
+                settings.VOLC_TTS_ENDPOINT,
+                json=payload,
+                headers={"Authorization": f"Bearer;{token}"},
+            )
+        data = resp.json() if resp.content else {}
+        if resp.status_code != 200 or data.get("code") != 3000 or not data.get("data"):
+            raise RuntimeError(
+                f"火山引擎 TTS 合成失败: status={resp.status_code}, "
+                f"code={data.get('code')}, message={data.get('message')}"
+            )
+        return base64.b64decode(data["data"])
+
+
+_providers: Dict[str, Callable[[], TtsProvider]] = {
+    MockTtsProvider.name: MockTtsProvider,
+    VolcengineTtsProvider.name: VolcengineTtsProvider,
+}
+_instances: Dict[str, TtsProvider] = {}
+
+
+def register_provider(name: str, factory: Callable[[], TtsProvider]) -> None:
+    """
+    注册语音合成提供方
+
+    Args:
+        name: 提供方名称（对应 TTS_PROVIDER）
+        factory: 创建提供方实例的工厂
+    """
+    _providers[name] = factory
+    _instances.pop(name, None)
+
+
+def get_tts_provider(name: Optional[str] = None) -> TtsProvider:
+    """
+    获取语音合成提供方（进程内单例）
+
+    Args:
+        name: 提供方名称，默认读取 TTS_PROVIDER
+
+    Returns:
+        TtsProvider: 提供方实例
+
+    Raises:
+        ValueError: 未注册的提供方
+    """
+    name = name or settings.TTS_PROVIDER
+    if name not in _instances:
+        factory = _providers.get(name)
+        if factory is None:
+            raise ValueError(f"未知的语音合成提供方: {name}")
+        _instances[name] = factory()
+    return _instances[name]
+
+
+@dataclass(frozen=True)
+class TtsAudio:
+    """一段合成音频的内容地址"""
+    digest: str
+    fmt: str
+
+    @property
+    def filename(self) -> str:
+        return f"{self.digest}.{self.fmt}"
+
+
+def normalize_text(text: str) -> str:
+    """合并空白，使仅空白不同的文本共用同一条音频"""
+    return " ".join((text or "").split())
+
+
+def audio_for(text: str, provider: Optional[TtsProvider] = None) -> TtsAudio:
+    """
+    计算文本对应音频的内容地址
+
+    Args:
+        text: 文本（已规范化）
+        provider: 提供方，默认当前配置
+
+    Returns:
+        TtsAudio: 内容地址
+    """
+    provider = provider or get_tts_provider()
+    source = "\n".join([
+        provider.name, settings.VOLC_TTS_VOICE or "", f"{settings.VOLC_TTS_SPEED:g}", text
+    ])
+    return TtsAudio(sha256(source.encode("utf-8")).hexdigest(), provider.fmt)
+
+
+def is_valid_filename(filename: str) -> bool:
+    """音频文件名是否为合法的内容地址（防止路径穿越）"""
+    return bool(_FILENAME_RE.match(filename))
+
+
+def local_path(filename: str) -> str:
+    """本地存储时音频文件路径（按摘要前两位分目录）"""
+    return os.path.join(settings.UPLOAD_DIR, "tts", filename[:2], filename)
+
+
+def object_key(filename: str) -> str:
+    """TOS 存储时音频对象键"""
+    return f"tts/{filename}"
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class TtsCache:
+    """合成音频缓存（含进行中任务去重与并发上限）"""
+
+    def __init__(self):
+        # 已确认存在于存储中的音频，避免重复查盘/HEAD
+        self._known = TTLCache(maxsize=50000, ttl=86400)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _exists(self, audio: TtsAudio) -> bool:
+        if self._known.get(audio.filename):
+            return True
+        if settings.TTS_STORAGE == "tos":
+            found = await object_exists(object_key(audio.filename))
+        else:
+            found = os.path.exists(local_path(audio.filename))
+        if found:
+            self._known.set(audio.filename, True)
+        return found
+
+    async def _save(self, audio: TtsAudio, data: bytes) -> None:
+        if settings.TTS_STORAGE == "tos":
+            await put_bytes(
+                get_tos_client(), object_key(audio.filename), data,
+                content_type_for(audio.fmt), cache_control=AUDIO_CACHE_CONTROL
+            )
+        else:
+            await asyncio.to_thread(_write_atomic, local_path(audio.filename), data)
+        self._known.set(audio.filename, True)
+
+    async def _synthesize(self, provider: TtsProvider, audio: TtsAudio, text: str) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(settings.TTS_CONCURRENCY, 1))
+        async with self._semaphore:
+            # 排队期间可能已由其他进程写入
+            if await self._exists(audio):
+                return
+            started = time.perf_counter()
+            data = await provider.synthesize(
+                text, settings.VOLC_TTS_VOICE or "", settings.VOLC_TTS_SPEED
+            )
+            TTS_SYNTHESIS_SECONDS.observe(time.perf_counter() - started, provider=provider.name)
+            await self._save(audio, data)
+
+    async def ensure(self, text: str) -> Tuple[TtsAudio, str]:
+        """
+        确保文本对应的音频已合成并存储
+
+        同一音频正在合成时直接等待该任务；合成任务独立于发起请求，
+        发起方断开不会取消其他等待者。
+
+        Args:
+            text: 文本
+
+        Returns:
+            Tuple[TtsAudio, str]: 内容地址与来源（hit/joined/miss）
+
+        Raises:
+            ValueError: 文本为空
+        """
+        text = normalize_text(text)
+        if not text:
+            raise ValueError("合成文本为空")
+        provider = get_tts_provider()
+        audio = audio_for(text, provider)
+
+        if await self._exists(audio):
+            TTS_REQUESTS.inc(result="hit")
+            return audio, "hit"
+
+        task = self._inflight.get(audio.filename)
+        source = "joined"
+        if task is None:
+            source = "miss"
+
+            async def _run():
+                try:
+                    await self._synthesize(provider, audio, text)
+                finally:
+                    self._inflight.pop(audio.filename, None)
+
+            task = self._inflight[audio.filename] = asyncio.create_task(_run())
+            # 所有等待者都已取消时避免"异常未被获取"告警
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        TTS_REQUESTS.inc(result=source)
+        await asyncio.shield(task)
+        return audio, source
+
+
+tts_cache = TtsCache()
+
+
+def audio_url(audio: TtsAudio) -> str:
+    """
+    音频访问地址
+
+    本地存储时为 /voice/tts/audio/{文件名}（可长期缓存）；
+    TOS 存储时为预签名 GET 链接（有效期 TTS_URL_EXPIRES）。
+
+    Args:
+        audio: 内容地址
+
+    Returns:
+        str: 访问地址
+    """
+    if settings.TTS_STORAGE == "tos":
+        return presign_url("GET", object_key(audio.filename), settings.TTS_URL_EXPIRES)
+    return f"{settings.API_V1_PREFIX}/voice/tts/audio/{audio.filename}"
+
+
+async def synthesize_many(texts: Iterable[str]) -> List[Optional[TtsAudio]]:
+    """
+    并发合成多段文本（并发受 TTS_CONCURRENCY 限制）
+
+    Args:
+        texts: 文本列表
+
+    Returns:
+        List[Optional[TtsAudio]]: 与输入一一对应的内容地址，合成失败的为None
+    """
+    async def _one(text: str) -> Optional[TtsAudio]:
+        try:
+            audio, _ = await tts_cache.ensure(text)
+            return audio
+        except Exception as e:
+            logger.warning(f"语音合成失败: {e}")
+            return None
+
+    return list(await asyncio.gather(*(_one(t) for t in texts)))
+
+
+async def presynthesize(texts: List[str]) -> None:
+    """
+    后台预合成（问题生成后调用）
+
+    Args:
+        texts: 问题文本列表
+    """
+    results = await synthesize_many(texts)
+    failed = sum(1 for r in results if r is None)
+    if failed:
+        logger.warning(f"预合成完成，{failed}/{len(results)} 条失败")
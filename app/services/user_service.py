@@ -10,6 +10,17 @@ from app.models.user import User
 from app.models.setting import Setting
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash
+from app.core.user_cache import invalidate_user
+from app.services.availability_service import availability_index
+
+
+# 新用户的默认设置
+DEFAULT_SETTING = {
+    "language": "zh-CN",
+    "voice_type": "default",
+    "auto_save": True,
+    "speech_recognition_quality": "high",
+}
 
 
 def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
@@ -54,13 +65,14 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
     return db.query(User).filter(User.email == email).first()
 
 
-def create_user(db: Session, user_create: UserCreate) -> Optional[User]:
+def create_user(db: Session, user_create: UserCreate, hashed_password: Optional[str] = None) -> Optional[User]:
     """
     创建新用户
     
     Args:
         db: 数据库会话
         user_create: 用户创建数据
+        hashed_password: 已计算好的密码哈希（异步调用方在线程池中预先计算），为空时在此计算
         
     Returns:
         Optional[User]: 创建的用户对象或None（如果用户名/邮箱已存在）
@@ -70,23 +82,18 @@ def create_user(db: Session, user_create: UserCreate) -> Optional[User]:
         db_user = User(
             username=user_create.username,
             email=user_create.email,
-            hashed_password=get_password_hash(user_create.password),
+            hashed_password=hashed_password or get_password_hash(user_create.password),
             is_active=True
         )
         db.add(db_user)
         db.flush()  # 获取用户ID
         
         # 创建默认设置
-        default_setting = Setting(
-            user_id=db_user.id,
-            language="zh-CN",
-            voice_type="default",
-            auto_save=True,
-            speech_recognition_quality="high"
-        )
+        default_setting = Setting(user_id=db_user.id, **DEFAULT_SETTING)
         db.add(default_setting)
         
         db.commit()
+        availability_index.add(db_user.username, db_user.email)
         db.refresh(db_user)
         return db_user
         
@@ -118,6 +125,9 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[
     
     try:
         db.commit()
+        invalidate_user(user_id)
+        if "username" in update_data or "email" in update_data:
+            availability_index.add(db_user.username, db_user.email)
         db.refresh(db_user)
         return db_user
     except IntegrityError:
@@ -142,6 +152,7 @@ def delete_user(db: Session, user_id: int) -> bool:
     
     db.delete(db_user)
     db.commit()
+    invalidate_user(user_id)
     return True
 
 
@@ -162,6 +173,7 @@ def deactivate_user(db: Session, user_id: int) -> Optional[User]:
     
     db_user.is_active = False
     db.commit()
+    invalidate_user(user_id)
     db.refresh(db_user)
     return db_user
 
@@ -183,6 +195,7 @@ def activate_user(db: Session, user_id: int) -> Optional[User]:
     
     db_user.is_active = True
     db.commit()
+    invalidate_user(user_id)
     db.refresh(db_user)
     return db_user
 
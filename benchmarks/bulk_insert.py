@@ -0,0 +1,132 @@
+"""
+批量回答提交与问题多行插入基准
+
+对比两条路径（SQLite，进程内 ASGI 调用，不含网络开销）：
+- 回答：逐题 POST /answers/ 与一次 POST /answers/bulk
+- 问题：逐个 db.add 后提交（工作单元刷新）与单条多行 INSERT
+
+报告每场面试的请求数、SQL 语句数与耗时。默认使用临时 SQLite 库；设置 DATABASE_URL
+可对 MySQL 运行，此时每条语句的往返延迟会放大两条路径的差距。
+
+    python benchmarks/bulk_insert.py --interviews 20 --questions 10
+"""
+import argparse
+import time
+
+from common import configure, count_statements, create_user, print_table
+
+configure()
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.core.database import SessionLocal, engine
+from app.main import app
+from app.models.question import Question
+
+
+def _create_interviews(client, headers, count: int):
+    return [
+        client.post("/api/v1/interviews/", json={"position": "后端工程师"}, headers=headers).json()["id"]
+        for _ in range(count)
+    ]
+
+
+def _question_rows(interview_id: int, count: int):
+    return [
+        {
+            "interview_id": interview_id,
+            "question_text": f"这是第{i}个面试问题的文本",
+            "question_order": i,
+            "language": "zh-CN",
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def _insert_per_row(interview_id: int, count: int):
+    with SessionLocal() as db:
+        db.info["use_primary"] = True
+        # 原实现：逐个 db.add，提交时由工作单元刷新
+        for row in _question_rows(interview_id, count):
+            db.add(Question(**row))
+        db.commit()
+
+
+def _insert_multi_row(interview_id: int, count: int):
+    with SessionLocal() as db:
+        db.info["use_primary"] = True
+        db.execute(insert(Question).values(_question_rows(interview_id, count)))
+        db.commit()
+
+
+def _question_ids(interview_id: int):
+    with SessionLocal() as db:
+        db.info["use_primary"] = True
+        return [q.id for q in db.query(Question.id).filter(Question.interview_id == interview_id)]
+
+
+def _answer(question_id: int):
+    return {"question_id": question_id, "answer_text": "这是一段足够长的回答内容", "answer_type": "text"}
+
+
+def _submit_per_row(client, headers, question_ids):
+    for qid in question_ids:
+        client.post("/api/v1/answers/", json=_answer(qid), headers=headers).raise_for_status()
+    return len(question_ids)
+
+
+def _submit_bulk(client, headers, question_ids):
+    client.post(
+        "/api/v1/answers/bulk", json={"answers": [_answer(q) for q in question_ids]}, headers=headers
+    ).raise_for_status()
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--interviews", type=int, default=20, help="每条路径的面试数")
+    parser.add_argument("--questions", type=int, default=10, help="每场面试的问题数（bulk 上限 50）")
+    args = parser.parse_args()
+
+    rows = []
+    with TestClient(app) as client:
+        headers = create_user(client, "bench_bulk")
+        interviews = {
+            "per-row": _create_interviews(client, headers, args.interviews),
+            "multi-row": _create_interviews(client, headers, args.interviews),
+        }
+
+        for label, insert_questions in (("per-row", _insert_per_row), ("multi-row", _insert_multi_row)):
+            with count_statements(engine) as statements:
+                start = time.perf_counter()
+                for interview_id in interviews[label]:
+                    insert_questions(interview_id, args.questions)
+                elapsed = time.perf_counter() - start
+            rows.append([
+                f"questions {label}", "-",
+                len(statements) / args.interviews, elapsed * 1000 / args.interviews,
+            ])
+
+        for label, submit, ids in (
+            ("answers per-row", _submit_per_row, interviews["per-row"]),
+            ("answers bulk", _submit_bulk, interviews["multi-row"]),
+        ):
+            question_ids = [_question_ids(i) for i in ids]
+            requests = 0
+            with count_statements(engine) as statements:
+                start = time.perf_counter()
+                for qids in question_ids:
+                    requests += submit(client, headers, qids)
+                elapsed = time.perf_counter() - start
+            rows.append([
+                label, requests / args.interviews,
+                len(statements) / args.interviews, elapsed * 1000 / args.interviews,
+            ])
+
+    print(f"{args.interviews} interviews x {args.questions} questions, {engine.dialect.name}")
+    print_table(["path", "requests/interview", "statements/interview", "ms/interview"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+基准脚本公共工具
+
+各脚本在导入 app 之前调用 configure()：默认使用临时目录中的 SQLite 数据库并关闭限流，
+不需要 MySQL、Redis 或外部服务；已设置的环境变量优先。
+"""
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+import asyncio
+import os
+import resource
+import statistics
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def configure(**overrides: str) -> None:
+    """
+    设置基准运行的环境变量（须在导入 app 之前调用）
+
+    Args:
+        overrides: 额外的配置项（同名环境变量已设置时不覆盖）
+    """
+    defaults = {
+        "DATABASE_URL": f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-'), 'bench.db')}",
+        "RATE_LIMIT_ENABLED": "false",
+        "BCRYPT_ROUNDS": "4",
+        "LOG_LEVEL": "WARNING",
+        **overrides,
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+
+@contextmanager
+def count_statements(engine) -> Iterator[List[str]]:
+    """记录上下文内在 engine 上执行的 SQL 语句"""
+    from sqlalchemy import event
+
+    executed: List[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield executed
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+
+def create_user(client, name: str, password: str = "Passw0rd!") -> Dict[str, str]:
+    """注册并登录，返回认证请求头"""
+    client.post("/api/v1/auth/register", json={
+        "username": name, "email": f"{name}@example.com", "password": password
+    })
+    token = client.post("/api/v1/auth/login", json={
+        "username": name, "password": password
+    }).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def peak_rss_mb() -> float:
+    """进程峰值 RSS（MB）"""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+class LoopLagMonitor:
+    """
+    事件循环卡顿监测
+
+    后台任务每 interval 秒醒来一次，实际醒来时间晚于预期的部分即为卡顿；
+    报告最大卡顿与累计卡顿（超过 threshold 的部分）。
+    """
+
+    def __init__(self, interval: float = 0.005, threshold: float = 0.02):
+        self.interval = interval
+        self.threshold = threshold
+        self.lags: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(loop.time() - expected, 0.0))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    @property
+    def max_lag(self) -> float:
+        return max(self.lags, default=0.0)
+
+    @property
+    def stalled(self) -> float:
+        return sum(lag for lag in self.lags if lag > self.threshold)
+
+    @property
+    def p99_lag(self) -> float:
+        if len(self.lags) < 2:
+            return self.max_lag
+        return statistics.quantiles(self.lags, n=100, method="inclusive")[98]
+
+
+def print_table(headers: List[str], rows: List[List]) -> None:
+    """按列对齐打印结果表"""
+    cells = [[str(h) for h in headers]] + [
+        [f"{c:.2f}" if isinstance(c, float) else str(c) for c in row] for row in rows
+    ]
+    widths = [max(len(r[i]) for r in cells) for i in range(len(headers))]
+    for idx, row in enumerate(cells):
+        print("  ".join(c.ljust(w) for c, w in zip(row, widths)))
+        if idx == 0:
+            print("  ".join("-" * w for w in widths))
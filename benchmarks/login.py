@@ -0,0 +1,98 @@
+"""
+并发登录吞吐与事件循环卡顿基准
+
+同一事件循环内并发发起若干登录请求（httpx ASGITransport，进程内调用），同时监测事件循环卡顿，对比：
+- inline：原实现，bcrypt 验证直接在事件循环上执行
+- pool：security._run_hash，在专用线程池中执行（PASSWORD_HASH_WORKERS 个线程）
+
+报告登录吞吐、单次登录耗时与事件循环最大卡顿、p99 卡顿与累计卡顿。
+
+    python benchmarks/login.py --rounds 12 --logins 16
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from common import LoopLagMonitor, configure, print_table
+
+
+async def _inline_hash(op: str, func, *args):
+    # 原实现：在事件循环上同步计算
+    return func(*args)
+
+
+async def _login(client, username: str, password: str) -> float:
+    start = time.perf_counter()
+    response = await client.post("/api/v1/auth/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def _run_mode(app, mode: str, logins: int, username: str, password: str) -> list:
+    import httpx
+
+    from app.core import security
+
+    original = security._run_hash
+    if mode == "inline":
+        security._run_hash = _inline_hash
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await _login(client, username, password)
+            monitor = LoopLagMonitor()
+            monitor.start()
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*(_login(client, username, password) for _ in range(logins)))
+            elapsed = time.perf_counter() - start
+            await monitor.stop()
+    finally:
+        security._run_hash = original
+
+    return [
+        mode, logins / elapsed,
+        statistics.median(latencies) * 1000, max(latencies) * 1000,
+        monitor.max_lag * 1000, monitor.p99_lag * 1000, monitor.stalled * 1000,
+    ]
+
+
+async def _main(args) -> None:
+    import httpx
+
+    from app.core.database import init_db
+    from app.main import app
+
+    init_db()
+    username, password = "bench_login", "Passw0rd!"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/api/v1/auth/register", json={
+            "username": username, "email": f"{username}@example.com", "password": password
+        })
+
+    rows = [await _run_mode(app, mode, args.logins, username, password) for mode in ("inline", "pool")]
+
+    from app.config import settings
+    print(f"{args.logins} concurrent logins, BCRYPT_ROUNDS={settings.BCRYPT_ROUNDS}, "
+          f"PASSWORD_HASH_WORKERS={settings.PASSWORD_HASH_WORKERS}, {os.cpu_count()} CPUs")
+    print_table(
+        ["mode", "logins/s", "p50 ms", "max ms", "max lag ms", "p99 lag ms", "stalled ms"], rows
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt 成本因子（BCRYPT_ROUNDS）")
+    parser.add_argument("--logins", type=int, default=16, help="并发登录数")
+    args = parser.parse_args()
+
+    # 成本因子在导入 app 时读取，命令行参数优先于环境变量
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    configure()
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
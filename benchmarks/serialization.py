@@ -0,0 +1,239 @@
+"""
+JSON 序列化与响应压缩基准
+
+针对最大的几个读接口（面试列表、面试问题集、面试评价）输出两张表：
+
+1. 序列化流水线：同一批 ORM 对象按各方式序列化（及压缩）的 CPU 时间与字节数
+   - fastapi+json：FastAPI 默认流程（校验 → 导出 → jsonable_encoder → 标准库 json，原实现）
+   - fastapi+orjson：同上，最后一步换成 orjson（RESPONSE_ORJSON）
+   - dump_json：按属性校验一次后由 pydantic 直接输出 JSON（RESPONSE_SKIP_REVALIDATION 与读缓存使用的 serialize）
+   - dump_json+gzip / dump_json+br：再按 RESPONSE_GZIP_LEVEL / RESPONSE_BROTLI_QUALITY 压缩（br 需安装 brotli）
+2. 端到端请求：按以下配置分别请求各接口，报告每次请求的进程 CPU 时间、耗时与线上传输字节数
+   - stdlib：关闭 RESPONSE_ORJSON、RESPONSE_SKIP_REVALIDATION 与压缩（原实现）
+   - orjson / orjson+skip / orjson+skip+compress：依次开启（Accept-Encoding: br, gzip）
+   这些配置在导入时生效，每种配置在独立子进程中运行，共用同一个预先写入数据的 SQLite 库。
+   这三个路由经读缓存的 cached_json 输出，无论 RESPONSE_SKIP_REVALIDATION 是否开启都走 dump_json，
+   端到端表中前三种配置的差异主要是测量噪声；各方式本身的开销以第一张表为准。
+
+    python benchmarks/serialization.py --interviews 100 --questions 50 --requests 200 --iterations 500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from common import configure, create_user, print_table
+
+configure()
+
+_CONFIGS = [
+    ("stdlib", {"RESPONSE_ORJSON": "false", "RESPONSE_SKIP_REVALIDATION": "false",
+                "RESPONSE_COMPRESSION_ENABLED": "false"}),
+    ("orjson", {"RESPONSE_ORJSON": "true", "RESPONSE_SKIP_REVALIDATION": "false",
+                "RESPONSE_COMPRESSION_ENABLED": "false"}),
+    ("orjson+skip", {"RESPONSE_ORJSON": "true", "RESPONSE_SKIP_REVALIDATION": "true",
+                     "RESPONSE_COMPRESSION_ENABLED": "false"}),
+    ("orjson+skip+compress", {"RESPONSE_ORJSON": "true", "RESPONSE_SKIP_REVALIDATION": "true",
+                              "RESPONSE_COMPRESSION_ENABLED": "true"}),
+]
+
+
+def _seed(interviews: int, questions: int) -> dict:
+    """写入基准数据，返回认证请求头与各接口路径"""
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+
+    from app.core.database import SessionLocal
+    from app.main import app
+    from app.models.evaluation import Evaluation
+    from app.models.interview import Interview
+    from app.models.question import Question
+
+    with TestClient(app) as client:
+        headers = create_user(client, "bench_serialization")
+        user_id = client.get("/api/v1/auth/me", headers=headers).json()["id"]
+
+    with SessionLocal() as db:
+        db.info["use_primary"] = True
+        db.execute(insert(Interview).values([
+            {
+                "user_id": user_id,
+                "position": f"后端开发工程师 {i}",
+                "description": "负责核心交易系统的设计与开发，参与高并发场景下的性能优化与稳定性建设。" * 3,
+                "skills": ["Python", "FastAPI", "MySQL", "Redis", "Kafka", "Kubernetes"],
+                "duration": 60,
+            }
+            for i in range(interviews)
+        ]))
+        interview_id = db.query(Interview.id).filter(Interview.user_id == user_id).order_by(Interview.id).first()[0]
+        db.execute(insert(Question).values([
+            {
+                "interview_id": interview_id,
+                "question_text": f"第{i}题：请结合你做过的项目，说明如何定位并解决一次线上接口延迟突增的问题，"
+                                 "包括排查思路、使用的工具以及最终的改进措施。",
+                "question_order": i,
+                "language": "zh-CN",
+            }
+            for i in range(1, questions + 1)
+        ]))
+        db.add(Evaluation(
+            interview_id=interview_id, overall_score=82, technical_score=85, communication_score=78,
+            experience_score=80, learning_score=88,
+            feedback="候选人技术基础扎实，能够清晰描述系统设计中的权衡，对性能问题有系统化的排查思路。" * 10,
+            suggestions=[f"建议{i}：加强分布式事务与一致性方面的实践经验。" for i in range(20)],
+            strengths=[f"优势{i}：代码质量意识强，重视测试与可观测性。" for i in range(20)],
+            weaknesses=[f"不足{i}：对容量规划的量化分析还不够深入。" for i in range(20)],
+        ))
+        db.commit()
+
+    return {
+        "headers": headers,
+        "user_id": user_id,
+        "interview_id": interview_id,
+        "paths": {
+            "interviews list": "/api/v1/interviews/?limit=100",
+            "interview questions": f"/api/v1/questions/interview/{interview_id}",
+            "interview evaluation": f"/api/v1/evaluations/interview/{interview_id}",
+        },
+    }
+
+
+def _pipelines():
+    from fastapi.encoders import jsonable_encoder
+
+    from app.core.compression import _compress, brotli
+    from app.core.responses import _adapter, orjson, serialize
+
+    def _fastapi(value, model, dumps):
+        adapter = _adapter(model)
+        content = jsonable_encoder(adapter.dump_python(
+            adapter.validate_python(value, from_attributes=True), mode="json"
+        ))
+        return dumps(content)
+
+    def _stdlib_dumps(content):
+        # 与 starlette JSONResponse.render 相同
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+    pipelines = [("fastapi+json", lambda value, model: _fastapi(value, model, _stdlib_dumps))]
+    if orjson is not None:
+        pipelines.append(("fastapi+orjson", lambda value, model: _fastapi(value, model, orjson.dumps)))
+    pipelines.append(("dump_json", serialize))
+    pipelines.append(("dump_json+gzip", lambda value, model: _compress(serialize(value, model), "gzip")))
+    if brotli is not None:
+        pipelines.append(("dump_json+br", lambda value, model: _compress(serialize(value, model), "br")))
+    return pipelines
+
+
+def _measure_pipelines(paths: dict, iterations: int) -> list:
+    """在本进程内对各接口返回的同一批 ORM 对象测量各序列化流水线"""
+    from typing import List
+
+    from app.core.database import SessionLocal
+    from app.models.evaluation import Evaluation as EvaluationModel
+    from app.models.question import Question as QuestionModel
+    from app.schemas.evaluation import Evaluation
+    from app.schemas.interview import Interview
+    from app.schemas.question import Question
+    from app.services.interview_service import get_user_interviews
+
+    rows = []
+    with SessionLocal() as db:
+        db.info["use_primary"] = True
+        interview_id = paths["interview_id"]
+        user_id = paths["user_id"]
+        values = {
+            "interviews list": (get_user_interviews(db, user_id, 0, 100, None), List[Interview]),
+            "interview questions": (
+                db.query(QuestionModel).filter(QuestionModel.interview_id == interview_id)
+                .order_by(QuestionModel.question_order).all(),
+                List[Question],
+            ),
+            "interview evaluation": (
+                db.query(EvaluationModel).filter(EvaluationModel.interview_id == interview_id).one(),
+                Evaluation,
+            ),
+        }
+        for endpoint, (value, model) in values.items():
+            for label, pipeline in _pipelines():
+                body = pipeline(value, model)
+                start = time.process_time()
+                for _ in range(iterations):
+                    pipeline(value, model)
+                cpu = time.process_time() - start
+                rows.append([endpoint, label, len(body), cpu * 1e6 / iterations])
+    return rows
+
+
+def _measure(seed: dict, requests: int) -> dict:
+    """在当前进程的配置下请求各接口"""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    headers = {**seed["headers"], "Accept-Encoding": "br, gzip"}
+    results = {}
+    with TestClient(app) as client:
+        for name, path in seed["paths"].items():
+            for _ in range(10):
+                client.get(path, headers=headers).raise_for_status()
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+            for _ in range(requests):
+                response = client.get(path, headers=headers)
+            cpu = time.process_time() - cpu_start
+            wall = time.perf_counter() - wall_start
+            results[name] = {
+                "json_bytes": len(response.content),
+                "wire_bytes": response.num_bytes_downloaded,
+                "encoding": response.headers.get("content-encoding", "-"),
+                "cpu_ms": cpu * 1000 / requests,
+                "wall_ms": wall * 1000 / requests,
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--interviews", type=int, default=100, help="面试数（列表接口返回前 100 条）")
+    parser.add_argument("--questions", type=int, default=50, help="面试问题数")
+    parser.add_argument("--requests", type=int, default=200, help="端到端：每个接口的请求次数")
+    parser.add_argument("--iterations", type=int, default=500, help="序列化流水线：每种方式的重复次数")
+    parser.add_argument("--seed-file", help="已写入数据的描述文件（子进程内部使用）")
+    args = parser.parse_args()
+
+    if args.seed_file:
+        with open(args.seed_file, encoding="utf-8") as f:
+            seed = json.load(f)
+        print(json.dumps(_measure(seed, args.requests)))
+        return
+
+    seed = _seed(args.interviews, args.questions)
+    seed_file = os.path.join(os.path.dirname(os.environ["DATABASE_URL"].split("///", 1)[1]), "seed.json")
+    with open(seed_file, "w", encoding="utf-8") as f:
+        json.dump(seed, f)
+
+    print(f"serialization pipelines, {args.iterations} iterations, "
+          f"{args.interviews} interviews, {args.questions} questions")
+    print_table(["endpoint", "pipeline", "bytes", "CPU us/op"], _measure_pipelines(seed, args.iterations))
+    print()
+
+    rows = []
+    for label, flags in _CONFIGS:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--seed-file", seed_file,
+             "--requests", str(args.requests)],
+            env={**os.environ, **flags}, check=True, capture_output=True, text=True
+        ).stdout
+        for endpoint, r in json.loads(output.strip().splitlines()[-1]).items():
+            rows.append([endpoint, label, r["json_bytes"], r["wire_bytes"], r["encoding"],
+                         r["cpu_ms"], r["wall_ms"]])
+
+    rows.sort(key=lambda row: list(seed["paths"]).index(row[0]))
+    print(f"end-to-end, {args.requests} requests per endpoint")
+    print_table(["endpoint", "config", "JSON bytes", "wire bytes", "encoding", "CPU ms/req", "ms/req"], rows)
+
+
+if __name__ == "__main__":
+    main()
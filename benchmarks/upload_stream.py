@@ -0,0 +1,157 @@
+"""
+音频上传到对象存储的内存与事件循环卡顿基准
+
+并发上传若干 5–10MB 的音频（UploadFile 与线上一样由临时文件承载），对比：
+- buffered：原实现，await upload.read() 读入整个文件后在事件循环上直接调用同步的 put_object
+- streaming：storage_service.upload_stream，分片读取、在线程池中并行上传分片
+
+TOS 由本地替身代替：按 --bandwidth 与 --latency 模拟网络耗时（阻塞调用），并像 SDK 一样计算 CRC。
+每种模式在独立子进程中运行，报告峰值 RSS（相对上传前的增量）、事件循环最大卡顿与累计卡顿。
+
+    python benchmarks/upload_stream.py --uploads 8
+"""
+from types import SimpleNamespace
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+from common import LoopLagMonitor, configure, peak_rss_mb, print_table
+
+configure()
+
+from starlette.datastructures import Headers, UploadFile
+
+from app.config import settings
+from app.services.storage_service import upload_stream
+
+_MB = 1024 * 1024
+# 与 starlette 解析 multipart 时相同：超过 1MB 的上传落盘
+_SPOOL_MAX_SIZE = 1 * _MB
+
+
+class FakeTosClient:
+    """TOS 客户端替身：阻塞调用，耗时 = 延迟 + 字节数 / 带宽"""
+
+    def __init__(self, bandwidth: float, latency: float):
+        self.bandwidth = bandwidth
+        self.latency = latency
+
+    def _send(self, content) -> None:
+        if hasattr(content, "read"):
+            content = content.read()
+        zlib.crc32(content)
+        time.sleep(self.latency + len(content) / self.bandwidth)
+
+    def put_object(self, bucket, key, content=None, **kwargs):
+        self._send(content)
+        return SimpleNamespace(status_code=200)
+
+    def create_multipart_upload(self, bucket, key, **kwargs):
+        time.sleep(self.latency)
+        return SimpleNamespace(upload_id="upload")
+
+    def upload_part(self, bucket, key, upload_id, part_number, content=None, **kwargs):
+        self._send(content)
+        return SimpleNamespace(etag=f"etag-{part_number}")
+
+    def complete_multipart_upload(self, bucket, key, upload_id, parts=None, **kwargs):
+        time.sleep(self.latency)
+        return SimpleNamespace(status_code=200)
+
+    def abort_multipart_upload(self, bucket, key, upload_id, **kwargs):
+        return SimpleNamespace(status_code=204)
+
+
+def _make_upload(size: int, block: bytes) -> UploadFile:
+    spooled = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE)
+    written = 0
+    while written < size:
+        chunk = block[:size - written]
+        spooled.write(chunk)
+        written += len(chunk)
+    spooled.seek(0)
+    return UploadFile(spooled, size=size, filename="answer.webm",
+                      headers=Headers({"content-type": "audio/webm"}))
+
+
+async def _buffered(client: FakeTosClient, upload: UploadFile, key: str) -> int:
+    # 原实现：整个文件读入内存，同步 SDK 直接在事件循环上调用
+    data = await upload.read()
+    client.put_object(settings.TOS_BUCKET, key, content=data, content_type="audio/webm")
+    return len(data)
+
+
+async def _streaming(client: FakeTosClient, upload: UploadFile, key: str) -> int:
+    return await upload_stream(client, upload, key, "audio/webm")
+
+
+async def _run_mode(mode: str, uploads: int, bandwidth: float, latency: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    block = os.urandom(_MB)
+    sizes = [rng.randint(5 * _MB, min(10 * _MB, settings.MAX_UPLOAD_SIZE)) for _ in range(uploads)]
+    files = [_make_upload(size, block) for size in sizes]
+    client = FakeTosClient(bandwidth, latency)
+    upload = _buffered if mode == "buffered" else _streaming
+
+    baseline = peak_rss_mb()
+    monitor = LoopLagMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    total = sum(await asyncio.gather(*(
+        upload(client, f, f"voice/bench/{i}.webm") for i, f in enumerate(files)
+    )))
+    elapsed = time.perf_counter() - start
+    await monitor.stop()
+    for f in files:
+        await f.close()
+    return {
+        "mode": mode,
+        "mb": total / _MB,
+        "seconds": elapsed,
+        "rss_delta_mb": peak_rss_mb() - baseline,
+        "max_lag_ms": monitor.max_lag * 1000,
+        "p99_lag_ms": monitor.p99_lag * 1000,
+        "stalled_ms": monitor.stalled * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=8, help="并发上传数")
+    parser.add_argument("--bandwidth", type=float, default=50.0, help="模拟单连接带宽（MB/s）")
+    parser.add_argument("--latency", type=float, default=0.02, help="模拟每次请求延迟（秒）")
+    parser.add_argument("--seed", type=int, default=1, help="文件大小随机种子")
+    parser.add_argument("--mode", choices=["buffered", "streaming"], help="只运行一种模式（子进程内部使用）")
+    args = parser.parse_args()
+
+    if args.mode:
+        result = asyncio.run(_run_mode(args.mode, args.uploads, args.bandwidth * _MB, args.latency, args.seed))
+        print(json.dumps(result))
+        return
+
+    rows = []
+    for mode in ("buffered", "streaming"):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode,
+             "--uploads", str(args.uploads), "--bandwidth", str(args.bandwidth),
+             "--latency", str(args.latency), "--seed", str(args.seed)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        rows.append([r["mode"], r["mb"], r["seconds"], r["rss_delta_mb"],
+                     r["max_lag_ms"], r["p99_lag_ms"], r["stalled_ms"]])
+
+    print(f"{args.uploads} concurrent uploads of 5-10MB, {args.bandwidth} MB/s, "
+          f"{args.latency * 1000:.0f} ms latency, part size {settings.TOS_UPLOAD_PART_SIZE // _MB}MB")
+    print_table(["mode", "MB", "seconds", "peak RSS +MB", "max lag ms", "p99 lag ms", "stalled ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 数据库初始化脚本
 """
 from app.core.database import init_db, engine
-from app.models import User, Interview, Question, Answer, Evaluation, Setting
+from app.models import User, Interview, Question, Answer, AnswerTranscript, Evaluation, Setting
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -22,6 +22,7 @@ def main():
         logger.info("  - interviews (面试记录表)")
         logger.info("  - questions (问题表)")
         logger.info("  - answers (回答表)")
+        logger.info("  - answer_transcripts (语音回答转写表)")
         logger.info("  - evaluations (评价表)")
         logger.info("  - settings (设置表)")
         
@@ -0,0 +1,122 @@
+"""
+测试公共夹具
+
+主库与只读副本分别使用临时目录中的两个 SQLite 文件作为替身：副本不会自动同步，
+测试通过 replicate 夹具把主库当前内容复制到副本，复制之后主库上的写入即相当于“尚未同步”。
+环境变量须在导入 app 之前设置（配置与数据库引擎在导入时创建）。
+"""
+import itertools
+import json
+import os
+import sqlite3
+import tempfile
+
+_DATA_DIR = tempfile.mkdtemp(prefix="interview-tests-")
+PRIMARY_PATH = os.path.join(_DATA_DIR, "primary.db")
+REPLICA_PATH = os.path.join(_DATA_DIR, "replica.db")
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{PRIMARY_PATH}",
+    "DATABASE_REPLICA_URLS": json.dumps([f"sqlite:///{REPLICA_PATH}"]),
+    "RATE_LIMIT_ENABLED": "false",
+    "BCRYPT_ROUNDS": "4",
+    "REDIS_ENABLED": "false",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core import database, response_cache, user_cache
+from app.core.database import Base, engine, replicas
+from app.core.security import decode_token
+from app.main import app
+from app.models.question import Question
+
+
+_usernames = itertools.count(1)
+
+
+def _copy_primary_to_replica() -> None:
+    source = sqlite3.connect(PRIMARY_PATH)
+    target = sqlite3.connect(REPLICA_PATH)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+
+@pytest.fixture
+def client():
+    """每个测试使用空的主库与副本，并清空进程内的读己之写窗口与各级缓存"""
+    for bind in (engine, *replicas.engines):
+        Base.metadata.drop_all(bind=bind)
+        Base.metadata.create_all(bind=bind)
+    database._recent_writes.clear()
+    response_cache._entries.clear()
+    response_cache._versions.clear()
+    user_cache._principals.clear()
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def replicate():
+    """返回把主库当前内容同步到副本的函数"""
+    return _copy_primary_to_replica
+
+
+@pytest.fixture
+def statements():
+    """记录主库与副本上执行的 SQL 语句（列表，测试中可随时清空）"""
+    executed = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    binds = (engine, *replicas.engines)
+    for bind in binds:
+        event.listen(bind, "before_cursor_execute", _record)
+    yield executed
+    for bind in binds:
+        event.remove(bind, "before_cursor_execute", _record)
+
+
+@pytest.fixture
+def make_user(client):
+    """
+    返回创建用户的函数：注册并登录，返回 (用户ID, 认证请求头)
+    """
+    def _make_user():
+        name = f"user{next(_usernames)}"
+        client.post("/api/v1/auth/register", json={
+            "username": name, "email": f"{name}@example.com", "password": "Passw0rd!"
+        })
+        token = client.post("/api/v1/auth/login", json={
+            "username": name, "password": "Passw0rd!"
+        }).json()["access_token"]
+        return int(decode_token(token)["sub"]), {"Authorization": f"Bearer {token}"}
+    return _make_user
+
+
+@pytest.fixture
+def make_interview(client):
+    """
+    返回创建面试的函数：创建面试并直接在主库写入若干问题，返回 (面试ID, 问题ID列表)
+    """
+    def _make_interview(headers, questions: int = 3):
+        interview_id = client.post(
+            "/api/v1/interviews/", json={"position": "后端工程师"}, headers=headers
+        ).json()["id"]
+        with database.SessionLocal() as db:
+            db.info["use_primary"] = True
+            rows = [
+                Question(interview_id=interview_id, question_text=f"这是第{i}个面试问题的文本", question_order=i)
+                for i in range(1, questions + 1)
+            ]
+            db.add_all(rows)
+            db.commit()
+            question_ids = [q.id for q in rows]
+        return interview_id, question_ids
+    return _make_interview
@@ -0,0 +1,92 @@
+"""
+资源归属校验：每次校验一条查询，404/403 语义不变
+"""
+import pytest
+from fastapi import HTTPException
+
+from app.core.database import SessionLocal
+from app.core.user_cache import UserPrincipal
+from app.dependencies import (
+    resolve_owned_answer, resolve_owned_evaluation, resolve_owned_interview, resolve_owned_question
+)
+from app.models.evaluation import Evaluation
+
+MISSING_ID = 999999
+
+RESOLVERS = {
+    "interview": resolve_owned_interview,
+    "question": resolve_owned_question,
+    "answer": resolve_owned_answer,
+    "evaluation": resolve_owned_evaluation,
+}
+
+PATHS = {
+    "interview": "/api/v1/interviews/{}",
+    "question": "/api/v1/questions/{}",
+    "answer": "/api/v1/answers/{}",
+    "evaluation": "/api/v1/evaluations/{}",
+}
+
+
+@pytest.fixture
+def owned(client, make_user, make_interview):
+    """用户 A 的面试、问题、回答与评价，以及无权访问的用户 B"""
+    owner_id, owner_headers = make_user()
+    other_id, other_headers = make_user()
+    interview_id, question_ids = make_interview(owner_headers)
+    answer_id = client.post("/api/v1/answers/", json={
+        "question_id": question_ids[0], "answer_text": "回答内容足够长的文本", "answer_type": "text"
+    }, headers=owner_headers).json()["id"]
+    with SessionLocal() as db:
+        db.info["use_primary"] = True
+        evaluation = Evaluation(
+            interview_id=interview_id, overall_score=80, technical_score=80,
+            communication_score=80, experience_score=80, learning_score=80, feedback="整体表现良好，技术基础扎实"
+        )
+        db.add(evaluation)
+        db.commit()
+        evaluation_id = evaluation.id
+    return {
+        "owner": (owner_id, owner_headers),
+        "other": (other_id, other_headers),
+        "ids": {
+            "interview": interview_id,
+            "question": question_ids[0],
+            "answer": answer_id,
+            "evaluation": evaluation_id,
+        },
+    }
+
+
+@pytest.mark.parametrize("kind", list(RESOLVERS))
+def test_ownership_check_is_one_statement(owned, statements, kind):
+    resource_id = owned["ids"][kind]
+    cases = [
+        (owned["owner"][0], resource_id, None),
+        (owned["other"][0], resource_id, 403),
+        (owned["owner"][0], MISSING_ID, 404),
+    ]
+    for user_id, target, expected_status in cases:
+        with SessionLocal() as db:
+            db.info["use_primary"] = True
+            statements.clear()
+            principal = UserPrincipal(id=user_id, is_active=True)
+            if expected_status is None:
+                assert RESOLVERS[kind](db, principal, target).id == target
+            else:
+                with pytest.raises(HTTPException) as exc_info:
+                    RESOLVERS[kind](db, principal, target)
+                assert exc_info.value.status_code == expected_status
+            assert len(statements) == 1, statements
+
+
+@pytest.mark.parametrize("kind", list(PATHS))
+def test_ownership_status_codes(client, owned, kind):
+    path = PATHS[kind]
+    resource_id = owned["ids"][kind]
+    _, owner_headers = owned["owner"]
+    _, other_headers = owned["other"]
+
+    assert client.get(path.format(resource_id), headers=owner_headers).status_code == 200
+    assert client.get(path.format(resource_id), headers=other_headers).status_code == 403
+    assert client.get(path.format(MISSING_ID), headers=owner_headers).status_code == 404
@@ -0,0 +1,108 @@
+"""
+读写分离：请求方法路由、读己之写粘滞窗口、副本延迟回退
+"""
+import sqlite3
+
+import pytest
+from starlette.requests import HTTPConnection
+
+from app.config import settings
+from app.core import database
+from app.core.database import engine, get_db, replicas
+
+PRIMARY_PATH = engine.url.database
+REPLICA_PATH = replicas.engines[0].url.database
+
+
+def _count_interviews(path: str) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM interviews").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _session_for(method: str):
+    scope = {"type": "http", "method": method, "path": "/", "headers": []}
+    return get_db(HTTPConnection(scope))
+
+
+@pytest.mark.parametrize("method", ["GET", "HEAD", "OPTIONS"])
+def test_read_methods_use_replica(client, method):
+    sessions = _session_for(method)
+    db = next(sessions)
+    try:
+        assert db.get_bind() is replicas.engines[0]
+    finally:
+        sessions.close()
+
+
+@pytest.mark.parametrize("method", ["POST", "PUT", "PATCH", "DELETE"])
+def test_write_methods_use_primary(client, method):
+    sessions = _session_for(method)
+    db = next(sessions)
+    try:
+        assert db.get_bind() is engine
+    finally:
+        sessions.close()
+
+
+def test_get_reads_replica_after_sticky_window(client, make_user, make_interview, replicate, monkeypatch):
+    _, headers = make_user()
+    interview_id, _ = make_interview(headers)
+    replicate()
+    conn = sqlite3.connect(REPLICA_PATH)
+    conn.execute("UPDATE interviews SET position = '副本' WHERE id = ?", (interview_id,))
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(settings, "DATABASE_STICKY_PRIMARY_SECONDS", 0)
+    assert client.get(f"/api/v1/interviews/{interview_id}", headers=headers).json()["position"] == "副本"
+
+
+def test_writes_go_to_primary(client, make_user, make_interview, replicate):
+    _, headers = make_user()
+    make_interview(headers)
+    replicate()
+
+    resp = client.post("/api/v1/interviews/", json={"position": "前端工程师"}, headers=headers)
+
+    assert resp.status_code == 201
+    assert _count_interviews(PRIMARY_PATH) == 2
+    assert _count_interviews(REPLICA_PATH) == 1
+
+
+def test_sticky_primary_window_after_write(client, make_user, make_interview, replicate, monkeypatch):
+    _, headers = make_user()
+    make_interview(headers)
+    replicate()
+    client.post("/api/v1/interviews/", json={"position": "前端工程师"}, headers=headers)
+
+    # 窗口内：读己之写，读主库
+    assert len(client.get("/api/v1/interviews/", headers=headers).json()) == 2
+
+    # 窗口结束：回到副本（尚未同步第二次写入）
+    monkeypatch.setattr(settings, "DATABASE_STICKY_PRIMARY_SECONDS", 0)
+    assert len(client.get("/api/v1/interviews/", headers=headers).json()) == 1
+
+
+def test_lagging_replica_falls_back_to_primary(client, make_user, make_interview, replicate, monkeypatch):
+    _, headers = make_user()
+    make_interview(headers)
+    replicate()
+    client.post("/api/v1/interviews/", json={"position": "前端工程师"}, headers=headers)
+    monkeypatch.setattr(settings, "DATABASE_STICKY_PRIMARY_SECONDS", 0)
+
+    lag = settings.DATABASE_REPLICA_MAX_LAG_SECONDS + 1
+    monkeypatch.setattr(database, "_measure_replica_lag", lambda replica: lag)
+    replicas.refresh()
+    try:
+        assert replicas.lag[0] == lag
+        assert len(client.get("/api/v1/interviews/", headers=headers).json()) == 2
+    finally:
+        monkeypatch.undo()
+        replicas.refresh()
+
+    # 延迟恢复后重新加入轮询
+    monkeypatch.setattr(settings, "DATABASE_STICKY_PRIMARY_SECONDS", 0)
+    assert len(client.get("/api/v1/interviews/", headers=headers).json()) == 1
@@ -0,0 +1,43 @@
+"""
+按用户读缓存与读写分离的配合
+"""
+from app.config import settings
+from app.core import database
+
+
+def test_miss_on_other_worker_reads_primary(client, make_user, make_interview, replicate, monkeypatch):
+    """
+    worker A 写入后，worker B 的未命中不能把副本上的旧数据缓存到新版本下
+
+    同一进程模拟两个 worker：版本号与缓存条目共享（相当于启用 Redis），
+    清空读己之写窗口即相当于请求落在没有处理过该写入的 worker 上。
+    """
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+    _, headers = make_user()
+    make_interview(headers)
+    replicate()
+
+    assert len(client.get("/api/v1/interviews/", headers=headers).json()) == 1
+
+    # worker A：写入使版本号递增，副本尚未同步
+    client.post("/api/v1/interviews/", json={"position": "前端工程师"}, headers=headers)
+
+    # worker B：没有该用户的粘滞窗口，未命中的计算仍须读主库
+    database._recent_writes.clear()
+    assert len(client.get("/api/v1/interviews/", headers=headers).json()) == 2
+    # 缓存的是主库结果，之后的命中同样看到新数据
+    assert len(client.get("/api/v1/interviews/", headers=headers).json()) == 2
+
+
+def test_cache_hit_skips_database(client, make_user, make_interview, statements, monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+    _, headers = make_user()
+    interview_id, _ = make_interview(headers)
+
+    first = client.get(f"/api/v1/interviews/{interview_id}", headers=headers)
+    statements.clear()
+    second = client.get(f"/api/v1/interviews/{interview_id}", headers=headers)
+
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert statements == []